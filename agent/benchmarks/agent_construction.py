@@ -0,0 +1,96 @@
+"""Per-turn overhead of building a react agent on every turn vs. reusing a compiled one.
+
+Run from the agent directory:
+
+    python -m benchmarks.agent_construction
+
+A fake chat model that answers immediately stands in for Haiku, so the numbers
+are pure LangGraph overhead: prompt rendering, graph construction and compile,
+tool binding, and one model step.
+"""
+
+import asyncio
+import os
+import statistics
+import time
+
+os.environ.setdefault("ANTHROPIC_API_KEY", "benchmark")  # Model is never called
+
+from langchain_core.language_models.fake_chat_models import FakeMessagesListChatModel
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.prebuilt import create_react_agent
+
+from src.nodes.customer_agent import CUSTOMER_IDENTITY, CUSTOMER_PROMPT, customer_prompt
+from src.state import AgentIdentityState
+from src.tools.customer_tools import CUSTOMER_TOOLS
+
+TURNS = 200
+
+
+class InstantModel(FakeMessagesListChatModel):
+    """Fake chat model that accepts tools and always replies with plain text."""
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+
+def _model():
+    return InstantModel(responses=[AIMessage(content="Here you go!")] * (TURNS * 2))
+
+
+async def per_turn_build(model) -> list[float]:
+    """The old path: build and compile the agent inside every node call."""
+    timings = []
+    for _ in range(TURNS):
+        start = time.perf_counter()
+        agent = create_react_agent(
+            model,
+            tools=CUSTOMER_TOOLS,
+            prompt=CUSTOMER_PROMPT + "\n\n" + CUSTOMER_IDENTITY.format(customer_id=60, customer_name="Jake Broekhuizen"),
+            checkpointer=False,
+        )
+        await agent.ainvoke({"messages": [HumanMessage(content="Show my invoices")]})
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+async def compiled_once(model) -> list[float]:
+    """The new path: one compiled agent, identity passed through state."""
+    agent = create_react_agent(
+        model,
+        tools=CUSTOMER_TOOLS,
+        prompt=customer_prompt,
+        state_schema=AgentIdentityState,
+        checkpointer=False,
+    )
+    timings = []
+    for _ in range(TURNS):
+        start = time.perf_counter()
+        await agent.ainvoke({
+            "messages": [HumanMessage(content="Show my invoices")],
+            "user_role": "customer",
+            "user_id": 60,
+            "user_name": "Jake Broekhuizen",
+            "supported_customers": [],
+        })
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def _report(label: str, timings: list[float]):
+    timings = sorted(timings)
+    print(
+        f"{label:<22} mean={statistics.mean(timings) * 1000:.2f}ms "
+        f"p50={statistics.median(timings) * 1000:.2f}ms "
+        f"p99={timings[int(len(timings) * 0.99)] * 1000:.2f}ms"
+    )
+
+
+async def main():
+    print(f"{TURNS} turns each, fake model\n")
+    _report("build every turn", await per_turn_build(_model()))
+    _report("compiled once", await compiled_once(_model()))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
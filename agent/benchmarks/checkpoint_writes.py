@@ -0,0 +1,120 @@
+"""Checkpoint write latency as a thread grows: per-channel deltas vs. full state.
+
+Run from the agent directory:
+
+    python -m benchmarks.checkpoint_writes
+
+Each thread is seeded with N earlier turns, then runs TURNS more through a
+one-node graph over the real AgentState. Every put() is timed and the bytes it
+serializes are summed:
+
+- full:  every channel is rewritten on every checkpoint
+- delta: SqliteCheckpointSaver as shipped, only channels whose version changed
+
+The messages channel is rewritten whenever it changes, so cost still grows
+with history; the history node keeps that bounded in the real graph. The
+delta skips it on the checkpoints where only other channels moved, and never
+rewrites the user context or summary.
+"""
+
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.graph import START, StateGraph
+
+from src.checkpointer import SqliteCheckpointSaver
+from src.state import AgentState
+
+HISTORY_TURNS = [0, 10, 50, 100, 200]
+TURNS = 30
+
+USER = {
+    "user_role": "employee",
+    "user_id": 3,
+    "user_name": "Jane Peacock",
+    "supported_customers": list(range(1, 60)),
+    "next_agent": None,
+    "supervisor_turns": 0,
+    "summary": "Jane asked about invoices for customers 12 and 31. " * 6,
+}
+ANSWER = "Here are the invoices you asked for. " * 10
+
+
+class TimedSaver(SqliteCheckpointSaver):
+    """Records the wall time and serialized bytes of every put()."""
+
+    full = False
+
+    def __init__(self, path):
+        super().__init__(path, keep=10**9)
+        self.timings: list[float] = []
+        self.bytes = 0
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        if self.full:
+            new_versions = checkpoint["channel_versions"]
+        self.bytes += sum(
+            len(self.serde.dumps_typed(checkpoint["channel_values"][c])[1] or b"")
+            for c in new_versions if c in checkpoint["channel_values"]
+        )
+        start = time.perf_counter()
+        result = super().put(config, checkpoint, metadata, new_versions)
+        self.timings.append(time.perf_counter() - start)
+        return result
+
+
+class FullStateSaver(TimedSaver):
+    full = True
+
+
+def reply(state: AgentState) -> dict:
+    return {"messages": [AIMessage(content=ANSWER)]}
+
+
+def _history(turns: int) -> list:
+    messages = []
+    for i in range(turns):
+        messages += [HumanMessage(content=f"Show invoices for customer {i}"), AIMessage(content=ANSWER)]
+    return messages
+
+
+def run(saver_cls, turns: int, path: Path) -> TimedSaver:
+    saver = saver_cls(path)
+    builder = StateGraph(AgentState)
+    builder.add_node("reply", reply)
+    builder.add_edge(START, "reply")
+    graph = builder.compile(checkpointer=saver)
+
+    config = {"configurable": {"thread_id": f"bench-{turns}"}}
+    graph.invoke({**USER, "messages": _history(turns)}, config)
+    saver.timings.clear()
+    saver.bytes = 0
+    for i in range(TURNS):
+        graph.invoke({"messages": [HumanMessage(content=f"And customer {i}?")]}, config)
+    saver.close()
+    return saver
+
+
+def _ms(timings: list[float]) -> str:
+    timings = sorted(timings)
+    return f"{statistics.mean(timings) * 1000:6.2f}ms p99 {timings[int(len(timings) * 0.99)] * 1000:6.2f}ms"
+
+
+def main():
+    print(f"{TURNS} turns per thread; put() latency and bytes serialized per turn\n")
+    print(f"{'history turns':>13}  {'full state':<34} {'delta':<34}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for turns in HISTORY_TURNS:
+            full = run(FullStateSaver, turns, Path(tmp) / f"full-{turns}.db")
+            delta = run(TimedSaver, turns, Path(tmp) / f"delta-{turns}.db")
+            print(
+                f"{turns:>13}  {_ms(full.timings)} {full.bytes // TURNS:>7,}B  "
+                f"{_ms(delta.timings)} {delta.bytes // TURNS:>7,}B"
+            )
+
+
+if __name__ == "__main__":
+    main()
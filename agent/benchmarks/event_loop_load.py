@@ -0,0 +1,96 @@
+"""Latency of unrelated requests while a slow recommendation query runs.
+
+Run from the agent directory:
+
+    python -m benchmarks.event_loop_load
+
+Unrelated requests (a login lookup that misses the user cache) are started
+every INTERVAL seconds for DURATION seconds, and each one's latency is
+measured from when it was due, so time spent waiting for a blocked event loop
+counts. Meanwhile a slow get_genre_recommendations call, over a customer
+padded with purchase history, runs back to back:
+
+- idle:     no slow query, the baseline
+- blocking: the query runs on the event loop, as a sync get_db() call in
+            async code does
+- async:    the query runs through the tool's coroutine on the DB executor,
+            and lookups use run_with_db()
+"""
+
+import asyncio
+import os
+import shutil
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+os.environ.setdefault("ANTHROPIC_API_KEY", "benchmark")  # No model is called
+
+from src import db, recommender
+from src.tools import RECOMMENDATION_TOOLS
+from src.users import get_user, user_cache
+
+from .parallel_tools import CUSTOMER_ID, pad_history
+
+DURATION = 5.0
+INTERVAL = 0.005
+
+SLOW_TOOL = next(t for t in RECOMMENDATION_TOOLS if t.name == "get_genre_recommendations")
+SLOW_ARGS = {"customer_id": CUSTOMER_ID}
+
+
+async def _slow_queries(mode: str, deadline: float) -> int:
+    runs = 0
+    while time.perf_counter() < deadline:
+        if mode == "blocking":
+            SLOW_TOOL.func(**SLOW_ARGS)
+            await asyncio.sleep(0)
+        else:
+            await SLOW_TOOL.ainvoke(SLOW_ARGS)
+        runs += 1
+    return runs
+
+
+async def _request(due: float, latencies: list[float]):
+    user_cache.clear()  # Every request goes to the database
+    await get_user("jake")
+    latencies.append(time.perf_counter() - due)
+
+
+async def _load(mode: str) -> tuple[list[float], int]:
+    start = time.perf_counter()
+    slow = asyncio.create_task(_slow_queries(mode, start + DURATION)) if mode != "idle" else None
+    latencies: list[float] = []
+    requests = []
+    for i in range(int(DURATION / INTERVAL)):
+        due = start + i * INTERVAL
+        await asyncio.sleep(max(0.0, due - time.perf_counter()))
+        requests.append(asyncio.create_task(_request(due, latencies)))
+    await asyncio.gather(*requests)
+    return latencies, await slow if slow else 0
+
+
+async def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "chinook.db"
+        shutil.copy(db.DATABASE_PATH, path)
+        pad_history(path)
+        # Nothing has connected yet, so the pool opens the padded copy
+        db.DATABASE_PATH = path
+        recommender.SIMILARITY_PATH = path.with_name("artist_similarity.json")
+        SLOW_TOOL.func(**SLOW_ARGS)  # Build recommender caches up front
+
+        print(f"login lookups every {INTERVAL * 1000:.0f}ms for {DURATION:.0f}s, cpus={os.cpu_count()}\n")
+        for mode in ("idle", "blocking", "async"):
+            latencies, slow_runs = await _load(mode)
+            latencies.sort()
+            print(
+                f"{mode:<9} p50={statistics.median(latencies) * 1000:7.2f}ms "
+                f"p99={latencies[int(len(latencies) * 0.99)] * 1000:7.2f}ms "
+                f"max={latencies[-1] * 1000:7.2f}ms  slow queries run={slow_runs}"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,84 @@
+"""Login lookup latency as the customers table grows, with and without the login indexes.
+
+Run from the agent directory:
+
+    python -m benchmarks.login_lookup
+
+Pads a temporary copy of chinook.db with synthetic customers up to each size,
+then times the same queries users.lookup_user runs for an employee login
+(employee + supported customers) and a customer login.
+"""
+
+import shutil
+import sqlite3
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from src.db import DATABASE_PATH
+from src.schema import LOGIN_INDEXES
+
+SIZES = [10_000, 100_000, 1_000_000]
+LOOKUPS = 200
+
+EMPLOYEE_SQL = "SELECT EmployeeId, FirstName, LastName FROM employees WHERE LOWER(FirstName) = ?"
+SUPPORTED_SQL = "SELECT CustomerId FROM customers WHERE SupportRepId = ?"
+CUSTOMER_SQL = "SELECT CustomerId, FirstName, LastName FROM customers WHERE LOWER(FirstName) = ?"
+
+
+def _grow(conn: sqlite3.Connection, size: int):
+    """Insert synthetic customers until the table holds `size` rows.
+
+    They are spread over 1,000 synthetic support reps, so the real employees'
+    supported-customer lists keep their size and only the table grows.
+    """
+    current = conn.execute("SELECT COUNT(*) FROM customers").fetchone()[0]
+    conn.executemany(
+        "INSERT INTO customers (FirstName, LastName, Email, SupportRepId) VALUES (?, ?, ?, ?)",
+        (
+            (f"Synthetic{i}", "Customer", f"synthetic{i}@example.com", 100 + i % 1000)
+            for i in range(current, size)
+        ),
+    )
+    conn.commit()
+
+
+def _time_logins(conn: sqlite3.Connection) -> tuple[float, float]:
+    """Return (employee, customer) median login latency in ms."""
+    employee, customer = [], []
+    for _ in range(LOOKUPS):
+        start = time.perf_counter()
+        emp = conn.execute(EMPLOYEE_SQL, ("jane",)).fetchone()
+        conn.execute(SUPPORTED_SQL, (emp[0],)).fetchall()
+        employee.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        conn.execute(EMPLOYEE_SQL, ("jake",)).fetchone()  # Customers are checked after employees
+        conn.execute(CUSTOMER_SQL, ("jake",)).fetchone()
+        customer.append(time.perf_counter() - start)
+    return statistics.median(employee) * 1000, statistics.median(customer) * 1000
+
+
+def main():
+    print(f"median of {LOOKUPS} logins; employee login includes its supported-customer list\n")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "chinook.db"
+        shutil.copy(DATABASE_PATH, path)
+        conn = sqlite3.connect(path)
+        for size in SIZES:
+            _grow(conn, size)
+            conn.execute("DROP INDEX IF EXISTS idx_employees_login")
+            conn.execute("DROP INDEX IF EXISTS idx_customers_login")
+            scan = _time_logins(conn)
+            conn.executescript(LOGIN_INDEXES)
+            indexed = _time_logins(conn)
+            print(
+                f"{size:>9,} customers  scan: employee={scan[0]:.3f}ms customer={scan[1]:.3f}ms  "
+                f"indexed: employee={indexed[0]:.3f}ms customer={indexed[1]:.3f}ms"
+            )
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""Multi-tool agent steps: tool calls one after another vs. concurrently on the DB executor.
+
+Run from the agent directory:
+
+    python -m benchmarks.parallel_tools
+
+Pads a temporary copy of chinook.db with purchase history for one customer,
+so each tool's queries take long enough to measure, then runs the tool-call
+pairs the customer and recommendation agents typically emit together:
+
+- sequential: each call awaited before the next, i.e. the sum of the calls
+- step:       one ToolNode step with all calls, as the agent runs them
+
+While each step runs, a ticker task measures the longest the event loop went
+without getting control back.
+
+SQLite releases the GIL while a query runs, so the calls of a step overlap
+when there are cores to run them on; on a single-core host the step takes
+about as long as the sequential calls.
+"""
+
+import asyncio
+import os
+import shutil
+import sqlite3
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+os.environ.setdefault("ANTHROPIC_API_KEY", "benchmark")  # No model is called
+
+from langchain_core.messages import AIMessage
+from langgraph.graph import START, MessagesState, StateGraph
+from langgraph.prebuilt import ToolNode
+
+from src import db, recommender
+from src.tools import CUSTOMER_TOOLS, RECOMMENDATION_TOOLS
+
+CUSTOMER_ID = 60
+EXTRA_INVOICES = 5_000
+LINES_PER_INVOICE = 10
+ROUNDS = 20
+
+STEPS = {
+    "invoices + purchases": [
+        ("get_my_invoices", {"customer_id": CUSTOMER_ID}),
+        ("get_my_purchases", {"customer_id": CUSTOMER_ID}),
+    ],
+    "genre + artist recs": [
+        ("get_genre_recommendations", {"customer_id": CUSTOMER_ID}),
+        ("get_artist_recommendations", {"customer_id": CUSTOMER_ID}),
+    ],
+}
+
+
+def pad_history(path: Path):
+    """Give the customer EXTRA_INVOICES more invoices of LINES_PER_INVOICE random tracks."""
+    conn = sqlite3.connect(path)
+    tracks = conn.execute("SELECT COUNT(*) FROM tracks").fetchone()[0]
+    for i in range(EXTRA_INVOICES):
+        cur = conn.execute(
+            "INSERT INTO invoices (CustomerId, InvoiceDate, Total) VALUES (?, ?, ?)",
+            (CUSTOMER_ID, f"2024-{1 + i % 12:02}-{1 + i % 28:02} 12:00:00", 9.9),
+        )
+        conn.executemany(
+            "INSERT INTO invoice_items (InvoiceId, TrackId, UnitPrice, Quantity) VALUES (?, ?, 0.99, 1)",
+            [(cur.lastrowid, 1 + (i * 37 + j * 101) % tracks) for j in range(LINES_PER_INVOICE)],
+        )
+    conn.commit()
+    conn.close()
+
+
+async def _max_loop_lag(stop: asyncio.Event) -> float:
+    """Longest gap between ticks of a task that yields to the loop every millisecond."""
+    lag = 0.0
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.001)
+        lag = max(lag, time.perf_counter() - start - 0.001)
+    return lag
+
+
+async def _run(tools: dict, calls: list) -> tuple[list[float], list[float], float]:
+    builder = StateGraph(MessagesState)
+    builder.add_node("tools", ToolNode([tools[name] for name, _ in calls]))
+    builder.add_edge(START, "tools")
+    step_graph = builder.compile()
+    message = AIMessage(content="", tool_calls=[
+        {"name": name, "args": args, "id": f"call_{i}"} for i, (name, args) in enumerate(calls)
+    ])
+    sequential, step, lag = [], [], 0.0
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        for name, args in calls:
+            await tools[name].ainvoke(args)
+        sequential.append(time.perf_counter() - start)
+
+        stop = asyncio.Event()
+        ticker = asyncio.create_task(_max_loop_lag(stop))
+        start = time.perf_counter()
+        await step_graph.ainvoke({"messages": [message]})
+        step.append(time.perf_counter() - start)
+        stop.set()
+        lag = max(lag, await ticker)
+    return sequential, step, lag
+
+
+async def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "chinook.db"
+        shutil.copy(db.DATABASE_PATH, path)
+        pad_history(path)
+        # Nothing has connected yet, so the pool opens the padded copy
+        db.DATABASE_PATH = path
+        recommender.SIMILARITY_PATH = path.with_name("artist_similarity.json")
+        tools = {t.name: t for t in CUSTOMER_TOOLS + RECOMMENDATION_TOOLS}
+
+        print(f"customer {CUSTOMER_ID} with {EXTRA_INVOICES * LINES_PER_INVOICE:,} extra purchased tracks; "
+              f"median of {ROUNDS} rounds, DB executor workers={db.EXECUTOR_WORKERS}, cpus={os.cpu_count()}\n")
+        for label, calls in STEPS.items():
+            sequential, step, lag = await _run(tools, calls)
+            print(
+                f"{label:<22} sequential={statistics.median(sequential) * 1000:7.2f}ms "
+                f"step={statistics.median(step) * 1000:7.2f}ms "
+                f"max loop lag={lag * 1000:.2f}ms"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,111 @@
+"""Bytes streamed per turn as the conversation grows: full-state snapshots vs. deltas.
+
+Run from the agent directory:
+
+    python -m benchmarks.stream_bytes
+
+Runs one "Show my invoices" turn through the real graph on top of an N-turn
+history, with a fake chat model standing in for the customer agent's Haiku.
+Every streamed event is JSON-encoded and summed, the way the server would
+send it:
+
+- snapshots: stream_mode=["values", "updates"], the UI's old protocol
+- deltas:    stream_mode=["messages", "updates"] with subgraphs, the current one
+"""
+
+import asyncio
+import json
+import os
+
+os.environ.setdefault("ANTHROPIC_API_KEY", "benchmark")  # Model is never called
+
+from langchain_core.language_models.fake_chat_models import FakeMessagesListChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage
+from langgraph.prebuilt import create_react_agent
+
+from src.agent import graph
+from src.nodes import customer_agent as customer_agent_module
+from src.nodes import history
+from src.nodes.customer_agent import customer_prompt
+from src.state import AgentIdentityState
+
+HISTORY_TURNS = [0, 10, 50, 100, 200]
+
+USER = {
+    "identity": "jake",
+    "role": "customer",
+    "customer_id": 60,
+    "user_id": 60,
+    "name": "Jake Broekhuizen",
+    "supported_customers": [],
+    "permissions": ["customer:read"],
+}
+
+INVOICE_LINES = "\n".join(
+    f"Invoice #{100 + i} - 2025-0{1 + i % 9}-1{i % 10} - ${1.98 + i:.2f}" for i in range(15)
+)
+ANSWER = "Here are your recent invoices. " + "Your most recent order was a great pick! " * 8
+
+
+class InstantModel(FakeMessagesListChatModel):
+    """Fake chat model that accepts tools and always replies with plain text."""
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+
+def _history(turns: int) -> list[BaseMessage]:
+    """A conversation of earlier invoice lookups, each with a tool round trip."""
+    messages = []
+    for i in range(turns):
+        call_id = f"call_{i}"
+        messages += [
+            HumanMessage(content="Show my invoices", id=f"h{i}"),
+            AIMessage(content="", id=f"a{i}", tool_calls=[
+                {"name": "get_my_invoices", "args": {"customer_id": 60}, "id": call_id},
+            ]),
+            ToolMessage(content=INVOICE_LINES, tool_call_id=call_id, id=f"t{i}"),
+            AIMessage(content=ANSWER, id=f"r{i}"),
+        ]
+    return messages
+
+
+def _default(value):
+    if isinstance(value, BaseMessage):
+        return value.model_dump()
+    return repr(value)
+
+
+async def _turn_bytes(turns: int, stream_mode: list[str], subgraphs: bool) -> int:
+    total = 0
+    async for part in graph.astream(
+        {"messages": _history(turns) + [HumanMessage(content="Show my invoices")]},
+        config={"configurable": {"langgraph_auth_user": USER}},
+        stream_mode=stream_mode,
+        subgraphs=subgraphs,
+    ):
+        total += len(json.dumps(part, default=_default).encode())
+    return total
+
+
+async def main():
+    # Measure the streaming protocol alone: the history node leaves the history as is
+    history.HISTORY_TOKEN_BUDGET = history.TOOL_EXCERPT_CHARS = 10**9
+
+    # The supervisor fast-routes "Show my invoices", so only the agent's model needs faking
+    customer_agent_module.customer_agent = create_react_agent(
+        InstantModel(responses=[AIMessage(content=ANSWER)]),
+        tools=[],
+        prompt=customer_prompt,
+        state_schema=AgentIdentityState,
+        checkpointer=False,
+    )
+    print(f"{'history turns':>13} {'snapshots':>12} {'deltas':>10}")
+    for turns in HISTORY_TURNS:
+        snapshots = await _turn_bytes(turns, ["values", "updates"], subgraphs=False)
+        deltas = await _turn_bytes(turns, ["messages", "updates"], subgraphs=True)
+        print(f"{turns:>13} {snapshots:>11,}B {deltas:>9,}B")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,115 @@
+"""Read latency under a concurrent purchase write load, with and without the pragma profile.
+
+Run from the agent directory:
+
+    python -m benchmarks.wal_read_latency
+
+Works on a temporary copy of chinook.db, so the real database is never touched.
+"""
+
+import shutil
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from src.db import DATABASE_PATH, PERFORMANCE_PROFILE, apply_profile
+
+READERS = 4
+DURATION = 3.0
+
+# Defaults SQLite would otherwise use, except for the busy timeout so readers wait
+# on the writer instead of erroring out
+DEFAULT_PROFILE = {"journal_mode": "DELETE", "busy_timeout": 5000}
+
+SEARCH_SQL = """
+    SELECT t.TrackId, t.Name as Track, ar.Name as Artist,
+           al.Title as Album, g.Name as Genre, t.UnitPrice
+    FROM tracks t
+    JOIN albums al ON t.AlbumId = al.AlbumId
+    JOIN artists ar ON al.ArtistId = ar.ArtistId
+    LEFT JOIN genres g ON t.GenreId = g.GenreId
+    WHERE t.Name LIKE ? OR ar.Name LIKE ? OR al.Title LIKE ?
+    ORDER BY ar.Name, al.Title, t.Name
+    LIMIT 20
+"""
+
+
+def _open(path: Path, profile: dict) -> sqlite3.Connection:
+    conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+    apply_profile(conn, profile)
+    return conn
+
+
+def _writer(path: Path, profile: dict, stop: threading.Event, counter: list[int]):
+    """Simulate purchase_album: one invoice plus a dozen line items per transaction."""
+    conn = _open(path, profile)
+    while not stop.is_set():
+        conn.execute("BEGIN IMMEDIATE")
+        cur = conn.execute(
+            "INSERT INTO invoices (CustomerId, InvoiceDate, Total) VALUES (1, datetime('now'), 11.88)"
+        )
+        conn.executemany(
+            "INSERT INTO invoice_items (InvoiceId, TrackId, UnitPrice, Quantity) VALUES (?, ?, 0.99, 1)",
+            [(cur.lastrowid, track_id) for track_id in range(1, 13)],
+        )
+        conn.execute("COMMIT")
+        counter[0] += 1
+    conn.close()
+
+
+def _reader(path: Path, profile: dict, stop: threading.Event, latencies: list[float]):
+    conn = _open(path, profile)
+    term = "%love%"
+    while not stop.is_set():
+        start = time.perf_counter()
+        conn.execute(SEARCH_SQL, (term, term, term)).fetchall()
+        latencies.append(time.perf_counter() - start)
+    conn.close()
+
+
+def run(profile: dict) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "chinook.db"
+        shutil.copy(DATABASE_PATH, path)
+        _open(path, profile).close()  # Switch journal mode before the threads start
+
+        stop = threading.Event()
+        latencies: list[float] = []
+        writes = [0]
+        threads = [threading.Thread(target=_writer, args=(path, profile, stop, writes))]
+        threads += [
+            threading.Thread(target=_reader, args=(path, profile, stop, latencies))
+            for _ in range(READERS)
+        ]
+        for t in threads:
+            t.start()
+        time.sleep(DURATION)
+        stop.set()
+        for t in threads:
+            t.join()
+
+    latencies.sort()
+    return {
+        "reads": len(latencies),
+        "writes": writes[0],
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99)] * 1000,
+        "max_ms": latencies[-1] * 1000,
+    }
+
+
+def main():
+    print(f"{READERS} readers + 1 purchase writer for {DURATION:.0f}s each\n")
+    for label, profile in [("default (DELETE)", DEFAULT_PROFILE), ("performance (WAL)", PERFORMANCE_PROFILE)]:
+        r = run(profile)
+        print(
+            f"{label:<20} reads={r['reads']:<7} writes={r['writes']:<7} "
+            f"p50={r['p50_ms']:.2f}ms p99={r['p99_ms']:.2f}ms max={r['max_ms']:.2f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Invoice write throughput: one transaction per request vs. the single writer.
+
+Run from the agent directory:
+
+    python -m benchmarks.write_throughput
+
+THREADS callers each place PURCHASES_PER_THREAD two-track purchases on a
+temporary copy of chinook.db:
+
+- per-request: each purchase opens BEGIN IMMEDIATE on the caller's own
+  connection, as orders did before the writer; callers queue on SQLite's
+  write lock and fail with "database is locked" once busy_timeout runs out
+- writer:      orders.create_invoice, which hands the purchase to the writer
+  thread and commits every purchase waiting at the time in one transaction
+
+Reported: committed invoices per second, lock errors, and for the writer the
+average number of purchases committed per transaction.
+"""
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from src import db, orders, writer
+
+CUSTOMER_ID = 60
+THREADS = [1, 4, 16, 32]
+PURCHASES_PER_THREAD = 50
+
+
+def _per_request(customer_id: int, track_ids: list[int]) -> None:
+    conn = _per_request.local.conn
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        orders._write_invoice(conn, customer_id, track_ids, None)
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+
+
+_per_request.local = threading.local()
+
+
+def _worker(place, index: int, errors: list, barrier: threading.Barrier, own_connection: bool) -> None:
+    if own_connection:
+        _per_request.local.conn = db.connect()
+    barrier.wait()
+    for i in range(PURCHASES_PER_THREAD):
+        track = 1 + (index * PURCHASES_PER_THREAD + i) * 2 % 3000
+        try:
+            place(CUSTOMER_ID, [track, track + 1])
+        except sqlite3.OperationalError:
+            errors.append(1)
+    if own_connection:
+        _per_request.local.conn.close()
+
+
+def run(place, threads: int, own_connection: bool) -> tuple[float, int]:
+    errors: list = []
+    barrier = threading.Barrier(threads + 1)
+    workers = [
+        threading.Thread(target=_worker, args=(place, n, errors, barrier, own_connection))
+        for n in range(threads)
+    ]
+    for w in workers:
+        w.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for w in workers:
+        w.join()
+    elapsed = time.perf_counter() - start
+    committed = threads * PURCHASES_PER_THREAD - len(errors)
+    return committed / elapsed, len(errors)
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "chinook.db"
+        shutil.copy(db.DATABASE_PATH, path)
+        # Nothing has connected yet, so every connection opens the copy
+        db.DATABASE_PATH = path
+        db.connect().close()  # Apply migrations before timing anything
+
+        print(f"{PURCHASES_PER_THREAD} purchases per thread, cpus={os.cpu_count()}\n")
+        print(f"{'threads':>7}  {'per-request':<26} {'writer':<34}")
+        for threads in THREADS:
+            per_request, lock_errors = run(_per_request, threads, own_connection=True)
+            before = dict(writer.writer.stats)
+            queued, writer_errors = run(lambda c, t: orders.create_invoice(c, t), threads, own_connection=False)
+            jobs = writer.writer.stats["jobs"] - before["jobs"]
+            batches = writer.writer.stats["batches"] - before["batches"]
+            print(
+                f"{threads:>7}  {per_request:7.0f}/s {lock_errors:>4} lock errors  "
+                f"{queued:7.0f}/s {writer_errors:>4} lock errors  "
+                f"{jobs / max(batches, 1):5.1f} per commit"
+            )
+        writer.writer.close()
+
+
+if __name__ == "__main__":
+    main()
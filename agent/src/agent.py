@@ -3,12 +3,15 @@
 from typing import Literal
 from langgraph.graph import StateGraph, START, END
 
+from .checkpointer import get_checkpointer
 from .state import AgentState
 from .nodes import (
+    history_node,
     supervisor_node,
     customer_agent_node,
     employee_agent_node,
     recommendation_agent_node,
+    merge_node,
 )
 
 
@@ -18,13 +21,16 @@ def create_graph():
     builder = StateGraph(AgentState)
 
     # Add all nodes
+    builder.add_node("history", history_node)
     builder.add_node("supervisor", supervisor_node)
     builder.add_node("customer_agent", customer_agent_node)
     builder.add_node("employee_agent", employee_agent_node)
     builder.add_node("recommendation_agent", recommendation_agent_node)
+    builder.add_node("merge", merge_node)
 
-    # Entry point
-    builder.add_edge(START, "supervisor")
+    # Entry point: bound the history once per request, then route
+    builder.add_edge(START, "history")
+    builder.add_edge("history", "supervisor")
 
     # Supervisor routes to agents or ends
     # Note: Command(goto=...) in supervisor_node handles actual runtime routing
@@ -39,14 +45,12 @@ def create_graph():
         ["customer_agent", "employee_agent", "recommendation_agent", END]
     )
 
-    # Agents return to supervisor
-    # Note: Command(goto="supervisor") in each agent handles actual routing
-    builder.add_edge("customer_agent", "supervisor")
-    builder.add_edge("employee_agent", "supervisor")
-    builder.add_edge("recommendation_agent", "supervisor")
+    # Agents return to supervisor, or to merge when the supervisor fanned out to several.
+    # No static edges here: an edge to supervisor would also fire during a fan-out, so
+    # Command(goto=...) in each agent does all the routing (its return type draws the edges)
 
-    # Compile without checkpointer - LangGraph Platform handles persistence
-    return builder.compile()
+    # LangGraph Platform handles persistence; CHECKPOINTER=sqlite keeps it local instead
+    return builder.compile(checkpointer=get_checkpointer())
 
 
 # Export the compiled graph
@@ -1,64 +1,12 @@
 """Custom authentication handler for LangGraph Platform."""
 
-import asyncio
 from langgraph_sdk import Auth
 from langgraph_sdk.auth import is_studio_user
-from .db import get_db
+from .users import get_user
 
 auth = Auth()
 
 
-def _lookup_user(token: str) -> dict | None:
-    """Synchronous database lookup for user authentication."""
-    with get_db() as conn:
-        # Check if token matches an employee
-        cur = conn.execute("""
-            SELECT EmployeeId, FirstName, LastName
-            FROM employees
-            WHERE LOWER(FirstName) = ?
-        """, (token,))
-        emp = cur.fetchone()
-
-        if emp:
-            # Get list of customers this employee supports
-            cur = conn.execute(
-                "SELECT CustomerId FROM customers WHERE SupportRepId = ?",
-                (emp["EmployeeId"],)
-            )
-            supported_customers = [row["CustomerId"] for row in cur.fetchall()]
-
-            return {
-                "identity": token,
-                "role": "employee",
-                "employee_id": emp["EmployeeId"],
-                "user_id": emp["EmployeeId"],
-                "name": f"{emp['FirstName']} {emp['LastName']}",
-                "supported_customers": supported_customers,
-                "permissions": ["employee:read", "employee:write", "customer:read"],
-            }
-
-        # Check if token matches a customer
-        cur = conn.execute("""
-            SELECT CustomerId, FirstName, LastName
-            FROM customers
-            WHERE LOWER(FirstName) = ?
-        """, (token,))
-        cust = cur.fetchone()
-
-        if cust:
-            return {
-                "identity": token,
-                "role": "customer",
-                "customer_id": cust["CustomerId"],
-                "user_id": cust["CustomerId"],
-                "name": f"{cust['FirstName']} {cust['LastName']}",
-                "supported_customers": [],
-                "permissions": ["customer:read"],
-            }
-
-    return None
-
-
 @auth.authenticate
 async def authenticate(authorization: str | None) -> Auth.types.MinimalUserDict:
     """
@@ -86,8 +34,8 @@ async def authenticate(authorization: str | None) -> Auth.types.MinimalUserDict:
     # Extract token from "Bearer <token>" format
     token = authorization.replace("Bearer ", "").strip().lower()
 
-    # Run blocking database call in thread pool
-    user_data = await asyncio.to_thread(_lookup_user, token)
+    # Cached lookup; misses query the database on the DB executor
+    user_data = await get_user(token)
 
     if user_data:
         return user_data
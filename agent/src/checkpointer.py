@@ -0,0 +1,410 @@
+"""Local SQLite checkpointer for self-hosted deployments.
+
+LangGraph Platform brings its own persistence, so the graph is normally
+compiled without a checkpointer. Set CHECKPOINTER=sqlite to keep thread state
+in a local WAL-mode SQLite file instead; a thread can then be continued, or an
+interrupt resumed, by sending only the new input.
+
+Storage follows the channel-version layout of the upstream savers:
+- checkpoints holds each checkpoint without its channel values,
+- blobs holds one serialized value per (channel, version), written only for
+  the channels whose version changed in that step, so unchanged state (user
+  context, summary, routing) is never rewritten,
+- writes holds pending writes from tasks of an unfinished step.
+Values are stored as the serializer's typed msgpack payloads.
+
+Only the newest CHECKPOINT_KEEP checkpoints of each thread are kept. Pruning
+runs once a thread has twice that many, and drops the older checkpoints with
+their writes and any blobs no kept checkpoint refers to.
+"""
+
+import asyncio
+import os
+import sqlite3
+import threading
+from collections.abc import AsyncIterator, Iterator, Sequence
+from pathlib import Path
+from typing import Any
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    SerializerProtocol,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+    writes_sort_key,
+)
+
+from .db import PERFORMANCE_PROFILE, apply_profile
+
+# Checkpoint database, kept apart from the store data in chinook.db
+CHECKPOINT_PATH = Path(os.environ.get(
+    "CHECKPOINT_DB_PATH", Path(__file__).parent.parent / "checkpoints.db"
+))
+
+# Checkpoints kept per thread and namespace
+CHECKPOINT_KEEP = int(os.environ.get("CHECKPOINT_KEEP", "20"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    parent_checkpoint_id TEXT,
+    type TEXT NOT NULL,
+    checkpoint BLOB NOT NULL,
+    metadata_type TEXT NOT NULL,
+    metadata BLOB NOT NULL,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS checkpoint_blobs (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    channel TEXT NOT NULL,
+    version TEXT NOT NULL,
+    type TEXT NOT NULL,
+    blob BLOB,
+    PRIMARY KEY (thread_id, checkpoint_ns, channel, version)
+);
+
+CREATE TABLE IF NOT EXISTS checkpoint_writes (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    channel TEXT NOT NULL,
+    type TEXT NOT NULL,
+    blob BLOB NOT NULL,
+    task_path TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+);
+"""
+
+
+class SqliteCheckpointSaver(BaseCheckpointSaver[str]):
+    """Checkpoint saver backed by one SQLite file in WAL mode.
+
+    A single connection is shared behind a lock: every call is a few indexed
+    statements, so serializing them costs less than a pool would. The async
+    methods run the same code in a worker thread.
+    """
+
+    def __init__(
+        self,
+        path: Path | str = CHECKPOINT_PATH,
+        *,
+        keep: int = CHECKPOINT_KEEP,
+        serde: SerializerProtocol | None = None,
+    ):
+        super().__init__(serde=serde)
+        self.keep = keep
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        apply_profile(self.conn, PERFORMANCE_PROFILE)
+        self.conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self.conn.close()
+
+    # Reads
+
+    def _load_blobs(self, thread_id: str, checkpoint_ns: str, versions: ChannelVersions) -> dict[str, Any]:
+        if not versions:
+            return {}
+        pairs = ", ".join("(?, ?)" for _ in versions)
+        params = [v for channel, version in versions.items() for v in (channel, str(version))]
+        rows = self.conn.execute(f"""
+            WITH wanted (channel, version) AS (VALUES {pairs})
+            SELECT b.channel, b.type, b.blob
+            FROM checkpoint_blobs b
+            JOIN wanted w ON b.channel = w.channel AND b.version = w.version
+            WHERE b.thread_id = ? AND b.checkpoint_ns = ?
+        """, [*params, thread_id, checkpoint_ns]).fetchall()
+        return {
+            channel: self.serde.loads_typed((type_, blob))
+            for channel, type_, blob in rows
+            if type_ != "empty"
+        }
+
+    def _load_writes(self, thread_id: str, checkpoint_ns: str, checkpoint_id: str) -> list[tuple[str, str, Any]]:
+        rows = self.conn.execute("""
+            SELECT task_id, idx, channel, type, blob, task_path
+            FROM checkpoint_writes
+            WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?
+        """, (thread_id, checkpoint_ns, checkpoint_id)).fetchall()
+        rows.sort(key=lambda r: writes_sort_key(r[5], r[0], r[1]))
+        return [(task_id, channel, self.serde.loads_typed((type_, blob))) for task_id, _, channel, type_, blob, _ in rows]
+
+    def _tuple(self, thread_id: str, checkpoint_ns: str, row: tuple, metadata: CheckpointMetadata | None = None) -> CheckpointTuple:
+        checkpoint_id, parent_id, type_, blob, metadata_type, metadata_blob = row
+        checkpoint = self.serde.loads_typed((type_, blob))
+        return CheckpointTuple(
+            config={"configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint_id,
+            }},
+            checkpoint={
+                **checkpoint,
+                "channel_values": self._load_blobs(thread_id, checkpoint_ns, checkpoint["channel_versions"]),
+            },
+            metadata=metadata if metadata is not None else self.serde.loads_typed((metadata_type, metadata_blob)),
+            parent_config={"configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": parent_id,
+            }} if parent_id else None,
+            pending_writes=self._load_writes(thread_id, checkpoint_ns, checkpoint_id),
+        )
+
+    def get_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        columns = "checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata_type, metadata"
+        with self._lock:
+            if checkpoint_id := get_checkpoint_id(config):
+                row = self.conn.execute(
+                    f"SELECT {columns} FROM checkpoints "
+                    "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                    (thread_id, checkpoint_ns, checkpoint_id),
+                ).fetchone()
+            else:
+                row = self.conn.execute(
+                    f"SELECT {columns} FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? "
+                    "ORDER BY checkpoint_id DESC LIMIT 1",
+                    (thread_id, checkpoint_ns),
+                ).fetchone()
+            return self._tuple(thread_id, checkpoint_ns, row) if row else None
+
+    def list(
+        self,
+        config: RunnableConfig | None,
+        *,
+        filter: dict[str, Any] | None = None,
+        before: RunnableConfig | None = None,
+        limit: int | None = None,
+    ) -> Iterator[CheckpointTuple]:
+        where, params = [], []
+        if config:
+            where.append("thread_id = ?")
+            params.append(config["configurable"]["thread_id"])
+            if (checkpoint_ns := config["configurable"].get("checkpoint_ns")) is not None:
+                where.append("checkpoint_ns = ?")
+                params.append(checkpoint_ns)
+            if checkpoint_id := get_checkpoint_id(config):
+                where.append("checkpoint_id = ?")
+                params.append(checkpoint_id)
+        if before and (before_id := get_checkpoint_id(before)):
+            where.append("checkpoint_id < ?")
+            params.append(before_id)
+
+        with self._lock:
+            rows = self.conn.execute(f"""
+                SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id,
+                       type, checkpoint, metadata_type, metadata
+                FROM checkpoints
+                {"WHERE " + " AND ".join(where) if where else ""}
+                ORDER BY checkpoint_id DESC
+            """, params).fetchall()
+
+        # Metadata is serialized, so filters apply after loading it
+        for thread_id, checkpoint_ns, *row in rows:
+            if limit is not None and limit <= 0:
+                break
+            metadata = self.serde.loads_typed((row[4], row[5]))
+            if filter and not all(metadata.get(k) == v for k, v in filter.items()):
+                continue
+            if limit is not None:
+                limit -= 1
+            with self._lock:
+                item = self._tuple(thread_id, checkpoint_ns, row, metadata)
+            yield item
+
+    # Writes
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint = checkpoint.copy()
+        values = checkpoint.pop("channel_values")
+
+        # Only channels that changed this step get a new blob
+        blobs = []
+        for channel, version in new_versions.items():
+            type_, blob = self.serde.dumps_typed(values[channel]) if channel in values else ("empty", None)
+            blobs.append((thread_id, checkpoint_ns, channel, str(version), type_, blob))
+        type_, blob = self.serde.dumps_typed(checkpoint)
+        metadata_type, metadata_blob = self.serde.dumps_typed(get_checkpoint_metadata(config, metadata))
+
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                self.conn.executemany(
+                    "INSERT OR IGNORE INTO checkpoint_blobs VALUES (?, ?, ?, ?, ?, ?)", blobs
+                )
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (thread_id, checkpoint_ns, checkpoint["id"], config["configurable"].get("checkpoint_id"),
+                     type_, blob, metadata_type, metadata_blob),
+                )
+                self._prune(thread_id, checkpoint_ns)
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+
+        return {"configurable": {
+            "thread_id": thread_id,
+            "checkpoint_ns": checkpoint_ns,
+            "checkpoint_id": checkpoint["id"],
+        }}
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        rows = []
+        for idx, (channel, value) in enumerate(writes):
+            type_, blob = self.serde.dumps_typed(value)
+            rows.append((thread_id, checkpoint_ns, checkpoint_id, task_id,
+                         WRITES_IDX_MAP.get(channel, idx), channel, type_, blob, task_path))
+        # Special writes (errors, interrupts) replace; regular ones are written once per task
+        verb = "INSERT OR REPLACE" if all(w[0] in WRITES_IDX_MAP for w in writes) else "INSERT OR IGNORE"
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                self.conn.executemany(f"{verb} INTO checkpoint_writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    def _prune(self, thread_id: str, checkpoint_ns: str) -> None:
+        """Drop all but the newest `keep` checkpoints once a thread has twice that many."""
+        count = self.conn.execute(
+            "SELECT COUNT(*) FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?",
+            (thread_id, checkpoint_ns),
+        ).fetchone()[0]
+        if count < 2 * self.keep:
+            return
+        cutoff = self.conn.execute("""
+            SELECT checkpoint_id FROM checkpoints
+            WHERE thread_id = ? AND checkpoint_ns = ?
+            ORDER BY checkpoint_id DESC LIMIT 1 OFFSET ?
+        """, (thread_id, checkpoint_ns, self.keep - 1)).fetchone()[0]
+        key = (thread_id, checkpoint_ns, cutoff)
+        self.conn.execute(
+            "DELETE FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id < ?", key
+        )
+        self.conn.execute(
+            "DELETE FROM checkpoint_writes WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id < ?", key
+        )
+
+        # Blobs are shared across checkpoints; keep every version a remaining one points at
+        kept = set()
+        for type_, blob in self.conn.execute(
+            "SELECT type, checkpoint FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?",
+            (thread_id, checkpoint_ns),
+        ):
+            kept.update((c, str(v)) for c, v in self.serde.loads_typed((type_, blob))["channel_versions"].items())
+        stale = [
+            (thread_id, checkpoint_ns, channel, version)
+            for channel, version in self.conn.execute(
+                "SELECT channel, version FROM checkpoint_blobs WHERE thread_id = ? AND checkpoint_ns = ?",
+                (thread_id, checkpoint_ns),
+            )
+            if (channel, version) not in kept
+        ]
+        self.conn.executemany(
+            "DELETE FROM checkpoint_blobs WHERE thread_id = ? AND checkpoint_ns = ? AND channel = ? AND version = ?",
+            stale,
+        )
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                for table in ("checkpoints", "checkpoint_blobs", "checkpoint_writes"):
+                    self.conn.execute(f"DELETE FROM {table} WHERE thread_id = ?", (str(thread_id),))
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    def get_next_version(self, current: str | None, channel: None) -> str:
+        """Zero-padded so versions sort as text; the suffix keeps forks distinct."""
+        if current is None:
+            current_v = 0
+        elif isinstance(current, int):
+            current_v = current
+        else:
+            current_v = int(current.split(".")[0])
+        return f"{current_v + 1:032}.{os.urandom(8).hex()}"
+
+    # Async: the same statements, off the event loop
+
+    async def aget_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: RunnableConfig | None,
+        *,
+        filter: dict[str, Any] | None = None,
+        before: RunnableConfig | None = None,
+        limit: int | None = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        tuples = await asyncio.to_thread(
+            lambda: [*self.list(config, filter=filter, before=before, limit=limit)]
+        )
+        for item in tuples:
+            yield item
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+
+def get_checkpointer() -> SqliteCheckpointSaver | None:
+    """The local checkpointer if CHECKPOINTER=sqlite, else None (Platform persistence)."""
+    if os.environ.get("CHECKPOINTER", "").lower() != "sqlite":
+        return None
+    print(f"[CHECKPOINTER] Using local SQLite checkpoints at {CHECKPOINT_PATH}")
+    return SqliteCheckpointSaver()
@@ -1,19 +1,214 @@
 """Database connection helpers."""
 
+import asyncio
+import contextvars
+import functools
+import os
+import queue
 import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
 from pathlib import Path
 
+from .schema import apply_migrations
+
 # Database path relative to agent directory
 DATABASE_PATH = Path(__file__).parent.parent / "chinook.db"
 
+# Maximum number of open connections kept by the pool
+POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "8"))
+
+# Seconds to wait for a free connection before giving up
+POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", "10"))
+
+# Threads that run blocking database work for async callers. More than the pool
+# size would only wait for a connection, so that is the default.
+EXECUTOR_WORKERS = int(os.environ.get("DB_EXECUTOR_WORKERS", str(POOL_SIZE)))
+
+# Pragmas applied to every new connection. WAL lets readers (search, recommendations)
+# proceed while a purchase or invoice edit is writing. Set DB_PERFORMANCE_PROFILE=0
+# to open connections with SQLite defaults.
+PERFORMANCE_PROFILE = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",  # Safe with WAL; fsync only at checkpoints
+    "busy_timeout": 5000,  # ms to wait on a locked database instead of failing
+    "cache_size": -65536,  # Negative means KiB, so 64 MiB of page cache
+    "mmap_size": 268435456,  # 256 MiB memory-mapped reads
+    "temp_store": "MEMORY",
+}
+USE_PERFORMANCE_PROFILE = os.environ.get("DB_PERFORMANCE_PROFILE", "1") != "0"
+
+_schema_lock = threading.Lock()
+_schema_ready = False
+
+
+def apply_profile(conn: sqlite3.Connection, profile: dict) -> None:
+    """Apply a pragma profile to a connection."""
+    for pragma, value in profile.items():
+        conn.execute(f"PRAGMA {pragma} = {value}")
+
+
+def connect() -> sqlite3.Connection:
+    """Open a new connection with Row factory."""
+    # Pooled connections are checked out by whichever worker thread runs the tool
+    conn = sqlite3.connect(DATABASE_PATH, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    if USE_PERFORMANCE_PROFILE:
+        apply_profile(conn, PERFORMANCE_PROFILE)
+    _ensure_schema(conn)
+    return conn
+
+
+def _ensure_schema(conn: sqlite3.Connection) -> None:
+    """Run pending migrations once per process, on the first connection opened."""
+    global _schema_ready
+    if _schema_ready:
+        return
+    with _schema_lock:
+        if not _schema_ready:
+            apply_migrations(conn)
+            _schema_ready = True
+
+
+class ConnectionPool:
+    """Bounded checkout/checkin pool of long-lived SQLite connections."""
+
+    def __init__(self, size: int = POOL_SIZE, timeout: float = POOL_TIMEOUT):
+        self.size = size
+        self.timeout = timeout
+        self._idle: queue.LifoQueue[sqlite3.Connection] = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._stats = {
+            "checkouts": 0,
+            "misses": 0,  # checkouts that had to open a new connection
+            "discarded": 0,  # connections dropped after a failed health check
+            "timeouts": 0,
+            "wait_time_total": 0.0,
+            "wait_time_max": 0.0,
+        }
+
+    def _healthy(self, conn: sqlite3.Connection) -> bool:
+        """Check that an idle connection is still usable."""
+        try:
+            conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def checkout(self) -> sqlite3.Connection:
+        """Take a connection from the pool, opening one if none is idle."""
+        start = time.perf_counter()
+        if not self._slots.acquire(timeout=self.timeout):
+            with self._lock:
+                self._stats["timeouts"] += 1
+            raise TimeoutError(f"No database connection available after {self.timeout}s")
+        waited = time.perf_counter() - start
+
+        try:
+            conn = None
+            while conn is None:
+                try:
+                    candidate = self._idle.get_nowait()
+                except queue.Empty:
+                    break
+                if self._healthy(candidate):
+                    conn = candidate
+                else:
+                    candidate.close()
+                    with self._lock:
+                        self._stats["discarded"] += 1
+
+            missed = conn is None
+            if missed:
+                conn = connect()
+        except BaseException:
+            self._slots.release()
+            raise
+
+        with self._lock:
+            self._stats["checkouts"] += 1
+            self._stats["misses"] += int(missed)
+            self._stats["wait_time_total"] += waited
+            self._stats["wait_time_max"] = max(self._stats["wait_time_max"], waited)
+        return conn
+
+    def checkin(self, conn: sqlite3.Connection) -> None:
+        """Return a connection to the pool, discarding any uncommitted work."""
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            self._idle.put(conn)
+        except sqlite3.Error:
+            conn.close()
+            with self._lock:
+                self._stats["discarded"] += 1
+        finally:
+            self._slots.release()
+
+    def stats(self) -> dict:
+        """Snapshot of pool metrics for sizing."""
+        with self._lock:
+            stats = dict(self._stats)
+        checkouts = stats["checkouts"]
+        stats["size"] = self.size
+        stats["idle"] = self._idle.qsize()
+        stats["wait_time_avg"] = stats["wait_time_total"] / checkouts if checkouts else 0.0
+        stats["hit_rate"] = 1 - stats["misses"] / checkouts if checkouts else 0.0
+        return stats
+
+    def close(self) -> None:
+        """Close all idle connections."""
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+pool = ConnectionPool()
+
+
+def get_pool_stats() -> dict:
+    """Get connection pool metrics (checkouts, misses, wait time)."""
+    return pool.stats()
+
 
 @contextmanager
 def get_db():
-    """Get a database connection with Row factory."""
-    conn = sqlite3.connect(DATABASE_PATH)
-    conn.row_factory = sqlite3.Row
+    """Get a pooled database connection with Row factory."""
+    conn = pool.checkout()
     try:
         yield conn
     finally:
-        conn.close()
+        pool.checkin(conn)
+
+
+executor = ThreadPoolExecutor(max_workers=EXECUTOR_WORKERS, thread_name_prefix="db")
+
+
+async def run_in_db_executor(func, *args, **kwargs):
+    """Run blocking database code on the bounded DB executor without blocking the event loop.
+
+    The caller's context variables are copied into the worker thread, so code
+    that reads the current run config (interrupt(), get_config()) still works.
+    """
+    call = functools.partial(contextvars.copy_context().run, func, *args, **kwargs)
+    return await asyncio.get_running_loop().run_in_executor(executor, call)
+
+
+async def run_with_db(func, *args, **kwargs):
+    """Run func(conn, *args, **kwargs) on a pooled connection, without blocking the event loop.
+
+    Checkout, every query and checkin happen in one hop to the DB executor, so
+    no connection is held across an await. A connection held across awaits
+    would need a free executor thread for each query while other workers sit
+    in checkout waiting for it, and the executor is no bigger than the pool.
+    """
+    def call():
+        with get_db() as conn:
+            return func(conn, *args, **kwargs)
+
+    return await run_in_db_executor(call)
@@ -1,13 +1,17 @@
 """Agent nodes package."""
 
+from .history import history_node
 from .supervisor import supervisor_node
 from .customer_agent import customer_agent_node
 from .employee_agent import employee_agent_node
 from .recommendation_agent import recommendation_agent_node
+from .merge import merge_node
 
 __all__ = [
+    "history_node",
     "supervisor_node",
     "customer_agent_node",
     "employee_agent_node",
     "recommendation_agent_node",
+    "merge_node",
 ]
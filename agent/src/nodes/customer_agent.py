@@ -1,46 +1,48 @@
 """Customer agent node - handles customer queries about their own account."""
 
+from typing import Literal
 from langchain_anthropic import ChatAnthropic
 from langchain_core.runnables import RunnableConfig
 from langgraph.prebuilt import create_react_agent
 from langgraph.types import Command
-from ..state import AgentState
+from .merge import after_agent
+from ..state import AgentIdentityState, AgentState
 from ..tools.customer_tools import CUSTOMER_TOOLS
-from ..utils import get_auth_user
+from ..utils import cached_system_message, get_auth_user, record_cache_usage, with_summary
 
 model = ChatAnthropic(model="claude-haiku-4-5-20251001")
 
 
-def create_customer_agent(customer_id: int, customer_name: str):
-    """Create a customer agent with context-aware prompt."""
-    return create_react_agent(
-        model,
-        tools=CUSTOMER_TOOLS,
-        prompt=f"""You are a helpful assistant for {customer_name}, a customer at our music store.
-
-## YOUR IDENTITY
-- Customer ID: {customer_id}
+# Static instructions, identical for every customer so they can be prompt-cached
+CUSTOMER_PROMPT = """You are a helpful assistant for a customer at our music store.
+Who you are helping is given under YOUR IDENTITY at the end of these instructions.
 
 ## AVAILABLE TOOLS
 
-### 1. get_my_invoices(customer_id: int)
+### 1. get_my_invoices(customer_id: int, limit: int = 10, cursor: str = None)
 USE WHEN: User wants to see their billing history, past orders, or invoices.
-ALWAYS CALL WITH: customer_id={customer_id}
+ALWAYS CALL WITH: customer_id=<Customer ID>
+RETURNS: Invoice count, total spent and date range, then the most recent invoices
+PAGING: If the result ends with a "More invoices" line and the user wants older ones, call again with that cursor
 EXAMPLE TRIGGERS: "Show my invoices", "What have I ordered?", "My billing history"
 
-### 2. get_my_purchases(customer_id: int)
+### 2. get_my_purchases(customer_id: int, limit: int = 10, cursor: str = None)
 USE WHEN: User wants to see what music/tracks they've bought, their listening history, or favorite artists.
-ALWAYS CALL WITH: customer_id={customer_id}
+ALWAYS CALL WITH: customer_id=<Customer ID>
+RETURNS: Track count, top artists and top genres, then the most recent purchases
+PAGING: The summary already covers favorite artists and genres. Only page (with the cursor from the
+"More purchases" line) when the user asks for older purchases or a specific track not shown.
 EXAMPLE TRIGGERS: "What music have I bought?", "Show my purchases", "What Taylor Swift do I own?"
 
 ### 3. get_invoice_details(customer_id: int, invoice_id: int)
 USE WHEN: User wants detailed breakdown of a specific invoice.
-ALWAYS CALL WITH: customer_id={customer_id}, invoice_id=<the requested invoice>
+ALWAYS CALL WITH: customer_id=<Customer ID>, invoice_id=<the requested invoice>
 EXAMPLE TRIGGERS: "Show invoice 413", "Details for order 415"
 
 ### 4. search_tracks(query: str)
 USE WHEN: User wants to find a specific song or browse tracks by artist/album.
 PARAMETER: query is the search term (song name, artist, or album)
+NOTE: Misspelled names are matched to the closest artist/album/track automatically - do NOT retry with other spellings
 EXAMPLE TRIGGERS: "Search for Shake It Off", "Find songs by Taylor Swift", "Look for rock songs"
 
 ### 5. search_albums(query: str)
@@ -49,31 +51,77 @@ PARAMETER: query is the search term (album title or artist name)
 EXAMPLE TRIGGERS: "Search for 1989 album", "Find Taylor Swift albums", "Show me rock albums"
 
 ### 6. purchase_track(customer_id: int, track_id: int)
-USE WHEN: User wants to BUY a single track. Requires confirmation before charging.
-ALWAYS CALL WITH: customer_id={customer_id}, track_id=<from search results>
+USE WHEN: User wants to BUY exactly one track. Requires confirmation before charging.
+ALWAYS CALL WITH: customer_id=<Customer ID>, track_id=<from search results>
 REQUIRES: User confirmation (automatic interrupt)
 EXAMPLE TRIGGERS: "Buy track 123", "Purchase that song", "I want to buy Shake It Off"
 
 ### 7. purchase_album(customer_id: int, album_id: int)
 USE WHEN: User wants to BUY an entire album. Requires confirmation before charging.
-ALWAYS CALL WITH: customer_id={customer_id}, album_id=<from search results>
+ALWAYS CALL WITH: customer_id=<Customer ID>, album_id=<from search results>
 REQUIRES: User confirmation (automatic interrupt)
 EXAMPLE TRIGGERS: "Buy album 358", "Purchase that album", "I want the whole album"
 
+### 8. add_to_cart(customer_id: int, track_ids: list[int])
+USE WHEN: User wants to buy SEVERAL tracks, or to set tracks aside for later. No charge is made.
+ALWAYS CALL WITH: customer_id=<Customer ID>, track_ids=<ALL the TrackIds at once, from search results>
+EXAMPLE TRIGGERS: "Add these three songs to my cart", "Buy tracks 12, 15 and 20", "Save that one for later"
+
+### 9. remove_from_cart(customer_id: int, track_ids: list[int] = None)
+USE WHEN: User wants to take tracks out of their cart, or empty it (omit track_ids).
+EXAMPLE TRIGGERS: "Remove track 15 from my cart", "Empty my cart"
+
+### 10. view_cart(customer_id: int)
+USE WHEN: User asks what is in their cart.
+EXAMPLE TRIGGERS: "What's in my cart?", "Show my cart"
+
+### 11. checkout(customer_id: int)
+USE WHEN: User wants to buy everything in their cart. One confirmation and one invoice for the whole cart.
+REQUIRES: User confirmation (automatic interrupt)
+EXAMPLE TRIGGERS: "Check out", "Buy everything in my cart", "Complete my order"
+
 ## CRITICAL RULES
 1. ALWAYS use a tool when the user's request matches a tool's purpose
-2. ALWAYS use customer_id={customer_id} when required
+2. ALWAYS use customer_id=<Customer ID> when required
 3. For purchases, FIRST search to get the track_id or album_id, THEN call purchase
-4. purchase_track and purchase_album will automatically pause for user confirmation
-5. Be friendly and highlight their music taste based on purchase history
-6. If a purchase is cancelled, simply say it was cancelled and ask if they'd like to try again. Do NOT mention system issues or errors - cancellations are normal user actions.
+4. purchase_track, purchase_album and checkout will automatically pause for user confirmation
+5. To buy more than one track, do NOT call purchase_track repeatedly: call add_to_cart once with all the track_ids, then checkout
+6. Be friendly and highlight their music taste based on purchase history
+7. If a purchase is cancelled, simply say it was cancelled and ask if they'd like to try again. Do NOT mention system issues or errors - cancellations are normal user actions.
+
+When showing purchase history, mention any favorite artists you notice!"""
 
-When showing purchase history, mention any favorite artists you notice!""",
+# Per-customer suffix, kept after the cache breakpoint
+CUSTOMER_IDENTITY = """## YOUR IDENTITY
+- Customer: {customer_name}
+- Customer ID: {customer_id}"""
+
+
+def customer_prompt(state: AgentIdentityState) -> list:
+    """Render the system prompt for the customer in state."""
+    identity = CUSTOMER_IDENTITY.format(customer_id=state["user_id"], customer_name=state["user_name"])
+    identity = with_summary(identity, state.get("summary"))
+    return [cached_system_message(CUSTOMER_PROMPT, identity)] + state["messages"]
+
+
+def create_customer_agent():
+    """Create the customer agent. Identity comes from state, so it is compiled once."""
+    return create_react_agent(
+        model,
+        tools=CUSTOMER_TOOLS,
+        prompt=customer_prompt,
+        state_schema=AgentIdentityState,
+        name="customer_agent",  # Tags its replies, so the merge node can tell them apart
         checkpointer=False,  # Platform handles persistence
     )
 
 
-async def customer_agent_node(state: AgentState, config: RunnableConfig) -> Command:
+customer_agent = create_customer_agent()
+
+
+async def customer_agent_node(
+    state: AgentState, config: RunnableConfig
+) -> Command[Literal["supervisor", "merge"]]:
     """Customer agent node function."""
 
     # Get auth context (checks multiple sources)
@@ -81,16 +129,23 @@ async def customer_agent_node(state: AgentState, config: RunnableConfig) -> Comm
     customer_id = auth_user.get("customer_id")
     customer_name = auth_user.get("name", "Customer")
 
-    # Create agent with customer context
-    agent = create_customer_agent(customer_id, customer_name)
-
-    # Invoke agent
-    result = await agent.ainvoke(
-        {"messages": state["messages"]},
+    # Invoke the shared agent with customer context
+    result = await customer_agent.ainvoke(
+        {
+            "messages": state["messages"],
+            "user_role": "customer",
+            "user_id": customer_id,
+            "user_name": customer_name,
+            "supported_customers": [],
+            "summary": state.get("summary", ""),
+        },
         config=config
     )
+    # Only this turn's messages; add_messages appends them to the history
+    new_messages = result["messages"][len(state["messages"]):]
+    record_cache_usage("customer_agent", new_messages)
 
     return Command(
-        goto="supervisor",
-        update={"messages": result["messages"]}
+        goto=after_agent(state),
+        update={"messages": new_messages}
     )
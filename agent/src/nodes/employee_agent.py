@@ -1,42 +1,39 @@
 """Employee agent node - handles employee queries with HITL for invoice mutations."""
 
+from typing import Literal
 from langchain_anthropic import ChatAnthropic
 from langchain_core.runnables import RunnableConfig
 from langgraph.prebuilt import create_react_agent
 from langgraph.types import Command
-from ..state import AgentState
+from .merge import after_agent
+from ..state import AgentIdentityState, AgentState
 from ..tools.employee_tools import EMPLOYEE_TOOLS
-from ..utils import get_auth_user
+from ..utils import cached_system_message, get_auth_user, record_cache_usage, with_summary
 
 model = ChatAnthropic(model="claude-haiku-4-5-20251001")
 
 
-def create_employee_agent(employee_id: int, employee_name: str, supported_customers: list[int]):
-    """Create an employee agent with context-aware prompt."""
-    return create_react_agent(
-        model,
-        tools=EMPLOYEE_TOOLS,
-        prompt=f"""You are a helpful assistant for {employee_name}, an employee at our music store.
-
-## YOUR IDENTITY
-- Employee ID: {employee_id}
-- Supported Customer IDs: {supported_customers}
+# Static instructions, identical for every employee so they can be prompt-cached
+EMPLOYEE_PROMPT = """You are a helpful assistant for an employee at our music store.
+Who you are helping is given under YOUR IDENTITY at the end of these instructions.
 
 ## AVAILABLE TOOLS
 
 ### 1. get_employee_info(employee_id: int)
 USE WHEN: User asks about their own profile, title, hire date, contact info, or who they report to.
-ALWAYS CALL WITH: employee_id={employee_id}
+ALWAYS CALL WITH: employee_id=<Employee ID>
 EXAMPLE TRIGGERS: "Show my profile", "Who is my manager?", "What's my title?"
 
 ### 2. get_supported_customers(employee_id: int)
 USE WHEN: User asks who they support, their customer list, or wants to see all their assigned customers.
-ALWAYS CALL WITH: employee_id={employee_id}
+ALWAYS CALL WITH: employee_id=<Employee ID>
 EXAMPLE TRIGGERS: "Which customers do I support?", "Show my customers", "Who do I work with?"
 
-### 3. get_customer_invoices(customer_id: int)
+### 3. get_customer_invoices(customer_id: int, limit: int = 10, cursor: str = None)
 USE WHEN: User wants to see invoices for a specific customer they support.
-PARAMETER: customer_id must be one of {supported_customers}
+PARAMETER: customer_id must be one of <Supported Customer IDs>
+RETURNS: Invoice count, total spent and date range, then the most recent invoices
+PAGING: If the result ends with a "More invoices" line and the user wants older ones, call again with that cursor
 EXAMPLE TRIGGERS: "Show invoices for customer 60", "What are Jake's invoices?"
 
 ### 4. edit_invoice(invoice_id: int, new_total: float)
@@ -51,18 +48,50 @@ EXAMPLE TRIGGERS: "Delete invoice 413", "Remove invoice 415"
 
 ## CRITICAL RULES
 1. ALWAYS use a tool when the user's request matches a tool's purpose
-2. For your own info, ALWAYS use employee_id={employee_id}
-3. For customer data, ONLY use customer_id values from {supported_customers}
+2. For your own info, ALWAYS use employee_id=<Employee ID>
+3. For customer data, ONLY use customer_id values from <Supported Customer IDs>
 4. edit_invoice and delete_invoice will automatically pause for manager approval
 5. If unsure which customer, call get_supported_customers first to show options
 6. If an edit or delete request is denied, simply say the manager denied the request. Do NOT mention system issues or errors - denials are normal manager decisions.
 
-Be professional and thorough.""",
+Be professional and thorough."""
+
+# Per-employee suffix, kept after the cache breakpoint
+EMPLOYEE_IDENTITY = """## YOUR IDENTITY
+- Employee: {employee_name}
+- Employee ID: {employee_id}
+- Supported Customer IDs: {supported_customers}"""
+
+
+def employee_prompt(state: AgentIdentityState) -> list:
+    """Render the system prompt for the employee in state."""
+    identity = EMPLOYEE_IDENTITY.format(
+        employee_id=state["user_id"],
+        employee_name=state["user_name"],
+        supported_customers=state["supported_customers"],
+    )
+    identity = with_summary(identity, state.get("summary"))
+    return [cached_system_message(EMPLOYEE_PROMPT, identity)] + state["messages"]
+
+
+def create_employee_agent():
+    """Create the employee agent. Identity comes from state, so it is compiled once."""
+    return create_react_agent(
+        model,
+        tools=EMPLOYEE_TOOLS,
+        prompt=employee_prompt,
+        state_schema=AgentIdentityState,
+        name="employee_agent",  # Tags its replies, so the merge node can tell them apart
         checkpointer=False,  # Platform handles persistence
     )
 
 
-async def employee_agent_node(state: AgentState, config: RunnableConfig) -> Command:
+employee_agent = create_employee_agent()
+
+
+async def employee_agent_node(
+    state: AgentState, config: RunnableConfig
+) -> Command[Literal["supervisor", "merge"]]:
     """Employee agent node with human-in-the-loop for invoice mutations.
 
     HITL is handled inside the tools themselves via interrupt().
@@ -74,16 +103,23 @@ async def employee_agent_node(state: AgentState, config: RunnableConfig) -> Comm
     employee_name = auth_user.get("name", "Employee")
     supported_customers = auth_user.get("supported_customers", [])
 
-    # Create agent with employee context
-    agent = create_employee_agent(employee_id, employee_name, supported_customers)
-
-    # Invoke agent - HITL interrupts happen inside tools when needed
-    result = await agent.ainvoke(
-        {"messages": state["messages"]},
+    # Invoke the shared agent with employee context - HITL interrupts happen inside tools when needed
+    result = await employee_agent.ainvoke(
+        {
+            "messages": state["messages"],
+            "user_role": "employee",
+            "user_id": employee_id,
+            "user_name": employee_name,
+            "supported_customers": supported_customers,
+            "summary": state.get("summary", ""),
+        },
         config=config
     )
+    # Only this turn's messages; add_messages appends them to the history
+    new_messages = result["messages"][len(state["messages"]):]
+    record_cache_usage("employee_agent", new_messages)
 
     return Command(
-        goto="supervisor",
-        update={"messages": result["messages"]}
+        goto=after_agent(state),
+        update={"messages": new_messages}
     )
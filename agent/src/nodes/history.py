@@ -0,0 +1,134 @@
+"""History node - keeps the message history within a token budget before routing.
+
+Runs once per user request, ahead of the supervisor:
+1. Tool outputs from earlier turns are cut down to a short excerpt (same
+   message id, so add_messages replaces them in place).
+2. If the history is still over budget, the oldest whole turns are folded into
+   a rolling summary and removed. A turn runs from one human message to the
+   next, so a tool call is never separated from its result.
+The current turn is always kept verbatim.
+"""
+
+import os
+from langchain_anthropic import ChatAnthropic
+from langchain_core.messages import HumanMessage, RemoveMessage, SystemMessage
+from langchain_core.messages.utils import count_tokens_approximately
+from ..state import AgentState
+
+# Tagged nostream so the summary is never shown as the agent's reply
+model = ChatAnthropic(model="claude-haiku-4-5-20251001").with_config(tags=["nostream"])
+
+# Approximate token budget for the messages sent to the agents
+HISTORY_TOKEN_BUDGET = int(os.environ.get("HISTORY_TOKEN_BUDGET", "6000"))
+
+# Once over budget, fold down to this share of it so summaries aren't needed every turn
+SUMMARY_TARGET_RATIO = 0.5
+
+# Most recent turns whose tool outputs are kept in full
+KEEP_FULL_TURNS = 2
+
+# Characters kept from a trimmed tool output
+TOOL_EXCERPT_CHARS = 300
+
+# Characters of each message shown to the summarizer
+SUMMARY_INPUT_CHARS = 1000
+
+_TRIM_MARKER = " chars trimmed from this earlier tool output]"
+
+SUMMARY_PROMPT = """You maintain a running summary of a conversation between a music store
+customer or employee and the store's assistant.
+
+Update the existing summary with the new messages. Keep facts that later requests may
+depend on: ids (customer, invoice, track, album), names, purchases made or cancelled,
+preferences, and open questions. Drop greetings and tool output that is no longer needed.
+Write at most 150 words, in plain sentences, with no preamble."""
+
+
+def _split_turns(messages: list) -> list[list]:
+    """Group messages into turns, each starting at a human message."""
+    turns: list[list] = []
+    for msg in messages:
+        if msg.type == "human" or not turns:
+            turns.append([])
+        turns[-1].append(msg)
+    return turns
+
+
+def _content_text(msg) -> str:
+    content = msg.content
+    if isinstance(content, list):
+        content = " ".join(block.get("text", "") for block in content if isinstance(block, dict))
+    return content or ""
+
+
+def _trim_tool_output(msg):
+    """A copy of an old tool message cut down to an excerpt, or None if already short."""
+    content = _content_text(msg)
+    if len(content) <= TOOL_EXCERPT_CHARS or content.endswith(_TRIM_MARKER):
+        return None
+    excerpt = content[:TOOL_EXCERPT_CHARS]
+    return msg.model_copy(update={"content": f"{excerpt}\n[{len(content) - len(excerpt)}{_TRIM_MARKER}"})
+
+
+def _render(messages: list) -> str:
+    lines = []
+    for msg in messages:
+        text = _content_text(msg)
+        if len(text) > SUMMARY_INPUT_CHARS:
+            text = text[:SUMMARY_INPUT_CHARS] + "..."
+        calls = getattr(msg, "tool_calls", None)
+        if calls:
+            text += " " + ", ".join(f"[called {c['name']}({c['args']})]" for c in calls)
+        lines.append(f"{msg.type}: {text.strip()}")
+    return "\n".join(lines)
+
+
+async def summarize(summary: str, messages: list) -> str:
+    """Fold messages into the running summary."""
+    response = await model.ainvoke([
+        SystemMessage(content=SUMMARY_PROMPT),
+        HumanMessage(content=f"Existing summary:\n{summary or '(none)'}\n\nNew messages:\n{_render(messages)}"),
+    ])
+    return _content_text(response).strip()
+
+
+async def history_node(state: AgentState) -> dict:
+    """Trim old tool outputs and summarize old turns so the history fits the budget."""
+    turns = _split_turns(state["messages"])
+    if len(turns) <= 1:
+        return {}
+
+    # 1. Excerpt tool outputs outside the most recent turns
+    replacements = {}
+    for turn in turns[:-KEEP_FULL_TURNS]:
+        for msg in turn:
+            if msg.type == "tool" and (trimmed := _trim_tool_output(msg)):
+                replacements[msg.id] = trimmed
+    turns = [[replacements.get(msg.id, msg) for msg in turn] for turn in turns]
+    update: dict = {"messages": list(replacements.values())} if replacements else {}
+
+    # 2. Over budget: fold the oldest turns into the summary until well under it
+    total = sum(count_tokens_approximately(turn) for turn in turns)
+    target = HISTORY_TOKEN_BUDGET * SUMMARY_TARGET_RATIO if total > HISTORY_TOKEN_BUDGET else total
+    folded = []
+    while total > target and len(turns) > 1:
+        turn = turns.pop(0)
+        total -= count_tokens_approximately(turn)
+        folded.extend(turn)
+
+    if folded:
+        try:
+            summary = await summarize(state.get("summary", ""), folded)
+        except Exception as e:
+            # Keep the full history rather than lose the turns
+            print(f"[HISTORY] Summary failed, keeping history: {e}")
+            return update
+        folded_ids = {msg.id for msg in folded}
+        update["summary"] = summary
+        update["messages"] = [
+            msg for msg in update.get("messages", []) if msg.id not in folded_ids
+        ] + [RemoveMessage(id=msg_id) for msg_id in folded_ids]
+
+    if update:
+        print(f"[HISTORY] Trimmed {len(replacements)} tool outputs, summarized {len(folded)} messages, ~{total} tokens kept")
+    return update
@@ -0,0 +1,49 @@
+"""Merge node - joins the answers of agents the supervisor ran in parallel.
+
+For a compound request ("show my invoices and recommend something new") the
+supervisor sends it to several agents at once with Send, recording them in
+parallel_agents. Each agent then goes here instead of back to the supervisor,
+and this node runs once all of them have finished. Their final replies are
+replaced by one combined reply, in the order the supervisor listed the
+agents; their tool calls and results stay in the history as they are.
+"""
+
+from typing import Literal
+from langchain_core.messages import AIMessage, RemoveMessage
+from langgraph.graph import END
+from langgraph.types import Command
+from ..state import AgentState
+
+
+def after_agent(state: AgentState) -> str:
+    """Where an agent node goes next: merge when it ran as part of a fan-out."""
+    return "merge" if state.get("parallel_agents") else "supervisor"
+
+
+def _text(msg) -> str:
+    content = msg.content
+    if isinstance(content, list):
+        content = "".join(block.get("text", "") for block in content if isinstance(block, dict))
+    return (content or "").strip()
+
+
+def merge_node(state: AgentState) -> Command[Literal["__end__"]]:
+    """Combine each parallel agent's final reply into one answer and finish the turn."""
+    agents = state.get("parallel_agents") or []
+    messages = state["messages"]
+    start = max((i for i, msg in enumerate(messages) if msg.type == "human"), default=0)
+
+    # Final reply of each agent this turn; create_react_agent tags them with its name
+    finals = {}
+    for msg in messages[start:]:
+        if msg.type == "ai" and msg.name in agents and not msg.tool_calls and _text(msg):
+            finals[msg.name] = msg
+
+    update: dict = {"parallel_agents": [], "supervisor_turns": 0}
+    if len(finals) > 1:
+        replies = [finals[agent] for agent in agents if agent in finals]
+        update["messages"] = [RemoveMessage(id=msg.id) for msg in replies] + [
+            AIMessage(content="\n\n".join(_text(msg) for msg in replies))
+        ]
+    print(f"[MERGE] Combined replies from {', '.join(finals) or 'no agents'}")
+    return Command(goto=END, update=update)
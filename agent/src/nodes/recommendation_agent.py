@@ -1,54 +1,39 @@
 """Recommendation agent node - handles music recommendations for all users."""
 
+from typing import Literal
 from langchain_anthropic import ChatAnthropic
 from langchain_core.runnables import RunnableConfig
 from langgraph.prebuilt import create_react_agent
 from langgraph.types import Command
-from ..state import AgentState
+from .merge import after_agent
+from ..state import AgentIdentityState, AgentState
 from ..tools.recommendation_tools import RECOMMENDATION_TOOLS
+from ..utils import cached_system_message, record_cache_usage, with_summary
 
 model = ChatAnthropic(model="claude-haiku-4-5-20251001")
 
 
-def create_recommendation_agent(user_id: int, user_name: str, is_employee: bool):
-    """Create a recommendation agent with context-aware prompt."""
-
-    if is_employee:
-        identity = f"""## YOUR IDENTITY
-- User: {user_name} (Employee)
-- For personalized recommendations, use any customer_id from supported customers
-- For general genre queries, no customer_id needed"""
-    else:
-        identity = f"""## YOUR IDENTITY
-- Customer ID: {user_id}
-- User: {user_name}"""
-
-    customer_id_rule = f"customer_id={user_id}" if not is_employee else "<customer_id from supported list>"
-
-    return create_react_agent(
-        model,
-        tools=RECOMMENDATION_TOOLS,
-        prompt=f"""You are a music discovery assistant helping {user_name} find new music.
-
-{identity}
+# Static instructions, identical for every user so they can be prompt-cached
+RECOMMENDATION_PROMPT = """You are a music discovery assistant helping a user find new music.
+Who you are helping, and which customer_id to use, is given under YOUR IDENTITY at the end of these instructions.
 
 ## AVAILABLE TOOLS
 
 ### 1. get_genre_recommendations(customer_id: int)
 USE WHEN: User wants personalized recommendations based on what they've already purchased.
-CALL WITH: customer_id={customer_id_rule}
+CALL WITH: customer_id=<customer_id per YOUR IDENTITY>
 EXAMPLE TRIGGERS: "What should I listen to?", "Recommend something for me", "Based on my purchases..."
 
 ### 2. get_artist_recommendations(customer_id: int)
 USE WHEN: User wants to discover new artists similar to ones they already like.
-CALL WITH: customer_id={customer_id_rule}
+CALL WITH: customer_id=<customer_id per YOUR IDENTITY>
 EXAMPLE TRIGGERS: "Show me similar artists", "Who else would I like?", "Artists like Taylor Swift"
 
 ### 3. get_popular_tracks_in_genre(genre_name: str, customer_id: int = None)
 USE WHEN: User wants to explore best-selling tracks in a specific genre.
 PARAMETERS:
   - genre_name: the genre (Rock, Jazz, Pop, Metal, Blues, etc.)
-  - customer_id: pass {customer_id_rule} to exclude tracks they already own
+  - customer_id: pass <customer_id per YOUR IDENTITY> to exclude tracks they already own
 EXAMPLE TRIGGERS: "What's popular in Jazz?", "Top rock songs", "Best-selling metal tracks"
 ALWAYS pass customer_id to exclude already-owned tracks from results!
 
@@ -57,12 +42,48 @@ ALWAYS pass customer_id to exclude already-owned tracks from results!
 2. For personalized recommendations, use get_genre_recommendations or get_artist_recommendations
 3. For general genre exploration, use get_popular_tracks_in_genre
 4. Be enthusiastic about music! Make recommendations feel personal and exciting
-5. Explain WHY you're recommending something based on their taste""",
+5. Explain WHY you're recommending something based on their taste"""
+
+
+def recommendation_prompt(state: AgentIdentityState) -> list:
+    """Render the system prompt for the user in state."""
+    user_id = state["user_id"]
+    user_name = state["user_name"]
+    is_employee = state["user_role"] == "employee"
+
+    if is_employee:
+        identity = f"""## YOUR IDENTITY
+- User: {user_name} (Employee)
+- For personalized recommendations, use any customer_id from supported customers
+- For general genre queries, no customer_id needed"""
+    else:
+        identity = f"""## YOUR IDENTITY
+- Customer ID: {user_id}
+- User: {user_name}
+- Always use customer_id={user_id}"""
+
+    identity = with_summary(identity, state.get("summary"))
+    return [cached_system_message(RECOMMENDATION_PROMPT, identity)] + state["messages"]
+
+
+def create_recommendation_agent():
+    """Create the recommendation agent. Identity comes from state, so it is compiled once."""
+    return create_react_agent(
+        model,
+        tools=RECOMMENDATION_TOOLS,
+        prompt=recommendation_prompt,
+        state_schema=AgentIdentityState,
+        name="recommendation_agent",  # Tags its replies, so the merge node can tell them apart
         checkpointer=False,  # Platform handles persistence
     )
 
 
-async def recommendation_agent_node(state: AgentState, config: RunnableConfig) -> Command:
+recommendation_agent = create_recommendation_agent()
+
+
+async def recommendation_agent_node(
+    state: AgentState, config: RunnableConfig
+) -> Command[Literal["supervisor", "merge"]]:
     """Recommendation agent node function."""
 
     # Get auth context
@@ -72,21 +93,27 @@ async def recommendation_agent_node(state: AgentState, config: RunnableConfig) -
 
     if role == "employee":
         user_id = auth_user.get("employee_id")
-        is_employee = True
     else:
+        role = "customer"
         user_id = auth_user.get("customer_id")
-        is_employee = False
-
-    # Create agent with user context
-    agent = create_recommendation_agent(user_id, user_name, is_employee)
 
-    # Invoke agent
-    result = await agent.ainvoke(
-        {"messages": state["messages"]},
+    # Invoke the shared agent with user context
+    result = await recommendation_agent.ainvoke(
+        {
+            "messages": state["messages"],
+            "user_role": role,
+            "user_id": user_id,
+            "user_name": user_name,
+            "supported_customers": auth_user.get("supported_customers", []),
+            "summary": state.get("summary", ""),
+        },
         config=config
     )
+    # Only this turn's messages; add_messages appends them to the history
+    new_messages = result["messages"][len(state["messages"]):]
+    record_cache_usage("recommendation_agent", new_messages)
 
     return Command(
-        goto="supervisor",
-        update={"messages": result["messages"]}
+        goto=after_agent(state),
+        update={"messages": new_messages}
     )
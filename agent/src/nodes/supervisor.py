@@ -1,23 +1,23 @@
 """Supervisor node that routes to appropriate agent based on user role and intent."""
 
+import re
+from collections import Counter
 from langchain_anthropic import ChatAnthropic
-from langchain_core.messages import SystemMessage, HumanMessage
+from langchain_core.messages import HumanMessage
 from langchain_core.runnables import RunnableConfig
-from langgraph.types import Command
+from langgraph.types import Command, Send
 from ..state import AgentState
-from ..utils import get_auth_user
+from ..utils import cached_system_message, get_auth_user, record_cache_usage
 
-model = ChatAnthropic(model="claude-haiku-4-5-20251001")
+# Tagged nostream so the routing decision never shows up in messages-mode token streams
+model = ChatAnthropic(model="claude-haiku-4-5-20251001").with_config(tags=["nostream"])
 
 # Maximum supervisor invocations before forcing exit (prevents infinite loops)
 MAX_SUPERVISOR_TURNS = 2
 
+# Static routing instructions, prompt-cached; the user context follows as a separate block
 ROUTING_PROMPT = """You are a supervisor routing requests for a music store assistant system.
-
-## USER CONTEXT
-- Name: {user_name}
-- Role: {role}
-- {role_context}
+The user's name and role are given under USER CONTEXT at the end of these instructions.
 
 ## AGENT CAPABILITIES
 
@@ -27,6 +27,7 @@ Route here when user asks about:
 - Their purchase history, music library ("what have I bought", "my purchases")
 - Searching for music ("find songs by...", "search for...")
 - Buying tracks or albums ("purchase", "buy")
+- Their shopping cart and checkout ("add to my cart", "what's in my cart", "check out")
 
 ### employee_agent (EMPLOYEES ONLY)
 Route here when user asks about:
@@ -54,8 +55,139 @@ Output FINISH when:
 3. **IMPORTANT**: If an agent just responded with data or an answer, output FINISH immediately
 4. Only route to another agent if the user's request was NOT addressed
 5. Prefer FINISH over unnecessary agent calls - minimize latency
+6. If the latest request asks for several things that need DIFFERENT agents
+   ("show my invoices and recommend something new"), name each of those agents,
+   comma-separated; they run in parallel
+
+Respond with ONLY: one of customer_agent, employee_agent, recommendation_agent, FINISH;
+or several agents separated by commas (e.g. "customer_agent, recommendation_agent")"""
+
+ROUTING_CONTEXT = """## USER CONTEXT
+- Name: {user_name}
+- Role: {role}
+- {role_context}"""
+
+# Deterministic intents, built from the trigger phrases in ROUTING_PROMPT. A message
+# that matches exactly one allowed agent skips the routing LLM call; anything else
+# (no match, or matches for several agents) is ambiguous and goes to the LLM.
+INTENT_PATTERNS = {
+    "customer_agent": [
+        r"\binvoices?\b",
+        r"\bmy (orders?|billing|purchases?|music|library)\b",
+        r"\bwhat (have|did) i (order|buy|bought|purchase)",
+        r"\b(find|search|look(ing)? for)\b",
+        r"\b(buy|purchase)\b",
+        r"\b(cart|checkout)\b",  # Not "check out", which is also "listen to"
+    ],
+    "employee_agent": [
+        r"\bmy (profile|info|information|title|manager)\b",
+        r"\bwho is my manager\b",
+        r"\b(which|my|assigned) customers\b",
+        r"\binvoices?\b",  # Viewing, editing or deleting customer invoices
+    ],
+    "recommendation_agent": [
+        r"\brecommend",
+        r"\bsuggest",
+        r"\bwhat should i (listen|play|hear)\b",
+        r"\bsimilar\b",
+        r"\bwho else would i like\b",
+        r"\bdiscover\b",
+        r"\b(popular|top|best[- ]selling)\b.*\b(songs?|tracks?|music)\b",
+    ],
+}
+_INTENTS = {
+    agent: [re.compile(p, re.IGNORECASE) for p in patterns]
+    for agent, patterns in INTENT_PATTERNS.items()
+}
+# Where a compound request splits into separately routable parts
+_CLAUSE_BREAK = re.compile(r"[;,]|\b(?:and|also|then|plus)\b", re.IGNORECASE)
+# Only openers and sign-offs; an "ok" or "great" may be answering the agent, so it goes to the LLM
+_GREETING = re.compile(
+    r"^\s*(hi|hello|hey|thanks|thank you|thx|bye|goodbye)\b[\s!.,]*(there|so much|again)?[\s!.]*$",
+    re.IGNORECASE,
+)
+
+# How each routing decision was made, to prove the fast path's hit rate
+ROUTER_STATS: Counter = Counter()
+
+
+def get_router_stats() -> dict:
+    """Routing decision counts and the share that skipped the LLM."""
+    stats = dict(ROUTER_STATS)
+    total = sum(stats.values())
+    stats["total"] = total
+    stats["llm_skip_rate"] = (total - stats.get("llm", 0)) / total if total else 0.0
+    return stats
+
+
+def _matched_agents(text: str, valid_agents: list[str]) -> set[str]:
+    return {
+        agent for agent, patterns in _INTENTS.items()
+        if agent in valid_agents and any(p.search(text) for p in patterns)
+    }
+
+
+def fast_route(message: str, valid_agents: list[str], after_question: bool = False) -> str | None:
+    """Route by keyword intent; None if the message is ambiguous.
+
+    after_question: the agent's last reply asked the user something, so even
+    a "thanks" may be an answer and is left to the LLM, which sees the history.
+    """
+    if _GREETING.match(message):
+        return None if after_question else "FINISH"
+    matched = _matched_agents(message, valid_agents)
+    if len(matched) == 1:
+        return matched.pop()
+    return None
+
+
+def compound_route(message: str, valid_agents: list[str]) -> list[str] | None:
+    """Agents for a compound request, in the order asked; None unless it needs several.
+
+    Each clause must point at a single agent, so "songs similar to X" (a search
+    word and a recommendation word in one clause) is left to the LLM.
+    """
+    agents: list[str] = []
+    for clause in _CLAUSE_BREAK.split(message):
+        matched = _matched_agents(clause, valid_agents)
+        if len(matched) > 1:
+            return None
+        if matched and (agent := matched.pop()) not in agents:
+            agents.append(agent)
+    return agents if len(agents) > 1 else None
 
-Respond with ONLY ONE of: customer_agent, employee_agent, recommendation_agent, FINISH"""
+
+def _fan_out(state: AgentState, agents: list[str], turns: int) -> Command:
+    """Run several agents in parallel on the same state; the merge node joins them."""
+    print(f"[SUPERVISOR] Fan out -> {', '.join(agents)}")
+    return Command(
+        goto=[Send(agent, {**state, "parallel_agents": agents}) for agent in agents],
+        update={"supervisor_turns": turns, "parallel_agents": agents},
+    )
+
+
+def _message_type(msg) -> str | None:
+    if isinstance(msg, dict):
+        return msg.get("type") or msg.get("role")
+    return getattr(msg, "type", None)
+
+
+def _message_content(msg) -> str:
+    content = msg.get("content", "") if isinstance(msg, dict) else getattr(msg, "content", "")
+    if isinstance(content, list):
+        # Anthropic-style content blocks
+        content = " ".join(block.get("text", "") for block in content if isinstance(block, dict))
+    return content or ""
+
+
+def _asked_question(messages: list) -> bool:
+    """Whether the AI reply just before the latest human message ends in a question."""
+    for msg in reversed(messages[:-1]):
+        if _message_type(msg) == "ai" and _message_content(msg).strip():
+            return _message_content(msg).rstrip().endswith("?")
+        if _message_type(msg) in ("human", "user"):
+            return False
+    return False
 
 
 async def supervisor_node(state: AgentState, config: RunnableConfig) -> Command:
@@ -76,6 +208,16 @@ async def supervisor_node(state: AgentState, config: RunnableConfig) -> Command:
     if current_turns >= MAX_SUPERVISOR_TURNS:
         return Command(goto="__end__", update={"supervisor_turns": 0})
 
+    # An agent just answered - that is always FINISH, no need to ask the LLM
+    if (
+        not is_new_request and last_msg is not None
+        and _message_type(last_msg) == "ai"
+        and _message_content(last_msg)
+        and not getattr(last_msg, "tool_calls", None)
+    ):
+        ROUTER_STATS["short_circuit"] += 1
+        return Command(goto="__end__", update={"supervisor_turns": current_turns + 1})
+
     # Get auth context (checks multiple sources)
     auth_user = await get_auth_user(config)
     role = auth_user.get("role", "customer")
@@ -90,6 +232,22 @@ async def supervisor_node(state: AgentState, config: RunnableConfig) -> Command:
         role_context = f"Customer ID: {auth_user.get('customer_id', 'unknown')}"
         valid_agents = ["customer_agent", "recommendation_agent", "FINISH"]
 
+    # Clear-cut requests skip the routing LLM call
+    if is_new_request:
+        message = _message_content(last_msg)
+        if agents := compound_route(message, valid_agents):
+            ROUTER_STATS["fast_path"] += 1
+            return _fan_out(state, agents, current_turns + 1)
+        fast_choice = fast_route(message, valid_agents, after_question=_asked_question(state["messages"]))
+        if fast_choice:
+            ROUTER_STATS["fast_path"] += 1
+            print(f"[SUPERVISOR] Fast path -> {fast_choice}")
+            if fast_choice == "FINISH":
+                return Command(goto="__end__", update={"supervisor_turns": current_turns + 1})
+            return Command(goto=fast_choice, update={"supervisor_turns": current_turns + 1, "parallel_agents": []})
+
+    ROUTER_STATS["llm"] += 1
+
     # Build conversation summary for routing decision
     # Include last few messages to understand context
     recent_messages = []
@@ -111,25 +269,35 @@ async def supervisor_node(state: AgentState, config: RunnableConfig) -> Command:
 
     # Ask LLM to route
     response = await model.ainvoke([
-        SystemMessage(content=ROUTING_PROMPT.format(
+        cached_system_message(ROUTING_PROMPT, ROUTING_CONTEXT.format(
             user_name=user_name,
             role=role,
             role_context=role_context
         )),
         HumanMessage(content=f"Recent conversation:\n{conversation_context}\n\nWhat should we do next?")
     ])
+    record_cache_usage("supervisor", [response])
+
+    # One agent, FINISH, or a comma-separated list of agents to run in parallel
+    allowed = [a.lower() for a in valid_agents]
+    choices = [c.strip() for c in response.content.strip().lower().split(",")]
+    choices = list(dict.fromkeys(c for c in choices if c in allowed))
+
+    # Increment turn counter for next invocation
+    new_turns = current_turns + 1
 
-    next_agent = response.content.strip().lower()
+    agents = [c for c in choices if c != "finish"]
+    if len(agents) > 1:
+        return _fan_out(state, agents, new_turns)
 
     # Validate and enforce role restrictions
-    if next_agent not in [a.lower() for a in valid_agents]:
+    if not choices:
         # Default to the primary agent for the role
         next_agent = "customer_agent" if role == "customer" else "employee_agent"
-
-    # Increment turn counter for next invocation
-    new_turns = current_turns + 1
+    else:
+        next_agent = agents[0] if agents else "finish"
 
     if next_agent == "finish":
         return Command(goto="__end__", update={"supervisor_turns": new_turns})
 
-    return Command(goto=next_agent, update={"supervisor_turns": new_turns})
+    return Command(goto=next_agent, update={"supervisor_turns": new_turns, "parallel_agents": []})
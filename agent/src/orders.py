@@ -0,0 +1,282 @@
+"""Invoices and the shopping cart: every write the tools make goes through here.
+
+Each mutation is a job for the single writer (see writer.py), which runs it in
+its own savepoint inside a group-committed transaction. An order's prices and
+billing details are read inside that transaction, and all line items go in
+with a single executemany over one prepared statement. Whatever
+the customer confirmed is checked against the prices read there, so a price
+change between the confirmation and the write can't be charged silently.
+
+Carts live in the carts table, one row per (customer, track). Checkout bills
+the whole cart as one invoice and empties it in the same transaction.
+
+Confirmed purchases can carry an idempotency key (thread id, tool call id,
+action). The key is looked up and recorded inside the write transaction, so a
+resume that is retried or double-submitted gets the invoice the first one
+wrote instead of a second charge.
+"""
+
+import sqlite3
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal
+
+from .db import get_db
+from .writer import writer
+
+
+class OrderError(Exception):
+    """An order that can't be placed; the message is safe to show the customer."""
+
+
+class PriceChangedError(OrderError):
+    """Prices changed after the customer confirmed."""
+
+    def __init__(self, message: str, total: Decimal):
+        super().__init__(message)
+        self.total = total
+
+
+@dataclass
+class Invoice:
+    invoice_id: int
+    total: Decimal
+    track_count: int
+
+
+# (ThreadId, ToolCallId, Action) identifying one confirmed purchase
+IdempotencyKey = tuple[str, str, str]
+
+
+def _money(value) -> Decimal:
+    return Decimal(str(value)).quantize(Decimal("0.01"))
+
+
+def _write_invoice(
+    conn: sqlite3.Connection,
+    customer_id: int,
+    track_ids: list[int],
+    expected_total: float | None,
+) -> Invoice:
+    """Insert the invoice and its lines; the caller owns the transaction."""
+    customer = conn.execute("""
+        SELECT Address, City, State, Country, PostalCode
+        FROM customers WHERE CustomerId = ?
+    """, (customer_id,)).fetchone()
+    if not customer:
+        raise OrderError(f"Customer ID {customer_id} not found.")
+
+    prices = {
+        row["TrackId"]: row["UnitPrice"]
+        for row in conn.execute(
+            f"SELECT TrackId, UnitPrice FROM tracks WHERE TrackId IN ({', '.join('?' * len(track_ids))})",
+            track_ids,
+        )
+    }
+    missing = [track_id for track_id in track_ids if track_id not in prices]
+    if missing:
+        raise OrderError(f"Track ID {missing[0]} is no longer available.")
+
+    total = sum((_money(prices[track_id]) for track_id in track_ids), Decimal("0.00"))
+    if expected_total is not None and total != _money(expected_total):
+        raise PriceChangedError(
+            f"Prices changed since you confirmed: the total is now ${total:.2f} "
+            f"(was ${_money(expected_total):.2f}).",
+            total,
+        )
+
+    cur = conn.execute("""
+        INSERT INTO invoices (CustomerId, InvoiceDate, BillingAddress,
+                              BillingCity, BillingState, BillingCountry,
+                              BillingPostalCode, Total)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    """, (
+        customer_id,
+        datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        customer["Address"],
+        customer["City"],
+        customer["State"],
+        customer["Country"],
+        customer["PostalCode"],
+        float(total),
+    ))
+    invoice_id = cur.lastrowid
+
+    conn.executemany("""
+        INSERT INTO invoice_items (InvoiceId, TrackId, UnitPrice, Quantity)
+        VALUES (?, ?, ?, 1)
+    """, [(invoice_id, track_id, prices[track_id]) for track_id in track_ids])
+
+    return Invoice(invoice_id, total, len(track_ids))
+
+
+def _replayed_invoice(conn: sqlite3.Connection, key: IdempotencyKey | None) -> Invoice | None:
+    """The invoice already written under this key, or None if the key is new."""
+    if key is None:
+        return None
+    row = conn.execute("""
+        SELECT k.InvoiceId, i.Total,
+               (SELECT COUNT(*) FROM invoice_items ii WHERE ii.InvoiceId = k.InvoiceId) AS Tracks
+        FROM idempotency_keys k
+        LEFT JOIN invoices i ON i.InvoiceId = k.InvoiceId
+        WHERE k.ThreadId = ? AND k.ToolCallId = ? AND k.Action = ?
+    """, key).fetchone()
+    if row is None:
+        return None
+    if row["Total"] is None:
+        raise OrderError(
+            f"This purchase was already completed as Invoice #{row['InvoiceId']}, which has since been deleted."
+        )
+    print(f"[ORDERS] Replayed {key[2]} for {key[0]}/{key[1]}: Invoice #{row['InvoiceId']}")
+    return Invoice(row["InvoiceId"], _money(row["Total"]), row["Tracks"])
+
+
+def _record_key(conn: sqlite3.Connection, key: IdempotencyKey | None, invoice_id: int) -> None:
+    if key is not None:
+        conn.execute(
+            "INSERT INTO idempotency_keys (ThreadId, ToolCallId, Action, InvoiceId, CreatedAt) VALUES (?, ?, ?, ?, ?)",
+            (*key, invoice_id, datetime.now().strftime("%Y-%m-%d %H:%M:%S")),
+        )
+
+
+def create_invoice(
+    customer_id: int,
+    track_ids: list[int],
+    expected_total: float | None = None,
+    key: IdempotencyKey | None = None,
+) -> Invoice:
+    """
+    Bill a customer for tracks at their current prices, in one transaction.
+
+    Args:
+        customer_id: The customer to bill; billing address is copied from their record
+        track_ids: Tracks to put on the invoice, one line each
+        expected_total: The total the customer confirmed; if current prices add up to
+            anything else, nothing is written and PriceChangedError is raised
+        key: Idempotency key for this purchase; if an invoice was already written
+            under it, that invoice is returned and nothing new is written
+
+    Raises:
+        OrderError: The customer or a track doesn't exist, or there is nothing to buy
+    """
+    if not track_ids:
+        raise OrderError("There is nothing to purchase.")
+
+    def job(conn):
+        if invoice := _replayed_invoice(conn, key):
+            return invoice
+        invoice = _write_invoice(conn, customer_id, track_ids, expected_total)
+        _record_key(conn, key, invoice.invoice_id)
+        return invoice
+
+    return writer.write(job)
+
+
+def find_invoice(key: IdempotencyKey | None) -> Invoice | None:
+    """The invoice already written under an idempotency key, if any."""
+    with get_db() as conn:
+        return _replayed_invoice(conn, key)
+
+
+def get_cart(customer_id: int) -> list[sqlite3.Row]:
+    """Cart lines with track details, in the order they were added."""
+    with get_db() as conn:
+        return conn.execute("""
+            SELECT c.TrackId, t.Name as Track, ar.Name as Artist, t.UnitPrice
+            FROM carts c
+            JOIN tracks t ON c.TrackId = t.TrackId
+            JOIN albums al ON t.AlbumId = al.AlbumId
+            JOIN artists ar ON al.ArtistId = ar.ArtistId
+            WHERE c.CustomerId = ?
+            ORDER BY c.AddedAt, c.TrackId
+        """, (customer_id,)).fetchall()
+
+
+def add_to_cart(customer_id: int, track_ids: list[int]) -> tuple[list[int], list[int], list[int]]:
+    """Add tracks to a cart. Returns (added, already_in_cart, not_found) track ids."""
+    track_ids = list(dict.fromkeys(track_ids))
+    if not track_ids:
+        return [], [], []
+    placeholders = ", ".join("?" * len(track_ids))
+
+    def job(conn):
+        existing = {row[0] for row in conn.execute(
+            f"SELECT TrackId FROM tracks WHERE TrackId IN ({placeholders})", track_ids
+        )}
+        in_cart = {row[0] for row in conn.execute(
+            f"SELECT TrackId FROM carts WHERE CustomerId = ? AND TrackId IN ({placeholders})",
+            [customer_id, *track_ids],
+        )}
+        added = [t for t in track_ids if t in existing and t not in in_cart]
+        added_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        conn.executemany(
+            "INSERT INTO carts (CustomerId, TrackId, AddedAt) VALUES (?, ?, ?)",
+            [(customer_id, t, added_at) for t in added],
+        )
+        return added, [t for t in track_ids if t in in_cart], [t for t in track_ids if t not in existing]
+
+    return writer.write(job)
+
+
+def remove_from_cart(customer_id: int, track_ids: list[int] | None = None) -> int:
+    """Remove tracks from a cart, or empty it if track_ids is None. Returns lines removed."""
+    def job(conn):
+        if track_ids is None:
+            cur = conn.execute("DELETE FROM carts WHERE CustomerId = ?", (customer_id,))
+        else:
+            cur = conn.executemany(
+                "DELETE FROM carts WHERE CustomerId = ? AND TrackId = ?",
+                [(customer_id, t) for t in track_ids],
+            )
+        return cur.rowcount
+
+    return writer.write(job)
+
+
+def checkout_cart(
+    customer_id: int,
+    track_ids: list[int],
+    expected_total: float,
+    key: IdempotencyKey | None = None,
+) -> Invoice:
+    """
+    Bill the whole cart as one invoice and empty it, in one transaction.
+
+    track_ids and expected_total are what the customer confirmed; if the cart
+    no longer holds exactly those tracks, nothing is written. A replayed key
+    returns its invoice even though the cart has since been emptied.
+    """
+    def job(conn):
+        if invoice := _replayed_invoice(conn, key):
+            return invoice
+        in_cart = [row[0] for row in conn.execute(
+            "SELECT TrackId FROM carts WHERE CustomerId = ? ORDER BY AddedAt, TrackId", (customer_id,)
+        )]
+        if not in_cart:
+            raise OrderError("Your cart is empty.")
+        if sorted(in_cart) != sorted(track_ids):
+            raise OrderError("Your cart changed since you confirmed. Please review it and check out again.")
+        invoice = _write_invoice(conn, customer_id, in_cart, expected_total)
+        _record_key(conn, key, invoice.invoice_id)
+        conn.execute("DELETE FROM carts WHERE CustomerId = ?", (customer_id,))
+        return invoice
+
+    return writer.write(job)
+
+
+def update_invoice_total(invoice_id: int, new_total: float) -> None:
+    """Set an invoice's total."""
+    def job(conn):
+        conn.execute("UPDATE invoices SET Total = ? WHERE InvoiceId = ?", (new_total, invoice_id))
+
+    writer.write(job)
+
+
+def delete_invoice(invoice_id: int) -> None:
+    """Delete an invoice and its line items."""
+    def job(conn):
+        # Line items first (foreign key constraint)
+        conn.execute("DELETE FROM invoice_items WHERE InvoiceId = ?", (invoice_id,))
+        conn.execute("DELETE FROM invoices WHERE InvoiceId = ?", (invoice_id,))
+
+    writer.write(job)
@@ -0,0 +1,274 @@
+"""Precomputed recommendation data built from purchase history.
+
+ArtistSimilarity is an item-item cosine similarity over the binary
+customer x artist purchase matrix ("customers who bought X also bought Y").
+Only the top neighbours of each artist are kept, so a recommendation only
+touches the customer's own artists and their neighbour lists, whatever the
+catalog size.
+
+Genre recommendations sample from cached per-genre track-id arrays instead
+of sorting every candidate with ORDER BY RANDOM(). Genre names are resolved
+to ids against a cached copy of the genres table, reloaded only when
+catalog_version moves, so a name that matches nothing costs no extra query.
+
+Build ahead of time with `python -m src.recommender`, or let the first
+request build it on demand. Once built, a stale matrix is rebuilt in the
+background while requests keep using the old one.
+"""
+
+import heapq
+import json
+import math
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+from bisect import bisect_right
+from collections import defaultdict
+from itertools import accumulate, combinations
+from pathlib import Path
+
+from .db import DATABASE_PATH, get_db
+
+# Where the similarity matrix is persisted between restarts
+SIMILARITY_PATH = DATABASE_PATH.with_name("artist_similarity.json")
+
+# Neighbours kept per artist
+NEIGHBORS_PER_ARTIST = 25
+
+# Rebuild once new purchases exist and the matrix is older than this (seconds)
+SIMILARITY_MAX_AGE = 3600
+
+
+class ArtistSimilarity:
+    """Top-K co-purchase neighbours for every artist."""
+
+    def __init__(self, neighbors: dict[int, list[tuple[int, float]]], high_water: int, built_at: float):
+        self.neighbors = neighbors
+        self.high_water = high_water  # MAX(InvoiceLineId) the matrix was built from
+        self.built_at = built_at
+
+    @classmethod
+    def build(cls, conn: sqlite3.Connection) -> "ArtistSimilarity":
+        high_water = conn.execute("SELECT COALESCE(MAX(InvoiceLineId), 0) FROM invoice_items").fetchone()[0]
+        cur = conn.execute("""
+            SELECT DISTINCT i.CustomerId, al.ArtistId
+            FROM invoice_items ii
+            JOIN invoices i ON ii.InvoiceId = i.InvoiceId
+            JOIN tracks t ON ii.TrackId = t.TrackId
+            JOIN albums al ON t.AlbumId = al.AlbumId
+            WHERE ii.InvoiceLineId <= ?
+        """, (high_water,))
+
+        # Sparse rows of the customer x artist matrix
+        customer_artists: dict[int, set[int]] = defaultdict(set)
+        for customer_id, artist_id in cur.fetchall():
+            customer_artists[customer_id].add(artist_id)
+
+        # Column norms and co-occurrence counts (A^T A) accumulated one customer row at a time
+        buyers: dict[int, int] = defaultdict(int)
+        co_counts: dict[tuple[int, int], int] = defaultdict(int)
+        for artists in customer_artists.values():
+            for artist_id in artists:
+                buyers[artist_id] += 1
+            for a, b in combinations(sorted(artists), 2):
+                co_counts[a, b] += 1
+
+        scored: dict[int, list[tuple[float, int]]] = defaultdict(list)
+        for (a, b), count in co_counts.items():
+            cosine = count / math.sqrt(buyers[a] * buyers[b])
+            scored[a].append((cosine, b))
+            scored[b].append((cosine, a))
+
+        neighbors = {
+            artist_id: [(other, round(score, 6)) for score, other in heapq.nlargest(NEIGHBORS_PER_ARTIST, pairs)]
+            for artist_id, pairs in scored.items()
+        }
+        return cls(neighbors, high_water, time.time())
+
+    def recommend(self, owned: set[int], limit: int = 10) -> list[tuple[int, float, int]]:
+        """
+        Score unowned artists by summed similarity to the owned ones.
+
+        Returns (artist_id, score, because_artist_id) best first, where
+        because_artist_id is the owned artist that contributed most.
+        """
+        scores: dict[int, float] = defaultdict(float)
+        because: dict[int, tuple[float, int]] = {}
+        for owned_id in owned:
+            for other, score in self.neighbors.get(owned_id, ()):
+                if other in owned:
+                    continue
+                scores[other] += score
+                if score > because.get(other, (0.0, 0))[0]:
+                    because[other] = (score, owned_id)
+        top = heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], -item[0]))
+        return [(artist_id, score, because[artist_id][1]) for artist_id, score in top]
+
+    def save(self, path=None) -> None:
+        """Write the matrix to disk atomically."""
+        path = Path(path or SIMILARITY_PATH)
+        # A unique temp file in the same directory, so concurrent saves can't interleave
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump({
+                    "high_water": self.high_water,
+                    "built_at": self.built_at,
+                    "neighbors": {str(k): v for k, v in self.neighbors.items()},
+                }, f)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    @classmethod
+    def load(cls, path=None) -> "ArtistSimilarity | None":
+        """Read a saved matrix, or None if missing or unreadable."""
+        path = path or SIMILARITY_PATH
+        try:
+            with open(path) as f:
+                data = json.load(f)
+            neighbors = {
+                int(k): [(other, score) for other, score in v]
+                for k, v in data["neighbors"].items()
+            }
+            return cls(neighbors, data["high_water"], data["built_at"])
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+
+_similarity: ArtistSimilarity | None = None
+_similarity_lock = threading.Lock()
+_rebuild_thread: threading.Thread | None = None
+
+
+def _is_fresh(similarity: ArtistSimilarity | None, high_water: int) -> bool:
+    if similarity is None or similarity.high_water > high_water:
+        return False  # Missing, or built from rows that have since been deleted
+    return similarity.high_water == high_water or time.time() - similarity.built_at < SIMILARITY_MAX_AGE
+
+
+def _rebuild() -> None:
+    global _similarity
+    try:
+        with get_db() as conn:
+            similarity = ArtistSimilarity.build(conn)
+        _similarity = similarity
+        similarity.save()
+        print(f"[RECOMMENDER] Rebuilt artist similarity for {len(similarity.neighbors)} artists")
+    except Exception as e:
+        # The stale matrix stays in use; the next stale request tries again
+        print(f"[RECOMMENDER] Artist similarity rebuild failed: {e}")
+
+
+def get_artist_similarity(conn: sqlite3.Connection) -> ArtistSimilarity:
+    """Get the shared similarity matrix, loading or rebuilding it when stale.
+
+    Only the very first build, with nothing on disk, runs on the request path.
+    After that a stale matrix keeps being served while a background thread
+    builds its replacement.
+    """
+    global _similarity, _rebuild_thread
+    high_water = conn.execute("SELECT COALESCE(MAX(InvoiceLineId), 0) FROM invoice_items").fetchone()[0]
+    if _is_fresh(_similarity, high_water):
+        return _similarity
+
+    with _similarity_lock:
+        if _similarity is None:
+            _similarity = ArtistSimilarity.load()
+        if _similarity is None:
+            _similarity = ArtistSimilarity.build(conn)
+            _similarity.save()
+            print(f"[RECOMMENDER] Built artist similarity for {len(_similarity.neighbors)} artists")
+        elif not _is_fresh(_similarity, high_water) and not (_rebuild_thread and _rebuild_thread.is_alive()):
+            _rebuild_thread = threading.Thread(target=_rebuild, name="similarity-rebuild", daemon=True)
+            _rebuild_thread.start()
+        return _similarity
+
+
+_genre_tracks: dict[int, list[int]] = {}
+_genre_tracks_version: int | None = None
+_genre_tracks_lock = threading.Lock()
+
+
+def get_genre_tracks(conn: sqlite3.Connection) -> dict[int, list[int]]:
+    """Get the cached GenreId -> [TrackId] arrays, reloading when the catalog changes."""
+    global _genre_tracks, _genre_tracks_version
+    version = conn.execute("SELECT version FROM catalog_version WHERE id = 1").fetchone()[0]
+    if version != _genre_tracks_version:
+        with _genre_tracks_lock:
+            if version != _genre_tracks_version:
+                genre_tracks: dict[int, list[int]] = defaultdict(list)
+                cur = conn.execute("SELECT GenreId, TrackId FROM tracks WHERE GenreId IS NOT NULL ORDER BY TrackId")
+                for genre_id, track_id in cur.fetchall():
+                    genre_tracks[genre_id].append(track_id)
+                _genre_tracks, _genre_tracks_version = dict(genre_tracks), version
+    return _genre_tracks
+
+
+_genres: dict[int, str] = {}
+_genres_version: int | None = None
+_genres_lock = threading.Lock()
+
+
+def get_genres(conn: sqlite3.Connection) -> dict[int, str]:
+    """Get the cached GenreId -> Name map, reloading when the catalog changes."""
+    global _genres, _genres_version
+    version = conn.execute("SELECT version FROM catalog_version WHERE id = 1").fetchone()[0]
+    if version != _genres_version:
+        with _genres_lock:
+            if version != _genres_version:
+                _genres = {r[0]: r[1] for r in conn.execute("SELECT GenreId, Name FROM genres")}
+                _genres_version = version
+    return _genres
+
+
+def resolve_genre_ids(conn: sqlite3.Connection, genre_name: str) -> list[int]:
+    """Resolve a genre name to ids by case-insensitive substring match (e.g. "rock")."""
+    needle = genre_name.strip().lower()
+    return [genre_id for genre_id, name in get_genres(conn).items() if name and needle in name.lower()]
+
+
+def sample_unowned_tracks(
+    pools: list[list[int]],
+    owned: set[int],
+    k: int = 10,
+    seed: int | None = None,
+) -> list[int]:
+    """
+    Draw up to k distinct track ids uniformly from the pools, skipping owned ones.
+
+    Uses rejection sampling, so the cost depends on k and the owned fraction,
+    not on pool size. If the pools are mostly owned it falls back to filtering.
+    """
+    rng = random.Random(seed)
+    bounds = list(accumulate(len(pool) for pool in pools))
+    total = bounds[-1] if bounds else 0
+    chosen: list[int] = []
+    seen: set[int] = set()
+
+    for _ in range(k * 20):
+        if len(chosen) == k or not total:
+            break
+        i = rng.randrange(total)
+        p = bisect_right(bounds, i)
+        track_id = pools[p][i - (bounds[p - 1] if p else 0)]
+        if track_id in owned or track_id in seen:
+            continue
+        seen.add(track_id)
+        chosen.append(track_id)
+
+    if len(chosen) < k:
+        remaining = [t for pool in pools for t in pool if t not in owned and t not in seen]
+        chosen += rng.sample(remaining, min(k - len(chosen), len(remaining)))
+    return chosen
+
+
+if __name__ == "__main__":
+    with get_db() as conn:
+        built = ArtistSimilarity.build(conn)
+    built.save()
+    print(f"Saved similarity for {len(built.neighbors)} artists to {SIMILARITY_PATH}")
@@ -0,0 +1,285 @@
+"""Schema additions layered on top of the stock Chinook database.
+
+Each migration runs once per database file and is recorded in schema_migrations.
+Migrations that need an optional SQLite module (e.g. FTS5) are skipped when the
+module is missing, and the feature flag in FEATURES stays False so callers can
+fall back to plain SQL.
+"""
+
+import sqlite3
+
+# Optional SQLite features detected while migrating
+FEATURES = {
+    "fts5": False,
+}
+
+
+# FTS5 index over the catalog text, one row per track (rowid = TrackId)
+CATALOG_FTS = """
+CREATE VIRTUAL TABLE IF NOT EXISTS catalog_fts USING fts5(
+    track, artist, album, genre,
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix = '2 3'
+);
+
+INSERT INTO catalog_fts (rowid, track, artist, album, genre)
+SELECT t.TrackId, t.Name, ar.Name, al.Title, g.Name
+FROM tracks t
+LEFT JOIN albums al ON t.AlbumId = al.AlbumId
+LEFT JOIN artists ar ON al.ArtistId = ar.ArtistId
+LEFT JOIN genres g ON t.GenreId = g.GenreId;
+
+CREATE TRIGGER IF NOT EXISTS catalog_fts_track_insert AFTER INSERT ON tracks BEGIN
+    INSERT INTO catalog_fts (rowid, track, artist, album, genre)
+    SELECT new.TrackId, new.Name, ar.Name, al.Title, g.Name
+    FROM (SELECT 1)
+    LEFT JOIN albums al ON al.AlbumId = new.AlbumId
+    LEFT JOIN artists ar ON ar.ArtistId = al.ArtistId
+    LEFT JOIN genres g ON g.GenreId = new.GenreId;
+END;
+
+CREATE TRIGGER IF NOT EXISTS catalog_fts_track_update
+AFTER UPDATE OF Name, AlbumId, GenreId ON tracks BEGIN
+    DELETE FROM catalog_fts WHERE rowid = old.TrackId;
+    INSERT INTO catalog_fts (rowid, track, artist, album, genre)
+    SELECT new.TrackId, new.Name, ar.Name, al.Title, g.Name
+    FROM (SELECT 1)
+    LEFT JOIN albums al ON al.AlbumId = new.AlbumId
+    LEFT JOIN artists ar ON ar.ArtistId = al.ArtistId
+    LEFT JOIN genres g ON g.GenreId = new.GenreId;
+END;
+
+CREATE TRIGGER IF NOT EXISTS catalog_fts_track_delete AFTER DELETE ON tracks BEGIN
+    DELETE FROM catalog_fts WHERE rowid = old.TrackId;
+END;
+
+CREATE TRIGGER IF NOT EXISTS catalog_fts_album_update
+AFTER UPDATE OF Title, ArtistId ON albums BEGIN
+    UPDATE catalog_fts
+    SET album = new.Title,
+        artist = (SELECT Name FROM artists WHERE ArtistId = new.ArtistId)
+    WHERE rowid IN (SELECT TrackId FROM tracks WHERE AlbumId = new.AlbumId);
+END;
+
+CREATE TRIGGER IF NOT EXISTS catalog_fts_artist_update
+AFTER UPDATE OF Name ON artists BEGIN
+    UPDATE catalog_fts
+    SET artist = new.Name
+    WHERE rowid IN (
+        SELECT t.TrackId FROM tracks t
+        JOIN albums al ON t.AlbumId = al.AlbumId
+        WHERE al.ArtistId = new.ArtistId
+    );
+END;
+
+CREATE TRIGGER IF NOT EXISTS catalog_fts_genre_update
+AFTER UPDATE OF Name ON genres BEGIN
+    UPDATE catalog_fts
+    SET genre = new.Name
+    WHERE rowid IN (SELECT TrackId FROM tracks WHERE GenreId = new.GenreId);
+END;
+"""
+
+
+# Single-row counter bumped whenever catalog names change, so in-process
+# indexes can tell when they are stale with one primary-key read
+CATALOG_VERSION = """
+CREATE TABLE IF NOT EXISTS catalog_version (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    version INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO catalog_version (id, version) VALUES (1, 0);
+""" + "".join(
+    f"""
+CREATE TRIGGER IF NOT EXISTS catalog_version_{table}_{event.split()[0].lower()}
+AFTER {event} ON {table} BEGIN
+    UPDATE catalog_version SET version = version + 1 WHERE id = 1;
+END;
+"""
+    for table, name_column in [("artists", "Name"), ("albums", "Title"), ("tracks", "Name")]
+    for event in ["INSERT", "DELETE", f"UPDATE OF {name_column}"]
+)
+
+
+# Per-track sales counters, kept current by triggers on invoice_items so
+# "top N in genre" is an index range read instead of a COUNT/GROUP BY.
+# The stock chinook.db uses schema format 1, which ignores DESC in indexes, so
+# SQLite still sorts ties by Name until the file is VACUUMed to format 4.
+TRACK_SALES = """
+CREATE TABLE IF NOT EXISTS track_sales (
+    TrackId INTEGER PRIMARY KEY,
+    GenreId INTEGER,
+    Name NVARCHAR(200) NOT NULL,
+    TimesSold INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_track_sales_genre_rank
+    ON track_sales (GenreId, TimesSold DESC, Name);
+
+INSERT INTO track_sales (TrackId, GenreId, Name, TimesSold)
+SELECT t.TrackId, t.GenreId, t.Name, COUNT(ii.InvoiceLineId)
+FROM tracks t
+LEFT JOIN invoice_items ii ON ii.TrackId = t.TrackId
+GROUP BY t.TrackId;
+
+CREATE TRIGGER IF NOT EXISTS track_sales_item_insert AFTER INSERT ON invoice_items BEGIN
+    UPDATE track_sales SET TimesSold = TimesSold + 1 WHERE TrackId = new.TrackId;
+END;
+
+CREATE TRIGGER IF NOT EXISTS track_sales_item_delete AFTER DELETE ON invoice_items BEGIN
+    UPDATE track_sales SET TimesSold = TimesSold - 1 WHERE TrackId = old.TrackId;
+END;
+
+CREATE TRIGGER IF NOT EXISTS track_sales_item_update AFTER UPDATE OF TrackId ON invoice_items BEGIN
+    UPDATE track_sales SET TimesSold = TimesSold - 1 WHERE TrackId = old.TrackId;
+    UPDATE track_sales SET TimesSold = TimesSold + 1 WHERE TrackId = new.TrackId;
+END;
+
+CREATE TRIGGER IF NOT EXISTS track_sales_track_insert AFTER INSERT ON tracks BEGIN
+    INSERT INTO track_sales (TrackId, GenreId, Name) VALUES (new.TrackId, new.GenreId, new.Name);
+END;
+
+CREATE TRIGGER IF NOT EXISTS track_sales_track_update AFTER UPDATE OF GenreId, Name ON tracks BEGIN
+    UPDATE track_sales SET GenreId = new.GenreId, Name = new.Name WHERE TrackId = new.TrackId;
+END;
+
+CREATE TRIGGER IF NOT EXISTS track_sales_track_delete AFTER DELETE ON tracks BEGIN
+    DELETE FROM track_sales WHERE TrackId = old.TrackId;
+END;
+"""
+
+
+# Single-row counter bumped whenever anything an authenticated user record is
+# built from changes (names, and which customers an employee supports)
+AUTH_VERSION = """
+CREATE TABLE IF NOT EXISTS auth_version (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    version INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO auth_version (id, version) VALUES (1, 0);
+""" + "".join(
+    f"""
+CREATE TRIGGER IF NOT EXISTS auth_version_{table}_{event.split()[0].lower()}
+AFTER {event} ON {table} BEGIN
+    UPDATE auth_version SET version = version + 1 WHERE id = 1;
+END;
+"""
+    for table, columns in [
+        ("customers", "FirstName, LastName, SupportRepId"),
+        ("employees", "FirstName, LastName"),
+    ]
+    for event in ["INSERT", "DELETE", f"UPDATE OF {columns}"]
+)
+
+
+# Expression indexes matching the login lookup's WHERE LOWER(FirstName) = ?,
+# so authentication is an index seek instead of a scan of both tables.
+# The supported-customers query is already covered by IFK_CustomerSupportRepId,
+# since CustomerId is the rowid and every index entry carries it.
+LOGIN_INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_employees_login ON employees (LOWER(FirstName));
+CREATE INDEX IF NOT EXISTS idx_customers_login ON customers (LOWER(FirstName));
+"""
+
+
+# Newest-first invoice listings, paged by (InvoiceDate, InvoiceId). InvoiceId is
+# the rowid, so it is already the last key of the index.
+INVOICE_DATE_INDEX = """
+CREATE INDEX IF NOT EXISTS idx_invoices_customer_date ON invoices (CustomerId, InvoiceDate);
+"""
+
+
+# Shopping carts: one row per track a customer has set aside for checkout
+CARTS = """
+CREATE TABLE IF NOT EXISTS carts (
+    CustomerId INTEGER NOT NULL REFERENCES customers (CustomerId),
+    TrackId INTEGER NOT NULL REFERENCES tracks (TrackId),
+    AddedAt TEXT NOT NULL,
+    PRIMARY KEY (CustomerId, TrackId)
+) WITHOUT ROWID;
+"""
+
+# Invoice written by each confirmed purchase, so a retried resume finds it instead
+# of billing again. ToolCallId is the id of the tool call that raised the interrupt.
+IDEMPOTENCY_KEYS = """
+CREATE TABLE IF NOT EXISTS idempotency_keys (
+    ThreadId TEXT NOT NULL,
+    ToolCallId TEXT NOT NULL,
+    Action TEXT NOT NULL,
+    InvoiceId INTEGER NOT NULL,
+    CreatedAt TEXT NOT NULL,
+    PRIMARY KEY (ThreadId, ToolCallId, Action)
+) WITHOUT ROWID;
+"""
+
+
+# (name, sql, required feature or None), applied in order
+MIGRATIONS = [
+    ("0001_catalog_fts", CATALOG_FTS, "fts5"),
+    ("0002_catalog_version", CATALOG_VERSION, None),
+    ("0003_catalog_version_genre", """
+CREATE TRIGGER IF NOT EXISTS catalog_version_tracks_genre
+AFTER UPDATE OF GenreId ON tracks BEGIN
+    UPDATE catalog_version SET version = version + 1 WHERE id = 1;
+END;
+""", None),
+    ("0004_track_sales", TRACK_SALES, None),
+    ("0005_auth_version", AUTH_VERSION, None),
+    ("0006_login_indexes", LOGIN_INDEXES, None),
+    ("0007_invoice_date_index", INVOICE_DATE_INDEX, None),
+    ("0008_carts", CARTS, None),
+    ("0009_idempotency_keys", IDEMPOTENCY_KEYS, None),
+    ("0010_catalog_version_genres", "".join(
+        f"""
+CREATE TRIGGER IF NOT EXISTS catalog_version_genres_{event.split()[0].lower()}
+AFTER {event} ON genres BEGIN
+    UPDATE catalog_version SET version = version + 1 WHERE id = 1;
+END;
+"""
+        for event in ["INSERT", "DELETE", "UPDATE OF Name"]
+    ), None),
+]
+
+
+def _has_fts5(conn: sqlite3.Connection) -> bool:
+    """Check whether this SQLite build ships the FTS5 module."""
+    try:
+        conn.execute("CREATE VIRTUAL TABLE temp._fts5_probe USING fts5(x)")
+        conn.execute("DROP TABLE temp._fts5_probe")
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+
+def apply_migrations(conn: sqlite3.Connection) -> None:
+    """Apply any pending migrations and detect optional features."""
+    FEATURES["fts5"] = _has_fts5(conn)
+
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            name TEXT PRIMARY KEY,
+            applied_at TEXT NOT NULL DEFAULT (datetime('now'))
+        )
+    """)
+    conn.commit()
+    applied = {row[0] for row in conn.execute("SELECT name FROM schema_migrations")}
+
+    for name, sql, feature in MIGRATIONS:
+        if name in applied:
+            continue
+        if feature and not FEATURES[feature]:
+            print(f"[SCHEMA] Skipping {name}: SQLite {feature} not available")
+            continue
+        # executescript commits first; wrap in one transaction so a failure leaves nothing behind
+        try:
+            conn.executescript(
+                f"BEGIN IMMEDIATE;\n{sql}\n"
+                f"INSERT INTO schema_migrations (name) VALUES ('{name}');\nCOMMIT;"
+            )
+        except sqlite3.IntegrityError:
+            # Another process applied it between our check and our write
+            conn.rollback()
+            continue
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+        print(f"[SCHEMA] Applied {name}")
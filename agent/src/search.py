@@ -0,0 +1,129 @@
+"""Catalog search helpers: the catalog_fts full-text index and a trigram index for typos."""
+
+import re
+import sqlite3
+import threading
+import unicodedata
+
+from .schema import FEATURES
+
+# bm25 column weights for (track, artist, album, genre)
+TRACK_WEIGHTS = (10.0, 5.0, 3.0, 1.0)
+ALBUM_WEIGHTS = (0.0, 5.0, 10.0, 0.0)
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def fts_available() -> bool:
+    """Whether the FTS5 catalog index can be queried."""
+    return FEATURES["fts5"]
+
+
+def build_match_query(query: str, columns: tuple[str, ...] = ()) -> str | None:
+    """
+    Turn free text into an FTS5 MATCH expression.
+
+    Every word becomes a quoted prefix term so user input can never inject FTS
+    syntax, and all words must match. Returns None if the query has no words.
+    """
+    tokens = _TOKEN_RE.findall(query.lower())
+    if not tokens:
+        return None
+    terms = " ".join(f'"{token}"*' for token in tokens)
+    if columns:
+        return f"{{{' '.join(columns)}}} : ({terms})"
+    return terms
+
+
+# Minimum trigram similarity for a fuzzy match to be offered
+FUZZY_THRESHOLD = 0.3
+
+# Tie-break order when names are equally similar (e.g. the "Black Sabbath" artist and album)
+_KIND_PRIORITY = {"artist": 0, "album": 1, "track": 2}
+
+
+def _normalize(text: str) -> str:
+    """Lowercase, strip accents and punctuation."""
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return " ".join(_TOKEN_RE.findall(text))
+
+
+def trigrams(text: str) -> set[str]:
+    """pg_trgm-style trigrams: each word padded with two leading and one trailing space."""
+    grams = set()
+    for word in _normalize(text).split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class TrigramIndex:
+    """In-process trigram index over artist, album and track names."""
+
+    def __init__(self, entries: list[tuple[str, int, str]], version: int):
+        # entries are (kind, id, name) with kind in {"artist", "album", "track"}
+        self.entries = entries
+        self.version = version
+        self._sizes = []
+        self._postings: dict[str, list[int]] = {}
+        for idx, (_, _, name) in enumerate(entries):
+            grams = trigrams(name)
+            self._sizes.append(len(grams))
+            for gram in grams:
+                self._postings.setdefault(gram, []).append(idx)
+
+    @classmethod
+    def build(cls, conn: sqlite3.Connection) -> "TrigramIndex":
+        version = conn.execute("SELECT version FROM catalog_version WHERE id = 1").fetchone()[0]
+        cur = conn.execute("""
+            SELECT 'artist', ArtistId, Name FROM artists WHERE Name IS NOT NULL
+            UNION ALL
+            SELECT 'album', AlbumId, Title FROM albums
+            UNION ALL
+            SELECT 'track', TrackId, Name FROM tracks
+        """)
+        return cls([tuple(row) for row in cur.fetchall()], version)
+
+    def search(
+        self,
+        query: str,
+        kinds: tuple[str, ...] = ("artist", "album", "track"),
+        limit: int = 5,
+        threshold: float = FUZZY_THRESHOLD,
+    ) -> list[tuple[float, str, int, str]]:
+        """Return (similarity, kind, id, name) for the closest names, best first."""
+        grams = trigrams(query)
+        if not grams:
+            return []
+        shared: dict[int, int] = {}
+        for gram in grams:
+            for idx in self._postings.get(gram, ()):
+                shared[idx] = shared.get(idx, 0) + 1
+
+        results = []
+        for idx, count in shared.items():
+            kind, entry_id, name = self.entries[idx]
+            if kind not in kinds:
+                continue
+            # Jaccard similarity of the two trigram sets
+            score = count / (len(grams) + self._sizes[idx] - count)
+            if score >= threshold:
+                results.append((score, kind, entry_id, name))
+        results.sort(key=lambda r: (-r[0], _KIND_PRIORITY[r[1]], r[3]))
+        return results[:limit]
+
+
+_index: TrigramIndex | None = None
+_index_lock = threading.Lock()
+
+
+def get_trigram_index(conn: sqlite3.Connection) -> TrigramIndex:
+    """Get the shared trigram index, rebuilding it if the catalog has changed."""
+    global _index
+    version = conn.execute("SELECT version FROM catalog_version WHERE id = 1").fetchone()[0]
+    if _index is None or _index.version != version:
+        with _index_lock:
+            if _index is None or _index.version != version:
+                _index = TrigramIndex.build(conn)
+    return _index
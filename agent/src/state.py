@@ -2,6 +2,7 @@
 
 from typing import Literal, Optional
 from langgraph.graph import MessagesState
+from langgraph.prebuilt.chat_agent_executor import AgentState as ReactAgentState
 
 
 class AgentState(MessagesState):
@@ -15,6 +16,24 @@ class AgentState(MessagesState):
 
     # Routing
     next_agent: Optional[str]
+    parallel_agents: list[str]  # Agents running in parallel for a compound request
 
     # Turn tracking for latency control
     supervisor_turns: int  # Counts supervisor invocations, forces exit after MAX_TURNS
+
+    # Rolling summary of turns the history node removed from messages
+    summary: str
+
+
+class AgentIdentityState(ReactAgentState):
+    """State for the compiled react agents: messages plus who they are talking to.
+
+    The agents are compiled once per role, so the caller's identity is passed in
+    with each invocation and rendered into the system prompt.
+    """
+
+    user_role: Literal["employee", "customer"]
+    user_id: int
+    user_name: str
+    supported_customers: list[int]
+    summary: str
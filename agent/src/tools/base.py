@@ -0,0 +1,20 @@
+"""Tool construction shared by the tool modules."""
+
+import functools
+from langchain_core.tools import StructuredTool
+from ..db import run_in_db_executor
+
+
+def db_tool(func) -> StructuredTool:
+    """Like @tool, for a blocking database function, plus an async version of it.
+
+    Agents run tools with ainvoke, and ToolNode runs a step's tool calls
+    concurrently. The async version hands the call to the bounded DB executor,
+    so several calls in one step overlap and the event loop is never blocked.
+    """
+
+    @functools.wraps(func)  # Same signature, so config and tool call id are still injected
+    async def coroutine(*args, **kwargs):
+        return await run_in_db_executor(func, *args, **kwargs)
+
+    return StructuredTool.from_function(func=func, coroutine=coroutine)
@@ -1,83 +1,103 @@
 """Tools for customer queries. No auth checks - agent-level auth only."""
 
-from datetime import datetime
-from langchain_core.tools import tool
+import math
+from typing import Annotated
+from langchain_core.runnables import RunnableConfig
+from langchain_core.tools import InjectedToolCallId
 from langgraph.types import interrupt
 from ..db import get_db
-
-
-@tool
-def get_my_invoices(customer_id: int) -> str:
+from .. import orders
+from ..orders import IdempotencyKey, OrderError, create_invoice
+from .base import db_tool
+from .paging import (
+    DEFAULT_PAGE_SIZE,
+    clamp_limit,
+    format_invoice_listing,
+    invoice_page,
+    invoice_summary,
+    purchase_page,
+    purchase_summary,
+)
+from ..search import (
+    ALBUM_WEIGHTS,
+    TRACK_WEIGHTS,
+    build_match_query,
+    fts_available,
+    get_trigram_index,
+)
+
+
+@db_tool
+def get_my_invoices(customer_id: int, limit: int = DEFAULT_PAGE_SIZE, cursor: str | None = None) -> str:
     """
-    Get all invoices for a customer.
+    Get a customer's invoices, newest first, a page at a time.
+
+    The first page starts with the invoice count, total spent and date range.
 
     Args:
         customer_id: The customer's ID
+        limit: Invoices per page (default 10, max 50)
+        cursor: The cursor from the previous page's "More invoices" line, to get older invoices
 
     Returns:
-        Formatted list of invoices with ID, date, and total
+        Summary plus a page of invoices with ID, date, and total
     """
-    with get_db() as conn:
-        cur = conn.execute("""
-            SELECT InvoiceId, InvoiceDate, BillingCity, BillingCountry, Total
-            FROM invoices
-            WHERE CustomerId = ?
-            ORDER BY InvoiceDate DESC
-        """, (customer_id,))
-        rows = cur.fetchall()
+    limit = clamp_limit(limit)
+    try:
+        with get_db() as conn:
+            summary = None if cursor else invoice_summary(conn, customer_id)
+            rows, next_cursor = invoice_page(conn, customer_id, limit, cursor)
+    except ValueError:
+        return f"Invalid cursor {cursor!r}. Use the cursor exactly as given, or omit it to start over."
 
     if not rows:
-        return "You have no invoices."
-
-    lines = []
-    for r in rows:
-        lines.append(f"Invoice #{r['InvoiceId']} - {r['InvoiceDate']} - ${r['Total']:.2f} ({r['BillingCity']}, {r['BillingCountry']})")
+        return "No more invoices." if cursor else "You have no invoices."
 
-    return "\n".join(lines)
+    return "\n".join(format_invoice_listing(summary, rows, next_cursor))
 
 
-@tool
-def get_my_purchases(customer_id: int) -> str:
+@db_tool
+def get_my_purchases(customer_id: int, limit: int = DEFAULT_PAGE_SIZE, cursor: str | None = None) -> str:
     """
     Get track purchase history for a customer, showing what music they've bought.
 
+    The first page starts with a summary: tracks bought, top artists and top genres.
+    Then come the most recent purchases, newest first.
+
     Args:
         customer_id: The customer's ID
+        limit: Tracks per page (default 10, max 50)
+        cursor: The cursor from the previous page's "More purchases" line, to get older purchases
 
     Returns:
-        Formatted list of purchased tracks with artist and genre
+        Summary plus a page of purchased tracks with artist and genre
     """
-    with get_db() as conn:
-        cur = conn.execute("""
-            SELECT
-                t.Name as Track,
-                ar.Name as Artist,
-                al.Title as Album,
-                g.Name as Genre,
-                ii.UnitPrice as Price,
-                i.InvoiceDate as PurchaseDate
-            FROM invoice_items ii
-            JOIN invoices i ON ii.InvoiceId = i.InvoiceId
-            JOIN tracks t ON ii.TrackId = t.TrackId
-            JOIN albums al ON t.AlbumId = al.AlbumId
-            JOIN artists ar ON al.ArtistId = ar.ArtistId
-            LEFT JOIN genres g ON t.GenreId = g.GenreId
-            WHERE i.CustomerId = ?
-            ORDER BY i.InvoiceDate DESC
-        """, (customer_id,))
-        rows = cur.fetchall()
+    limit = clamp_limit(limit)
+    try:
+        with get_db() as conn:
+            summary = None if cursor else purchase_summary(conn, customer_id)
+            rows, next_cursor = purchase_page(conn, customer_id, limit, cursor)
+    except ValueError:
+        return f"Invalid cursor {cursor!r}. Use the cursor exactly as given, or omit it to start over."
 
     if not rows:
-        return "You haven't purchased any tracks yet."
+        return "No more purchases." if cursor else "You haven't purchased any tracks yet."
 
     lines = []
+    if summary:
+        lines.append(f"Your purchased tracks ({summary['tracks']} total)")
+        lines.append("Top artists: " + ", ".join(f"{r['Name']} ({r['Tracks']})" for r in summary["artists"]))
+        lines.append("Top genres: " + ", ".join(f"{r['Name']} ({r['Tracks']})" for r in summary["genres"]))
+        lines.append(f"Most recent {len(rows)}:")
     for r in rows:
-        lines.append(f"• \"{r['Track']}\" by {r['Artist']} ({r['Genre']}) - ${r['Price']:.2f}")
+        lines.append(f"• \"{r['Track']}\" by {r['Artist']} ({r['Genre']}) - ${r['Price']:.2f} - {r['PurchaseDate'][:10]}")
+    if next_cursor:
+        lines.append(f'More purchases: call again with cursor="{next_cursor}"')
 
-    return f"Your purchased tracks ({len(rows)} total):\n" + "\n".join(lines)
+    return "\n".join(lines)
 
 
-@tool
+@db_tool
 def get_invoice_details(customer_id: int, invoice_id: int) -> str:
     """
     Get detailed line items for a specific invoice.
@@ -130,7 +150,7 @@ def get_invoice_details(customer_id: int, invoice_id: int) -> str:
     return "\n".join(lines)
 
 
-@tool
+@db_tool
 def search_tracks(query: str) -> str:
     """
     Search for tracks by name, artist, or album.
@@ -141,25 +161,73 @@ def search_tracks(query: str) -> str:
     Returns:
         List of matching tracks with TrackId, name, artist, album, and price
     """
+    match = build_match_query(query)
     with get_db() as conn:
-        search_term = f"%{query}%"
-        cur = conn.execute("""
-            SELECT t.TrackId, t.Name as Track, ar.Name as Artist,
-                   al.Title as Album, g.Name as Genre, t.UnitPrice
-            FROM tracks t
-            JOIN albums al ON t.AlbumId = al.AlbumId
-            JOIN artists ar ON al.ArtistId = ar.ArtistId
-            LEFT JOIN genres g ON t.GenreId = g.GenreId
-            WHERE t.Name LIKE ? OR ar.Name LIKE ? OR al.Title LIKE ?
-            ORDER BY ar.Name, al.Title, t.Name
-            LIMIT 20
-        """, (search_term, search_term, search_term))
+        if match and fts_available():
+            # Full-text index, best BM25 match first
+            cur = conn.execute(f"""
+                SELECT t.TrackId, t.Name as Track, ar.Name as Artist,
+                       al.Title as Album, g.Name as Genre, t.UnitPrice
+                FROM catalog_fts
+                JOIN tracks t ON t.TrackId = catalog_fts.rowid
+                JOIN albums al ON t.AlbumId = al.AlbumId
+                JOIN artists ar ON al.ArtistId = ar.ArtistId
+                LEFT JOIN genres g ON t.GenreId = g.GenreId
+                WHERE catalog_fts MATCH ?
+                ORDER BY bm25(catalog_fts, {", ".join(map(str, TRACK_WEIGHTS))}), ar.Name, al.Title, t.Name
+                LIMIT 20
+            """, (match,))
+        else:
+            search_term = f"%{query}%"
+            cur = conn.execute("""
+                SELECT t.TrackId, t.Name as Track, ar.Name as Artist,
+                       al.Title as Album, g.Name as Genre, t.UnitPrice
+                FROM tracks t
+                JOIN albums al ON t.AlbumId = al.AlbumId
+                JOIN artists ar ON al.ArtistId = ar.ArtistId
+                LEFT JOIN genres g ON t.GenreId = g.GenreId
+                WHERE t.Name LIKE ? OR ar.Name LIKE ? OR al.Title LIKE ?
+                ORDER BY ar.Name, al.Title, t.Name
+                LIMIT 20
+            """, (search_term, search_term, search_term))
         rows = cur.fetchall()
 
+        # No exact hits - likely a misspelling, so resolve the closest name in one go
+        # rather than making the LLM retry with other spellings
+        correction = None
+        if not rows:
+            matches = get_trigram_index(conn).search(query)
+            if matches:
+                _, kind, entry_id, name = matches[0]
+                if kind == "artist":
+                    where, params = "al.ArtistId = ?", (entry_id,)
+                elif kind == "album":
+                    where, params = "t.AlbumId = ?", (entry_id,)
+                else:
+                    track_ids = [m[2] for m in matches if m[1] == "track"]
+                    where = f"t.TrackId IN ({','.join('?' * len(track_ids))})"
+                    params = tuple(track_ids)
+                cur = conn.execute(f"""
+                    SELECT t.TrackId, t.Name as Track, ar.Name as Artist,
+                           al.Title as Album, g.Name as Genre, t.UnitPrice
+                    FROM tracks t
+                    JOIN albums al ON t.AlbumId = al.AlbumId
+                    JOIN artists ar ON al.ArtistId = ar.ArtistId
+                    LEFT JOIN genres g ON t.GenreId = g.GenreId
+                    WHERE {where}
+                    ORDER BY al.Title, t.TrackId
+                    LIMIT 20
+                """, params)
+                rows = cur.fetchall()
+                correction = f"{kind} \"{name}\""
+
     if not rows:
         return f"No tracks found matching '{query}'."
 
-    lines = [f"Found {len(rows)} tracks matching '{query}':\n"]
+    if correction:
+        lines = [f"No exact matches for '{query}'. Showing {len(rows)} tracks for the closest match, {correction}:\n"]
+    else:
+        lines = [f"Found {len(rows)} tracks matching '{query}':\n"]
     for r in rows:
         lines.append(
             f"• TrackId {r['TrackId']}: \"{r['Track']}\" by {r['Artist']} "
@@ -169,8 +237,41 @@ def search_tracks(query: str) -> str:
     return "\n".join(lines)
 
 
-@tool
-def purchase_track(customer_id: int, track_id: int) -> str:
+def _purchase_key(config: RunnableConfig, tool_call_id: str, action: str) -> IdempotencyKey | None:
+    """Key a confirmed purchase by the thread and the tool call that raised its interrupt.
+
+    Both stay the same when the resume is retried, so the write happens once.
+    """
+    thread_id = config.get("configurable", {}).get("thread_id")
+    if not thread_id or not tool_call_id:
+        return None
+    return (str(thread_id), tool_call_id, action)
+
+
+def _confirmed_price(confirmation: dict) -> float | None:
+    """The price the customer agreed to, echoed back in the resume value.
+
+    A tool re-runs from the top when it resumes, so the price read before
+    interrupt() is read again after the confirmation; only the echoed value
+    is what the customer actually saw.
+    """
+    try:
+        price = float(confirmation.get("price"))
+    except (TypeError, ValueError):
+        return None  # Missing or not a number
+    return price if math.isfinite(price) else None
+
+
+NO_CONFIRMED_PRICE = "The confirmation didn't include the price you agreed to. No charge made."
+
+
+@db_tool
+def purchase_track(
+    customer_id: int,
+    track_id: int,
+    config: RunnableConfig,
+    tool_call_id: Annotated[str, InjectedToolCallId],
+) -> str:
     """
     Purchase a track. REQUIRES CUSTOMER CONFIRMATION before charging.
 
@@ -182,6 +283,7 @@ def purchase_track(customer_id: int, track_id: int) -> str:
         Confirmation of purchase or error message
     """
     print(f"[PURCHASE_TRACK] Called with customer_id={customer_id}, track_id={track_id}")
+    # Only what the confirmation shows; billing details are read when the invoice is written
     with get_db() as conn:
         # Get track info
         cur = conn.execute("""
@@ -194,18 +296,8 @@ def purchase_track(customer_id: int, track_id: int) -> str:
         """, (track_id,))
         track = cur.fetchone()
 
-        if not track:
-            return f"Track ID {track_id} not found."
-
-        # Get customer billing info
-        cur = conn.execute("""
-            SELECT FirstName, LastName, Address, City, State, Country, PostalCode
-            FROM customers WHERE CustomerId = ?
-        """, (customer_id,))
-        customer = cur.fetchone()
-
-        if not customer:
-            return f"Customer ID {customer_id} not found."
+    if not track:
+        return f"Track ID {track_id} not found."
 
     # Request purchase confirmation BEFORE charging
     print(f"[PURCHASE_TRACK] About to call interrupt() for track: {track['Track']}")
@@ -223,45 +315,29 @@ def purchase_track(customer_id: int, track_id: int) -> str:
 
     if not confirmation or not confirmation.get("confirmed", False):
         return f"Purchase of \"{track['Track']}\" was cancelled. No charge made."
-
-    # Confirmed - create invoice and invoice_item
-    with get_db() as conn:
-        # Create invoice
-        cur = conn.execute("""
-            INSERT INTO invoices (CustomerId, InvoiceDate, BillingAddress,
-                                  BillingCity, BillingState, BillingCountry,
-                                  BillingPostalCode, Total)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            customer_id,
-            datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            customer['Address'],
-            customer['City'],
-            customer['State'],
-            customer['Country'],
-            customer['PostalCode'],
-            track['UnitPrice']
-        ))
-        invoice_id = cur.lastrowid
-
-        # Create invoice item
-        conn.execute("""
-            INSERT INTO invoice_items (InvoiceId, TrackId, UnitPrice, Quantity)
-            VALUES (?, ?, ?, 1)
-        """, (invoice_id, track_id, track['UnitPrice']))
-
-        conn.commit()
+    confirmed_price = _confirmed_price(confirmation)
+    if confirmed_price is None:
+        return NO_CONFIRMED_PRICE
+
+    # Confirmed - create invoice and invoice_item at the confirmed price
+    try:
+        invoice = create_invoice(
+            customer_id, [track_id], expected_total=confirmed_price,
+            key=_purchase_key(config, tool_call_id, "purchase_track"),
+        )
+    except OrderError as e:
+        return f"{e} No charge made."
 
     return (
-        f"Purchase complete! Invoice #{invoice_id}\n"
+        f"Purchase complete! Invoice #{invoice.invoice_id}\n"
         f"Track: \"{track['Track']}\" by {track['Artist']}\n"
         f"Album: {track['Album']}\n"
-        f"Total: ${track['UnitPrice']:.2f}\n"
+        f"Total: ${invoice.total:.2f}\n"
         f"Thank you for your purchase!"
     )
 
 
-@tool
+@db_tool
 def search_albums(query: str) -> str:
     """
     Search for albums by title or artist name.
@@ -272,26 +348,79 @@ def search_albums(query: str) -> str:
     Returns:
         List of matching albums with AlbumId, title, artist, track count, and total price
     """
+    match = build_match_query(query, columns=("artist", "album"))
     with get_db() as conn:
-        search_term = f"%{query}%"
-        cur = conn.execute("""
-            SELECT al.AlbumId, al.Title as Album, ar.Name as Artist,
-                   COUNT(t.TrackId) as TrackCount,
-                   SUM(t.UnitPrice) as TotalPrice
-            FROM albums al
-            JOIN artists ar ON al.ArtistId = ar.ArtistId
-            JOIN tracks t ON t.AlbumId = al.AlbumId
-            WHERE al.Title LIKE ? OR ar.Name LIKE ?
-            GROUP BY al.AlbumId
-            ORDER BY ar.Name, al.Title
-            LIMIT 15
-        """, (search_term, search_term))
+        if match and fts_available():
+            # Rank albums by their best-matching track row in the full-text index
+            cur = conn.execute(f"""
+                WITH hits AS MATERIALIZED (
+                    SELECT rowid as TrackId,
+                           bm25(catalog_fts, {", ".join(map(str, ALBUM_WEIGHTS))}) as Score
+                    FROM catalog_fts
+                    WHERE catalog_fts MATCH ?
+                ),
+                matched AS (
+                    SELECT t.AlbumId, MIN(hits.Score) as Score
+                    FROM hits
+                    JOIN tracks t ON t.TrackId = hits.TrackId
+                    GROUP BY t.AlbumId
+                )
+                SELECT al.AlbumId, al.Title as Album, ar.Name as Artist,
+                       COUNT(t.TrackId) as TrackCount,
+                       SUM(t.UnitPrice) as TotalPrice
+                FROM matched m
+                JOIN albums al ON al.AlbumId = m.AlbumId
+                JOIN artists ar ON al.ArtistId = ar.ArtistId
+                JOIN tracks t ON t.AlbumId = al.AlbumId
+                GROUP BY al.AlbumId
+                ORDER BY MIN(m.Score), ar.Name, al.Title
+                LIMIT 15
+            """, (match,))
+        else:
+            search_term = f"%{query}%"
+            cur = conn.execute("""
+                SELECT al.AlbumId, al.Title as Album, ar.Name as Artist,
+                       COUNT(t.TrackId) as TrackCount,
+                       SUM(t.UnitPrice) as TotalPrice
+                FROM albums al
+                JOIN artists ar ON al.ArtistId = ar.ArtistId
+                JOIN tracks t ON t.AlbumId = al.AlbumId
+                WHERE al.Title LIKE ? OR ar.Name LIKE ?
+                GROUP BY al.AlbumId
+                ORDER BY ar.Name, al.Title
+                LIMIT 15
+            """, (search_term, search_term))
         rows = cur.fetchall()
 
+        # Fall back to the closest artist or album name for misspellings
+        correction = None
+        if not rows:
+            matches = get_trigram_index(conn).search(query, kinds=("artist", "album"))
+            if matches:
+                _, kind, entry_id, name = matches[0]
+                where = "al.ArtistId = ?" if kind == "artist" else "al.AlbumId = ?"
+                cur = conn.execute(f"""
+                    SELECT al.AlbumId, al.Title as Album, ar.Name as Artist,
+                           COUNT(t.TrackId) as TrackCount,
+                           SUM(t.UnitPrice) as TotalPrice
+                    FROM albums al
+                    JOIN artists ar ON al.ArtistId = ar.ArtistId
+                    JOIN tracks t ON t.AlbumId = al.AlbumId
+                    WHERE {where}
+                    GROUP BY al.AlbumId
+                    ORDER BY al.Title
+                    LIMIT 15
+                """, (entry_id,))
+                rows = cur.fetchall()
+                correction = f"{kind} \"{name}\""
+
     if not rows:
         return f"No albums found matching '{query}'."
 
-    lines = [f"Found {len(rows)} albums matching '{query}':\n"]
+    if correction:
+        lines = [f"No exact matches for '{query}'. Showing {len(rows)} albums for the closest match, {correction}:\n"]
+    else:
+        lines = [f"Found {len(rows)} albums matching '{query}':\n"]
     for r in rows:
         lines.append(
             f"• AlbumId {r['AlbumId']}: \"{r['Album']}\" by {r['Artist']} "
@@ -301,8 +430,13 @@ def search_albums(query: str) -> str:
     return "\n".join(lines)
 
 
-@tool
-def purchase_album(customer_id: int, album_id: int) -> str:
+@db_tool
+def purchase_album(
+    customer_id: int,
+    album_id: int,
+    config: RunnableConfig,
+    tool_call_id: Annotated[str, InjectedToolCallId],
+) -> str:
     """
     Purchase all tracks from an album. REQUIRES CUSTOMER CONFIRMATION before charging.
 
@@ -313,41 +447,28 @@ def purchase_album(customer_id: int, album_id: int) -> str:
     Returns:
         Confirmation of purchase or error message
     """
+    # Only what the confirmation shows; billing details are read when the invoice is written
     with get_db() as conn:
-        # Get album info with all tracks
+        # Get album info with all tracks in one read
         cur = conn.execute("""
-            SELECT al.AlbumId, al.Title as Album, ar.Name as Artist
+            SELECT al.Title as Album, ar.Name as Artist, t.TrackId, t.UnitPrice
             FROM albums al
             JOIN artists ar ON al.ArtistId = ar.ArtistId
+            LEFT JOIN tracks t ON t.AlbumId = al.AlbumId
             WHERE al.AlbumId = ?
+            ORDER BY t.TrackId
         """, (album_id,))
-        album = cur.fetchone()
-
-        if not album:
-            return f"Album ID {album_id} not found."
-
-        # Get all tracks in the album
-        cur = conn.execute("""
-            SELECT TrackId, Name, UnitPrice
-            FROM tracks WHERE AlbumId = ?
-            ORDER BY TrackId
-        """, (album_id,))
-        tracks = cur.fetchall()
-
-        if not tracks:
-            return f"Album \"{album['Album']}\" has no tracks."
+        rows = cur.fetchall()
 
-        total_price = sum(t['UnitPrice'] for t in tracks)
+    if not rows:
+        return f"Album ID {album_id} not found."
 
-        # Get customer billing info
-        cur = conn.execute("""
-            SELECT FirstName, LastName, Address, City, State, Country, PostalCode
-            FROM customers WHERE CustomerId = ?
-        """, (customer_id,))
-        customer = cur.fetchone()
+    album = rows[0]
+    tracks = [r for r in rows if r['TrackId'] is not None]
+    if not tracks:
+        return f"Album \"{album['Album']}\" has no tracks."
 
-        if not customer:
-            return f"Customer ID {customer_id} not found."
+    total_price = sum(t['UnitPrice'] for t in tracks)
 
     # Request purchase confirmation BEFORE charging
     confirmation = interrupt({
@@ -363,45 +484,159 @@ def purchase_album(customer_id: int, album_id: int) -> str:
 
     if not confirmation or not confirmation.get("confirmed", False):
         return f"Purchase of \"{album['Album']}\" was cancelled. No charge made."
-
-    # Confirmed - create invoice and invoice_items for all tracks
-    with get_db() as conn:
-        # Create invoice
-        cur = conn.execute("""
-            INSERT INTO invoices (CustomerId, InvoiceDate, BillingAddress,
-                                  BillingCity, BillingState, BillingCountry,
-                                  BillingPostalCode, Total)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            customer_id,
-            datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            customer['Address'],
-            customer['City'],
-            customer['State'],
-            customer['Country'],
-            customer['PostalCode'],
-            total_price
-        ))
-        invoice_id = cur.lastrowid
-
-        # Create invoice items for each track
-        for track in tracks:
-            conn.execute("""
-                INSERT INTO invoice_items (InvoiceId, TrackId, UnitPrice, Quantity)
-                VALUES (?, ?, ?, 1)
-            """, (invoice_id, track['TrackId'], track['UnitPrice']))
-
-        conn.commit()
+    confirmed_price = _confirmed_price(confirmation)
+    if confirmed_price is None:
+        return NO_CONFIRMED_PRICE
+
+    # Confirmed - one invoice with a line per track, at the confirmed prices
+    try:
+        invoice = create_invoice(
+            customer_id, [t['TrackId'] for t in tracks], expected_total=confirmed_price,
+            key=_purchase_key(config, tool_call_id, "purchase_album"),
+        )
+    except OrderError as e:
+        return f"{e} No charge made."
 
     return (
-        f"Purchase complete! Invoice #{invoice_id}\n"
+        f"Purchase complete! Invoice #{invoice.invoice_id}\n"
         f"Album: \"{album['Album']}\" by {album['Artist']}\n"
-        f"Tracks: {len(tracks)}\n"
-        f"Total: ${total_price:.2f}\n"
+        f"Tracks: {invoice.track_count}\n"
+        f"Total: ${invoice.total:.2f}\n"
         f"Thank you for your purchase!"
     )
 
 
+def _format_cart(rows) -> str:
+    total = sum(r['UnitPrice'] for r in rows)
+    lines = [f"Your cart ({len(rows)} tracks, ${total:.2f}):"]
+    for r in rows:
+        lines.append(f"  • [TrackId: {r['TrackId']}] \"{r['Track']}\" by {r['Artist']} - ${r['UnitPrice']:.2f}")
+    return "\n".join(lines)
+
+
+@db_tool
+def add_to_cart(customer_id: int, track_ids: list[int]) -> str:
+    """
+    Add one or more tracks to the customer's cart. No charge is made until checkout.
+
+    Args:
+        customer_id: The customer's ID
+        track_ids: TrackIds to add, all at once
+
+    Returns:
+        What was added, plus the updated cart
+    """
+    added, already, missing = orders.add_to_cart(customer_id, track_ids)
+    notes = []
+    if added:
+        notes.append(f"Added {len(added)} track(s) to your cart.")
+    if already:
+        notes.append(f"Already in your cart: {', '.join(map(str, already))}.")
+    if missing:
+        notes.append(f"Not found: {', '.join(map(str, missing))}.")
+    return "\n".join(notes + [_format_cart(orders.get_cart(customer_id))])
+
+
+@db_tool
+def remove_from_cart(customer_id: int, track_ids: list[int] | None = None) -> str:
+    """
+    Remove tracks from the customer's cart, or empty it.
+
+    Args:
+        customer_id: The customer's ID
+        track_ids: TrackIds to remove; omit to empty the whole cart
+
+    Returns:
+        How many tracks were removed, plus the updated cart
+    """
+    removed = orders.remove_from_cart(customer_id, track_ids)
+    rows = orders.get_cart(customer_id)
+    cart = _format_cart(rows) if rows else "Your cart is now empty."
+    return f"Removed {removed} track(s).\n{cart}"
+
+
+@db_tool
+def view_cart(customer_id: int) -> str:
+    """
+    Show the tracks in the customer's cart and the total.
+
+    Args:
+        customer_id: The customer's ID
+
+    Returns:
+        Cart contents with TrackIds and prices
+    """
+    rows = orders.get_cart(customer_id)
+    return _format_cart(rows) if rows else "Your cart is empty."
+
+
+def _purchase_complete(invoice: orders.Invoice) -> str:
+    return (
+        f"Purchase complete! Invoice #{invoice.invoice_id}\n"
+        f"Tracks: {invoice.track_count}\n"
+        f"Total: ${invoice.total:.2f}\n"
+        f"Thank you for your purchase!"
+    )
+
+
+@db_tool
+def checkout(
+    customer_id: int,
+    config: RunnableConfig,
+    tool_call_id: Annotated[str, InjectedToolCallId],
+) -> str:
+    """
+    Buy everything in the cart as one invoice. REQUIRES CUSTOMER CONFIRMATION before charging.
+
+    Args:
+        customer_id: The customer's ID
+
+    Returns:
+        Confirmation of purchase or error message
+    """
+    key = _purchase_key(config, tool_call_id, "checkout")
+    rows = orders.get_cart(customer_id)
+    if not rows:
+        # A retried resume re-runs this read after the first run emptied the cart
+        try:
+            invoice = orders.find_invoice(key)
+        except OrderError as e:
+            return str(e)
+        if invoice is None:
+            return "Your cart is empty."
+        return _purchase_complete(invoice)
+
+    track_ids = [r['TrackId'] for r in rows]
+    total_price = sum(r['UnitPrice'] for r in rows)
+    listing = "\n".join(f"• \"{r['Track']}\" by {r['Artist']} - ${r['UnitPrice']:.2f}" for r in rows)
+
+    # One confirmation for the whole cart
+    confirmation = interrupt({
+        "type": "purchase_confirmation",
+        "action": "checkout",
+        "track_ids": track_ids,
+        "track_count": len(rows),
+        "price": float(total_price),
+        "message": f"Confirm purchase of {len(rows)} tracks for ${total_price:.2f}?\n\n{listing}"
+    })
+
+    if not confirmation or not confirmation.get("confirmed", False):
+        return "Checkout was cancelled. Your cart is unchanged and no charge was made."
+    # The cart was read again on resume; bill only what the customer was shown
+    confirmed_price = _confirmed_price(confirmation)
+    confirmed_tracks = confirmation.get("track_ids")
+    if confirmed_price is None or not confirmed_tracks:
+        return "The confirmation didn't include the tracks and price you agreed to. No charge made."
+
+    # Confirmed - one invoice for the cart, and the cart emptied, in one transaction
+    try:
+        invoice = orders.checkout_cart(customer_id, confirmed_tracks, expected_total=confirmed_price, key=key)
+    except OrderError as e:
+        return f"{e} No charge made."
+
+    return _purchase_complete(invoice)
+
+
 # Export list of customer tools
 CUSTOMER_TOOLS = [
     get_my_invoices,
@@ -411,4 +646,8 @@ CUSTOMER_TOOLS = [
     search_albums,
     purchase_track,
     purchase_album,
+    add_to_cart,
+    remove_from_cart,
+    view_cart,
+    checkout,
 ]
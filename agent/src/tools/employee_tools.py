@@ -1,11 +1,13 @@
 """Tools for employee queries. No auth checks - agent-level auth only."""
 
-from langchain_core.tools import tool
 from langgraph.types import interrupt
+from .. import orders
 from ..db import get_db
+from .base import db_tool
+from .paging import DEFAULT_PAGE_SIZE, clamp_limit, format_invoice_listing, invoice_page, invoice_summary
 
 
-@tool
+@db_tool
 def get_employee_info(employee_id: int) -> str:
     """
     Get the employee's own information.
@@ -41,7 +43,7 @@ Location: {row['Address']}, {row['City']}, {row['State']}, {row['Country']}
 Reports To: {row['ManagerName'] or 'N/A'}"""
 
 
-@tool
+@db_tool
 def get_supported_customers(employee_id: int) -> str:
     """
     Get list of customers this employee supports.
@@ -80,50 +82,50 @@ def get_supported_customers(employee_id: int) -> str:
     return "\n".join(lines)
 
 
-@tool
-def get_customer_invoices(customer_id: int) -> str:
+@db_tool
+def get_customer_invoices(customer_id: int, limit: int = DEFAULT_PAGE_SIZE, cursor: str | None = None) -> str:
     """
-    Get all invoices for a customer you support.
+    Get invoices for a customer you support, newest first, a page at a time.
+
+    The first page starts with the invoice count, total spent and date range.
 
     Args:
         customer_id: The customer's ID
+        limit: Invoices per page (default 10, max 50)
+        cursor: The cursor from the previous page's "More invoices" line, to get older invoices
 
     Returns:
-        List of invoices for the customer
+        Summary plus a page of invoices for the customer
     """
-    with get_db() as conn:
-        # Get customer info
-        cur = conn.execute("""
-            SELECT FirstName, LastName FROM customers WHERE CustomerId = ?
-        """, (customer_id,))
-        customer = cur.fetchone()
-
-        if not customer:
-            return f"Customer {customer_id} not found."
-
-        # Get invoices
-        cur = conn.execute("""
-            SELECT InvoiceId, InvoiceDate, BillingCity, BillingCountry, Total
-            FROM invoices
-            WHERE CustomerId = ?
-            ORDER BY InvoiceDate DESC
-        """, (customer_id,))
-        rows = cur.fetchall()
+    limit = clamp_limit(limit)
+    try:
+        with get_db() as conn:
+            # Get customer info
+            cur = conn.execute("""
+                SELECT FirstName, LastName FROM customers WHERE CustomerId = ?
+            """, (customer_id,))
+            customer = cur.fetchone()
+
+            if not customer:
+                return f"Customer {customer_id} not found."
+
+            summary = None if cursor else invoice_summary(conn, customer_id)
+            rows, next_cursor = invoice_page(conn, customer_id, limit, cursor)
+    except ValueError:
+        return f"Invalid cursor {cursor!r}. Use the cursor exactly as given, or omit it to start over."
 
     if not rows:
+        if cursor:
+            return f"No more invoices for {customer['FirstName']} {customer['LastName']}."
         return f"{customer['FirstName']} {customer['LastName']} has no invoices."
 
     lines = [f"Invoices for {customer['FirstName']} {customer['LastName']} (ID: {customer_id}):\n"]
-    for r in rows:
-        lines.append(
-            f"  Invoice #{r['InvoiceId']} - {r['InvoiceDate']} - "
-            f"${r['Total']:.2f} ({r['BillingCity']}, {r['BillingCountry']})"
-        )
+    lines += format_invoice_listing(summary, rows, next_cursor, indent="  ")
 
     return "\n".join(lines)
 
 
-@tool
+@db_tool
 def edit_invoice(invoice_id: int, new_total: float) -> str:
     """
     Edit an invoice's total amount. REQUIRES MANAGER APPROVAL.
@@ -166,17 +168,12 @@ def edit_invoice(invoice_id: int, new_total: float) -> str:
         return f"Edit of Invoice #{invoice_id} was not approved. No changes made."
 
     # Approved - now perform the update
-    with get_db() as conn:
-        conn.execute(
-            "UPDATE invoices SET Total = ? WHERE InvoiceId = ?",
-            (new_total, invoice_id)
-        )
-        conn.commit()
+    orders.update_invoice_total(invoice_id, new_total)
 
     return f"Invoice #{invoice_id} for {customer_name} updated: ${old_total:.2f} -> ${new_total:.2f}"
 
 
-@tool
+@db_tool
 def delete_invoice(invoice_id: int) -> str:
     """
     Delete an invoice. REQUIRES MANAGER APPROVAL.
@@ -219,12 +216,7 @@ def delete_invoice(invoice_id: int) -> str:
         return f"Deletion of Invoice #{invoice_id} was not approved. No changes made."
 
     # Approved - now perform the deletion
-    with get_db() as conn:
-        # Delete line items first (foreign key constraint)
-        conn.execute("DELETE FROM invoice_items WHERE InvoiceId = ?", (invoice_id,))
-        # Delete invoice
-        conn.execute("DELETE FROM invoices WHERE InvoiceId = ?", (invoice_id,))
-        conn.commit()
+    orders.delete_invoice(invoice_id)
 
     return f"Invoice #{invoice_id} for {customer_name} (${total:.2f}, {invoice_date}) has been deleted."
 
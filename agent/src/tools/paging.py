@@ -0,0 +1,149 @@
+"""Compact, paged listings of a customer's invoices and purchases.
+
+Listings are newest first and paged with keyset cursors on (InvoiceDate,
+InvoiceId), plus InvoiceLineId for purchased tracks, so a page reads only its
+own rows from idx_invoices_customer_date no matter how deep it is. Cursors are
+plain strings like "2025-03-01 14:02:11|412" that the model passes back as is.
+"""
+
+import sqlite3
+
+# Rows per page when the model doesn't ask for a limit, and the most it may ask for
+DEFAULT_PAGE_SIZE = 10
+MAX_PAGE_SIZE = 50
+
+# Entries in the "top artists" / "top genres" summary lines
+TOP_N = 5
+
+# Cursor position before the newest invoice. InvoiceDate has NUMERIC affinity, so
+# this must stay a non-numeric string to compare as text against the dates.
+_START = "9999-12-31 23:59:59"
+
+
+def clamp_limit(limit: int | None) -> int:
+    return max(1, min(limit or DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE))
+
+
+def parse_cursor(cursor: str | None, parts: int) -> tuple | None:
+    """Split a cursor into (date, id, ...). Raises ValueError if it is malformed."""
+    if not cursor:
+        return None
+    date, *ids = cursor.strip().split("|")
+    if len(ids) != parts - 1:
+        raise ValueError(cursor)
+    return (date, *(int(i) for i in ids))
+
+
+def make_cursor(*values) -> str:
+    return "|".join(str(v) for v in values)
+
+
+def invoice_summary(conn: sqlite3.Connection, customer_id: int) -> sqlite3.Row:
+    """Invoice count, total spent and date range for a customer."""
+    return conn.execute("""
+        SELECT COUNT(*) AS Invoices, COALESCE(SUM(Total), 0) AS Spent,
+               MIN(InvoiceDate) AS First, MAX(InvoiceDate) AS Last
+        FROM invoices
+        WHERE CustomerId = ?
+    """, (customer_id,)).fetchone()
+
+
+def invoice_page(
+    conn: sqlite3.Connection, customer_id: int, limit: int, cursor: str | None
+) -> tuple[list[sqlite3.Row], str | None]:
+    """One page of invoices, newest first, and the cursor for the next page (or None)."""
+    after = parse_cursor(cursor, 2) or (_START, 0)
+    rows = conn.execute("""
+        SELECT InvoiceId, InvoiceDate, BillingCity, BillingCountry, Total
+        FROM invoices
+        WHERE CustomerId = ? AND (InvoiceDate, InvoiceId) < (?, ?)
+        ORDER BY InvoiceDate DESC, InvoiceId DESC
+        LIMIT ?
+    """, (customer_id, *after, limit + 1)).fetchall()
+    if len(rows) <= limit:
+        return rows, None
+    last = rows[limit - 1]
+    return rows[:limit], make_cursor(last["InvoiceDate"], last["InvoiceId"])
+
+
+def format_invoice_listing(
+    summary: sqlite3.Row | None, rows: list[sqlite3.Row], next_cursor: str | None, indent: str = ""
+) -> list[str]:
+    """Summary line (first page only), one line per invoice, and how to get more."""
+    lines = []
+    if summary is not None:
+        lines.append(
+            f"{summary['Invoices']} invoices totalling ${summary['Spent']:.2f} "
+            f"({summary['First'][:10]} to {summary['Last'][:10]}). Most recent {len(rows)}:"
+        )
+    for r in rows:
+        lines.append(
+            f"{indent}Invoice #{r['InvoiceId']} - {r['InvoiceDate']} - "
+            f"${r['Total']:.2f} ({r['BillingCity']}, {r['BillingCountry']})"
+        )
+    if next_cursor:
+        lines.append(f'More invoices: call again with cursor="{next_cursor}"')
+    return lines
+
+
+def purchase_summary(conn: sqlite3.Connection, customer_id: int) -> dict:
+    """Track count plus the customer's most-bought artists and genres."""
+    tracks = conn.execute("""
+        SELECT COUNT(*) FROM invoice_items ii
+        JOIN invoices i ON ii.InvoiceId = i.InvoiceId
+        WHERE i.CustomerId = ?
+    """, (customer_id,)).fetchone()[0]
+    artists = conn.execute("""
+        SELECT ar.Name, COUNT(*) AS Tracks
+        FROM invoice_items ii
+        JOIN invoices i ON ii.InvoiceId = i.InvoiceId
+        JOIN tracks t ON ii.TrackId = t.TrackId
+        JOIN albums al ON t.AlbumId = al.AlbumId
+        JOIN artists ar ON al.ArtistId = ar.ArtistId
+        WHERE i.CustomerId = ?
+        GROUP BY ar.ArtistId
+        ORDER BY Tracks DESC, ar.Name
+        LIMIT ?
+    """, (customer_id, TOP_N)).fetchall()
+    genres = conn.execute("""
+        SELECT g.Name, COUNT(*) AS Tracks
+        FROM invoice_items ii
+        JOIN invoices i ON ii.InvoiceId = i.InvoiceId
+        JOIN tracks t ON ii.TrackId = t.TrackId
+        JOIN genres g ON t.GenreId = g.GenreId
+        WHERE i.CustomerId = ?
+        GROUP BY g.GenreId
+        ORDER BY Tracks DESC, g.Name
+        LIMIT ?
+    """, (customer_id, TOP_N)).fetchall()
+    return {"tracks": tracks, "artists": artists, "genres": genres}
+
+
+def purchase_page(
+    conn: sqlite3.Connection, customer_id: int, limit: int, cursor: str | None
+) -> tuple[list[sqlite3.Row], str | None]:
+    """One page of purchased tracks, newest first, and the cursor for the next page (or None)."""
+    after = parse_cursor(cursor, 3) or (_START, 0, 0)
+    rows = conn.execute("""
+        SELECT
+            t.Name as Track,
+            ar.Name as Artist,
+            g.Name as Genre,
+            ii.UnitPrice as Price,
+            i.InvoiceDate as PurchaseDate,
+            i.InvoiceId,
+            ii.InvoiceLineId
+        FROM invoices i
+        JOIN invoice_items ii ON ii.InvoiceId = i.InvoiceId
+        JOIN tracks t ON ii.TrackId = t.TrackId
+        JOIN albums al ON t.AlbumId = al.AlbumId
+        JOIN artists ar ON al.ArtistId = ar.ArtistId
+        LEFT JOIN genres g ON t.GenreId = g.GenreId
+        WHERE i.CustomerId = ? AND (i.InvoiceDate, i.InvoiceId, ii.InvoiceLineId) < (?, ?, ?)
+        ORDER BY i.InvoiceDate DESC, i.InvoiceId DESC, ii.InvoiceLineId DESC
+        LIMIT ?
+    """, (customer_id, *after, limit + 1)).fetchall()
+    if len(rows) <= limit:
+        return rows, None
+    last = rows[limit - 1]
+    return rows[:limit], make_cursor(last["PurchaseDate"], last["InvoiceId"], last["InvoiceLineId"])
@@ -1,10 +1,16 @@
 """Tools for music recommendations based on purchase history."""
 
-from langchain_core.tools import tool
 from ..db import get_db
+from ..recommender import (
+    get_artist_similarity,
+    get_genre_tracks,
+    resolve_genre_ids,
+    sample_unowned_tracks,
+)
+from .base import db_tool
 
 
-@tool
+@db_tool
 def get_genre_recommendations(customer_id: int) -> str:
     """
     Get music recommendations based on customer's purchase history.
@@ -34,28 +40,31 @@ def get_genre_recommendations(customer_id: int) -> str:
         if not top_genres:
             return "No purchase history found. Browse our catalog to get started!"
 
-        # Get tracks they haven't purchased from their top genres
-        genre_ids = [g['GenreId'] for g in top_genres]
-        placeholders = ','.join('?' * len(genre_ids))
+        # Sample tracks they haven't purchased from their top genres
+        cur = conn.execute("""
+            SELECT ii.TrackId
+            FROM invoice_items ii
+            JOIN invoices i ON ii.InvoiceId = i.InvoiceId
+            WHERE i.CustomerId = ?
+        """, (customer_id,))
+        owned = {r['TrackId'] for r in cur.fetchall()}
+
+        genre_tracks = get_genre_tracks(conn)
+        pools = [genre_tracks.get(g['GenreId'], []) for g in top_genres]
+        track_ids = sample_unowned_tracks(pools, owned, k=10)
 
+        placeholders = ','.join('?' * len(track_ids))
         cur = conn.execute(f"""
-            SELECT DISTINCT t.TrackId, t.Name as Track, ar.Name as Artist,
+            SELECT t.TrackId, t.Name as Track, ar.Name as Artist,
                    g.Name as Genre, t.UnitPrice
             FROM tracks t
             JOIN albums al ON t.AlbumId = al.AlbumId
             JOIN artists ar ON al.ArtistId = ar.ArtistId
             JOIN genres g ON t.GenreId = g.GenreId
-            WHERE t.GenreId IN ({placeholders})
-            AND t.TrackId NOT IN (
-                SELECT ii.TrackId
-                FROM invoice_items ii
-                JOIN invoices i ON ii.InvoiceId = i.InvoiceId
-                WHERE i.CustomerId = ?
-            )
-            ORDER BY RANDOM()
-            LIMIT 10
-        """, (*genre_ids, customer_id))
-        recommendations = cur.fetchall()
+            WHERE t.TrackId IN ({placeholders})
+        """, track_ids)
+        by_id = {r['TrackId']: r for r in cur.fetchall()}
+        recommendations = [by_id[t] for t in track_ids if t in by_id]
 
     # Build response
     genre_summary = ", ".join([f"{g['Name']} ({g['PurchaseCount']} tracks)" for g in top_genres])
@@ -70,11 +79,12 @@ def get_genre_recommendations(customer_id: int) -> str:
     return "\n".join(lines)
 
 
-@tool
+@db_tool
 def get_artist_recommendations(customer_id: int) -> str:
     """
-    Recommend artists similar to ones the customer has purchased.
-    Finds artists in the same genres as their favorite artists.
+    Recommend artists that customers with similar taste have bought.
+    Uses co-purchase similarity ("customers who bought X also bought Y"),
+    falling back to artists in the customer's genres.
 
     Args:
         customer_id: The customer's ID
@@ -83,45 +93,73 @@ def get_artist_recommendations(customer_id: int) -> str:
         List of recommended artists they haven't purchased from
     """
     with get_db() as conn:
-        # Find genres from artists they've purchased
+        # Artists the customer already owns
         cur = conn.execute("""
-            SELECT DISTINCT g.GenreId
+            SELECT DISTINCT al.ArtistId, ar.Name
             FROM invoice_items ii
             JOIN invoices i ON ii.InvoiceId = i.InvoiceId
             JOIN tracks t ON ii.TrackId = t.TrackId
-            JOIN genres g ON t.GenreId = g.GenreId
+            JOIN albums al ON t.AlbumId = al.AlbumId
+            JOIN artists ar ON al.ArtistId = ar.ArtistId
             WHERE i.CustomerId = ?
         """, (customer_id,))
-        genre_ids = [r['GenreId'] for r in cur.fetchall()]
+        owned = {r['ArtistId']: r['Name'] for r in cur.fetchall()}
 
-        if not genre_ids:
+        if not owned:
             return "No purchase history found. Check out our popular artists!"
 
-        # Find artists in those genres they haven't bought from
-        placeholders = ','.join('?' * len(genre_ids))
-        cur = conn.execute(f"""
-            SELECT DISTINCT ar.ArtistId, ar.Name as Artist,
-                   COUNT(DISTINCT t.TrackId) as TrackCount,
-                   GROUP_CONCAT(DISTINCT g.Name) as Genres
-            FROM artists ar
-            JOIN albums al ON ar.ArtistId = al.ArtistId
-            JOIN tracks t ON al.AlbumId = t.AlbumId
-            JOIN genres g ON t.GenreId = g.GenreId
-            WHERE g.GenreId IN ({placeholders})
-            AND ar.ArtistId NOT IN (
-                SELECT DISTINCT ar2.ArtistId
-                FROM invoice_items ii
-                JOIN invoices inv ON ii.InvoiceId = inv.InvoiceId
-                JOIN tracks t2 ON ii.TrackId = t2.TrackId
-                JOIN albums al2 ON t2.AlbumId = al2.AlbumId
-                JOIN artists ar2 ON al2.ArtistId = ar2.ArtistId
-                WHERE inv.CustomerId = ?
+        recommended = get_artist_similarity(conn).recommend(set(owned), limit=10)
+
+        if recommended:
+            artist_ids = [artist_id for artist_id, _, _ in recommended]
+            placeholders = ','.join('?' * len(artist_ids))
+            cur = conn.execute(f"""
+                SELECT ar.ArtistId, ar.Name as Artist,
+                       COUNT(DISTINCT t.TrackId) as TrackCount,
+                       GROUP_CONCAT(DISTINCT g.Name) as Genres
+                FROM artists ar
+                JOIN albums al ON ar.ArtistId = al.ArtistId
+                JOIN tracks t ON al.AlbumId = t.AlbumId
+                LEFT JOIN genres g ON t.GenreId = g.GenreId
+                WHERE ar.ArtistId IN ({placeholders})
+                GROUP BY ar.ArtistId
+            """, artist_ids)
+            details = {r['ArtistId']: r for r in cur.fetchall()}
+        else:
+            # No co-purchase signal (e.g. only niche artists) - fall back to genre overlap
+            owned_ids = list(owned)
+            placeholders = ','.join('?' * len(owned_ids))
+            cur = conn.execute(f"""
+                SELECT ar.ArtistId, ar.Name as Artist,
+                       COUNT(DISTINCT t.TrackId) as TrackCount,
+                       GROUP_CONCAT(DISTINCT g.Name) as Genres
+                FROM artists ar
+                JOIN albums al ON ar.ArtistId = al.ArtistId
+                JOIN tracks t ON al.AlbumId = t.AlbumId
+                JOIN genres g ON t.GenreId = g.GenreId
+                WHERE g.GenreId IN (
+                    SELECT DISTINCT t2.GenreId
+                    FROM invoice_items ii
+                    JOIN invoices i ON ii.InvoiceId = i.InvoiceId
+                    JOIN tracks t2 ON ii.TrackId = t2.TrackId
+                    WHERE i.CustomerId = ?
+                )
+                AND ar.ArtistId NOT IN ({placeholders})
+                GROUP BY ar.ArtistId
+                ORDER BY TrackCount DESC
+                LIMIT 10
+            """, (customer_id, *owned_ids))
+            artists = cur.fetchall()
+
+    if recommended:
+        lines = ["Customers who bought the same artists as you also bought:\n"]
+        for artist_id, _, because_id in recommended:
+            a = details[artist_id]
+            lines.append(
+                f"• {a['Artist']} - {a['TrackCount']} tracks ({a['Genres']}) "
+                f"- because you bought {owned[because_id]}"
             )
-            GROUP BY ar.ArtistId
-            ORDER BY TrackCount DESC
-            LIMIT 10
-        """, (*genre_ids, customer_id))
-        artists = cur.fetchall()
+        return "\n".join(lines)
 
     if not artists:
         return "Wow, you've explored a lot! Check back later for new artists."
@@ -133,7 +171,7 @@ def get_artist_recommendations(customer_id: int) -> str:
     return "\n".join(lines)
 
 
-@tool
+@db_tool
 def get_popular_tracks_in_genre(genre_name: str, customer_id: int = None) -> str:
     """
     Get the most popular (best-selling) tracks in a specific genre.
@@ -147,52 +185,42 @@ def get_popular_tracks_in_genre(genre_name: str, customer_id: int = None) -> str
         Top 10 best-selling tracks in that genre (excluding owned tracks)
     """
     with get_db() as conn:
+        genre_ids = resolve_genre_ids(conn, genre_name)
+        owned = set()
         if customer_id:
             # Exclude tracks the customer already owns
             cur = conn.execute("""
-                SELECT
-                    t.TrackId,
-                    t.Name as Track,
-                    ar.Name as Artist,
-                    al.Title as Album,
-                    t.UnitPrice,
-                    COUNT(ii.InvoiceLineId) as TimesSold
-                FROM tracks t
-                JOIN albums al ON t.AlbumId = al.AlbumId
-                JOIN artists ar ON al.ArtistId = ar.ArtistId
-                JOIN genres g ON t.GenreId = g.GenreId
-                LEFT JOIN invoice_items ii ON t.TrackId = ii.TrackId
-                WHERE LOWER(g.Name) LIKE LOWER(?)
-                AND t.TrackId NOT IN (
-                    SELECT ii2.TrackId
-                    FROM invoice_items ii2
-                    JOIN invoices inv ON ii2.InvoiceId = inv.InvoiceId
-                    WHERE inv.CustomerId = ?
-                )
-                GROUP BY t.TrackId
-                ORDER BY TimesSold DESC, t.Name
-                LIMIT 10
-            """, (f"%{genre_name}%", customer_id))
-        else:
-            cur = conn.execute("""
-                SELECT
-                    t.TrackId,
-                    t.Name as Track,
-                    ar.Name as Artist,
-                    al.Title as Album,
-                    t.UnitPrice,
-                    COUNT(ii.InvoiceLineId) as TimesSold
-                FROM tracks t
-                JOIN albums al ON t.AlbumId = al.AlbumId
-                JOIN artists ar ON al.ArtistId = ar.ArtistId
-                JOIN genres g ON t.GenreId = g.GenreId
-                LEFT JOIN invoice_items ii ON t.TrackId = ii.TrackId
-                WHERE LOWER(g.Name) LIKE LOWER(?)
-                GROUP BY t.TrackId
-                ORDER BY TimesSold DESC, t.Name
-                LIMIT 10
-            """, (f"%{genre_name}%",))
-        rows = cur.fetchall()
+                SELECT ii.TrackId
+                FROM invoice_items ii
+                JOIN invoices i ON ii.InvoiceId = i.InvoiceId
+                WHERE i.CustomerId = ?
+            """, (customer_id,))
+            owned = {r['TrackId'] for r in cur.fetchall()}
+
+        # Walk the (GenreId, TimesSold DESC, Name) index until we have 10 unowned tracks
+        placeholders = ','.join('?' * len(genre_ids))
+        cur = conn.execute(f"""
+            SELECT
+                s.TrackId,
+                t.Name as Track,
+                ar.Name as Artist,
+                al.Title as Album,
+                t.UnitPrice,
+                s.TimesSold
+            FROM track_sales s
+            JOIN tracks t ON s.TrackId = t.TrackId
+            JOIN albums al ON t.AlbumId = al.AlbumId
+            JOIN artists ar ON al.ArtistId = ar.ArtistId
+            WHERE s.GenreId IN ({placeholders})
+            ORDER BY s.TimesSold DESC, s.Name
+        """, genre_ids)
+        rows = []
+        while len(rows) < 10:
+            batch = cur.fetchmany(10)
+            if not batch:
+                break
+            rows += [r for r in batch if r['TrackId'] not in owned]
+        rows = rows[:10]
 
     if not rows:
         return f"No tracks found in genre matching '{genre_name}'. Try: Rock, Jazz, Metal, Pop, Blues, etc."
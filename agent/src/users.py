@@ -0,0 +1,176 @@
+"""Authenticated-user lookup shared by the auth handler and the graph nodes.
+
+Lookups go through a process-wide LRU cache keyed by token, with a TTL.
+Concurrent lookups for the same token share one query. The whole cache is
+dropped when the auth_version counter moves, which triggers bump whenever
+a user's name changes or a customer is reassigned to another support rep.
+A lookup that was already running when it moved is returned to its callers
+but not cached.
+"""
+
+import asyncio
+import os
+import sqlite3
+import time
+from collections import Counter, OrderedDict
+
+from .db import run_with_db
+
+# Maximum number of tokens kept in the cache
+USER_CACHE_SIZE = int(os.environ.get("USER_CACHE_SIZE", "1024"))
+
+# Seconds a cached user stays valid
+USER_CACHE_TTL = float(os.environ.get("USER_CACHE_TTL", "300"))
+
+# Seconds between checks of auth_version for invalidation
+VERSION_CHECK_INTERVAL = 1.0
+
+
+def _lookup_user(conn: sqlite3.Connection, token: str) -> dict | None:
+    # Check if token matches an employee
+    emp = conn.execute("""
+        SELECT EmployeeId, FirstName, LastName
+        FROM employees
+        WHERE LOWER(FirstName) = ?
+    """, (token,)).fetchone()
+
+    if emp:
+        # Get list of customers this employee supports
+        rows = conn.execute(
+            "SELECT CustomerId FROM customers WHERE SupportRepId = ?",
+            (emp["EmployeeId"],)
+        ).fetchall()
+        supported_customers = [row["CustomerId"] for row in rows]
+
+        return {
+            "identity": token,
+            "role": "employee",
+            "employee_id": emp["EmployeeId"],
+            "user_id": emp["EmployeeId"],
+            "name": f"{emp['FirstName']} {emp['LastName']}",
+            "supported_customers": supported_customers,
+            "permissions": ["employee:read", "employee:write", "customer:read"],
+        }
+
+    # Check if token matches a customer
+    cust = conn.execute("""
+        SELECT CustomerId, FirstName, LastName
+        FROM customers
+        WHERE LOWER(FirstName) = ?
+    """, (token,)).fetchone()
+
+    if cust:
+        return {
+            "identity": token,
+            "role": "customer",
+            "customer_id": cust["CustomerId"],
+            "user_id": cust["CustomerId"],
+            "name": f"{cust['FirstName']} {cust['LastName']}",
+            "supported_customers": [],
+            "permissions": ["customer:read"],
+        }
+
+    return None
+
+
+async def lookup_user(token: str) -> dict | None:
+    """Database lookup for user authentication, off the event loop."""
+    return await run_with_db(_lookup_user, token.lower())
+
+
+def _auth_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("SELECT version FROM auth_version WHERE id = 1").fetchone()[0]
+
+
+async def _read_auth_version() -> int:
+    return await run_with_db(_auth_version)
+
+
+def _copy(user: dict | None) -> dict | None:
+    """Hand out copies so callers can't mutate the cached record."""
+    if user is None:
+        return None
+    return {**user, "supported_customers": list(user["supported_customers"]),
+            "permissions": list(user["permissions"])}
+
+
+class UserCache:
+    """LRU + TTL cache of token -> user, with in-flight lookup coalescing.
+
+    All state is touched only from the event loop thread, between awaits.
+    """
+
+    def __init__(self, maxsize: int = USER_CACHE_SIZE, ttl: float = USER_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[float, dict | None]] = OrderedDict()
+        self._inflight: dict[str, asyncio.Future] = {}
+        self._version: int | None = None
+        self._version_checked_at = 0.0
+        self.stats: Counter = Counter()
+
+    async def _check_version(self) -> None:
+        now = time.monotonic()
+        if now - self._version_checked_at < VERSION_CHECK_INTERVAL:
+            return
+        self._version_checked_at = now
+        version = await _read_auth_version()
+        if version != self._version:
+            if self._version is not None:
+                self.stats["invalidations"] += 1
+            self._entries.clear()
+            # Lookups already running read the old data; later callers shouldn't join them
+            self._inflight.clear()
+            self._version = version
+
+    async def get(self, token: str) -> dict | None:
+        """Get the user for a token, querying the database only on a miss."""
+        token = token.lower()
+        await self._check_version()
+
+        entry = self._entries.get(token)
+        if entry and entry[0] > time.monotonic():
+            self._entries.move_to_end(token)
+            self.stats["hits"] += 1
+            return _copy(entry[1])
+
+        inflight = self._inflight.get(token)
+        if inflight:
+            self.stats["coalesced"] += 1
+            return _copy(await asyncio.shield(inflight))
+
+        self.stats["misses"] += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[token] = future
+        version = self._version
+        try:
+            user = await lookup_user(token)
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # Mark retrieved so an unawaited future doesn't warn
+            raise
+        finally:
+            if self._inflight.get(token) is future:
+                del self._inflight[token]
+
+        if self._version == version:
+            self._entries[token] = (time.monotonic() + self.ttl, user)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        else:
+            # Started before an invalidation, so it may hold the old data
+            self.stats["stale_skipped"] += 1
+        future.set_result(user)
+        return _copy(user)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+user_cache = UserCache()
+
+
+async def get_user(token: str) -> dict | None:
+    """Look up the user for a bearer token through the shared cache."""
+    return await user_cache.get(token)
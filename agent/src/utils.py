@@ -1,59 +1,56 @@
 """Utility functions for the music store agent."""
 
-import asyncio
+from collections import Counter
+from langchain_core.messages import SystemMessage
 from langchain_core.runnables import RunnableConfig
-from .db import get_db
-
-
-def _lookup_user_sync(token: str) -> dict | None:
-    """Synchronous database lookup for user authentication."""
-    with get_db() as conn:
-        # Check if token matches an employee
-        cur = conn.execute("""
-            SELECT EmployeeId, FirstName, LastName
-            FROM employees
-            WHERE LOWER(FirstName) = ?
-        """, (token.lower(),))
-        emp = cur.fetchone()
-
-        if emp:
-            # Get list of customers this employee supports
-            cur = conn.execute(
-                "SELECT CustomerId FROM customers WHERE SupportRepId = ?",
-                (emp["EmployeeId"],)
-            )
-            supported_customers = [row["CustomerId"] for row in cur.fetchall()]
-
-            return {
-                "identity": token,
-                "role": "employee",
-                "employee_id": emp["EmployeeId"],
-                "user_id": emp["EmployeeId"],
-                "name": f"{emp['FirstName']} {emp['LastName']}",
-                "supported_customers": supported_customers,
-                "permissions": ["employee:read", "employee:write", "customer:read"],
-            }
-
-        # Check if token matches a customer
-        cur = conn.execute("""
-            SELECT CustomerId, FirstName, LastName
-            FROM customers
-            WHERE LOWER(FirstName) = ?
-        """, (token.lower(),))
-        cust = cur.fetchone()
-
-        if cust:
-            return {
-                "identity": token,
-                "role": "customer",
-                "customer_id": cust["CustomerId"],
-                "user_id": cust["CustomerId"],
-                "name": f"{cust['FirstName']} {cust['LastName']}",
-                "supported_customers": [],
-                "permissions": ["customer:read"],
-            }
-
-    return None
+from .users import get_user
+
+# Running prompt-cache token totals across all model calls
+CACHE_STATS: Counter = Counter()
+
+
+def cached_system_message(static: str, dynamic: str) -> SystemMessage:
+    """
+    Build a system message with an Anthropic prompt-cache breakpoint.
+
+    The breakpoint sits after the static text, so the tool definitions and the
+    static instructions are cached and only the dynamic suffix is re-processed.
+    """
+    return SystemMessage(content=[
+        {"type": "text", "text": static, "cache_control": {"type": "ephemeral"}},
+        {"type": "text", "text": dynamic},
+    ])
+
+
+def with_summary(identity: str, summary: str | None) -> str:
+    """Append the rolling conversation summary, if any, to a prompt's dynamic suffix."""
+    if not summary:
+        return identity
+    return f"{identity}\n\n## EARLIER IN THIS CONVERSATION (summary)\n{summary}"
+
+
+def record_cache_usage(source: str, messages: list) -> None:
+    """Log and accumulate prompt-cache read/write tokens for model responses."""
+    for msg in messages:
+        usage = getattr(msg, "usage_metadata", None)
+        if getattr(msg, "type", None) != "ai" or not usage:
+            continue
+        details = usage.get("input_token_details") or {}
+        read = details.get("cache_read", 0) or 0
+        write = details.get("cache_creation", 0) or 0
+        CACHE_STATS["calls"] += 1
+        CACHE_STATS["input_tokens"] += usage.get("input_tokens", 0)
+        CACHE_STATS["cache_read_tokens"] += read
+        CACHE_STATS["cache_write_tokens"] += write
+        print(f"[CACHE] {source}: input={usage.get('input_tokens', 0)} cache_read={read} cache_write={write}")
+
+
+def get_cache_stats() -> dict:
+    """Prompt-cache token totals and the share of input tokens read from cache."""
+    stats = dict(CACHE_STATS)
+    input_tokens = stats.get("input_tokens", 0)
+    stats["cache_hit_rate"] = stats.get("cache_read_tokens", 0) / input_tokens if input_tokens else 0.0
+    return stats
 
 
 async def get_auth_user(config: RunnableConfig) -> dict:
@@ -83,7 +80,7 @@ async def get_auth_user(config: RunnableConfig) -> dict:
     if auth_header:
         token = auth_header.replace("Bearer ", "").strip()
         print(f"[AUTH UTIL] Looking up user from context.authorization: {token}")
-        user_data = await asyncio.to_thread(_lookup_user_sync, token)
+        user_data = await get_user(token)
         if user_data:
             print(f"[AUTH UTIL] Found user: {user_data.get('name')} ({user_data.get('role')})")
             return user_data
@@ -93,7 +90,7 @@ async def get_auth_user(config: RunnableConfig) -> dict:
     if auth_header:
         token = auth_header.replace("Bearer ", "").strip()
         print(f"[AUTH UTIL] Looking up user from configurable.authorization: {token}")
-        user_data = await asyncio.to_thread(_lookup_user_sync, token)
+        user_data = await get_user(token)
         if user_data:
             print(f"[AUTH UTIL] Found user: {user_data.get('name')} ({user_data.get('role')})")
             return user_data
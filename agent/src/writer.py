@@ -0,0 +1,172 @@
+"""Single writer thread with group commit for every database mutation.
+
+SQLite allows one writer at a time. When each purchase or invoice edit opened
+its own write transaction, concurrent requests queued on the write lock,
+retrying through busy_timeout and failing with "database is locked" once it
+ran out. Instead, mutations are submitted here as jobs: a function that takes
+a connection and does its writes.
+
+One thread owns a dedicated connection. It takes every job waiting in the
+queue (up to WRITER_MAX_BATCH) and runs them in a single transaction, each
+inside its own SAVEPOINT, so a job that raises is rolled back alone while the
+others commit. Each caller gets a Future that resolves only after the batch
+has committed, with the job's return value or its exception.
+
+If the thread dies (the connection can't be opened, or a rollback fails),
+the jobs still queued fail with WriterStopped and the next submit starts a
+new thread.
+"""
+
+import atexit
+import os
+import queue
+import sqlite3
+import threading
+from concurrent.futures import Future
+
+from . import db
+
+# Most jobs committed together in one transaction
+WRITER_MAX_BATCH = int(os.environ.get("WRITER_MAX_BATCH", "64"))
+
+# Seconds write() waits for its job to commit before giving up
+WRITER_TIMEOUT = float(os.environ.get("WRITER_TIMEOUT", str(db.POOL_TIMEOUT)))
+
+_STOP = object()
+
+
+class WriterStopped(RuntimeError):
+    """The writer thread died before it could run the job."""
+
+
+class Writer:
+    """Runs submitted write jobs on one connection, committing them in batches."""
+
+    def __init__(self, max_batch: int = WRITER_MAX_BATCH, timeout: float = WRITER_TIMEOUT):
+        self.max_batch = max_batch
+        self.timeout = timeout
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self.stats = {"jobs": 0, "batches": 0, "failed_jobs": 0, "failed_batches": 0, "restarts": 0}
+
+    def submit(self, func, *args, **kwargs) -> Future:
+        """Queue func(conn, *args, **kwargs); the Future resolves once its batch commits."""
+        future: Future = Future()
+        with self._lock:
+            if self._thread is None:
+                # Each thread gets its own queue, so nothing is left behind on one that has stopped
+                self._queue = queue.SimpleQueue()
+                self._thread = threading.Thread(target=self._run, args=(self._queue,), name="db-writer", daemon=True)
+                self._thread.start()
+            self._queue.put((future, func, args, kwargs))
+        return future
+
+    def write(self, func, *args, **kwargs):
+        """Submit a job and wait for it; returns its result or raises its exception.
+
+        Raises TimeoutError if the job hasn't committed within the timeout. A
+        job that had already started may still commit after that.
+        """
+        future = self.submit(func, *args, **kwargs)
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            future.cancel()
+            raise TimeoutError(f"Write not committed after {self.timeout}s") from None
+
+    def close(self) -> None:
+        """Finish the queued jobs and stop the thread."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+            if thread is not None:
+                self._queue.put(_STOP)
+        if thread is not None:
+            thread.join()
+
+    def _run(self, jobs: queue.SimpleQueue) -> None:
+        conn = None
+        error: BaseException | None = None
+        try:
+            conn = db.connect()
+            conn.isolation_level = None  # Transactions and savepoints are managed here
+            while True:
+                batch = [jobs.get()]
+                while len(batch) < self.max_batch:
+                    try:
+                        batch.append(jobs.get_nowait())
+                    except queue.Empty:
+                        break
+                stop = _STOP in batch
+                pending = [job for job in batch if job is not _STOP]
+                if pending:
+                    self._commit(conn, pending)
+                if stop:
+                    return
+        except BaseException as e:
+            error = e
+            print(f"[WRITER] Writer thread stopped: {e}")
+        finally:
+            with self._lock:
+                if self._thread is threading.current_thread():
+                    # The next submit starts a new thread with a new connection
+                    self._thread = None
+                    self.stats["restarts"] += 1
+                # Nothing can be queued here any more; fail whatever is left
+                while True:
+                    try:
+                        job = jobs.get_nowait()
+                    except queue.Empty:
+                        break
+                    if job is not _STOP and job[0].set_running_or_notify_cancel():
+                        job[0].set_exception(WriterStopped(f"The database writer stopped: {error}"))
+            if conn is not None:
+                conn.close()
+
+    def _commit(self, conn: sqlite3.Connection, jobs: list) -> None:
+        results = []
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for future, func, args, kwargs in jobs:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                conn.execute("SAVEPOINT job")
+                try:
+                    results.append((future, func(conn, *args, **kwargs), None))
+                    conn.execute("RELEASE job")
+                except Exception as e:
+                    conn.execute("ROLLBACK TO job")
+                    conn.execute("RELEASE job")
+                    results.append((future, None, e))
+            conn.execute("COMMIT")
+        except BaseException as e:
+            # The whole batch is lost; fail every job that hasn't been answered
+            self.stats["failed_batches"] += 1
+            print(f"[WRITER] Batch of {len(jobs)} failed: {e}")
+            for future, *_ in jobs:
+                if future.running() or future.set_running_or_notify_cancel():
+                    future.set_exception(e)
+            # If the rollback fails too, the thread exits and the next write reopens the connection
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            return
+
+        self.stats["batches"] += 1
+        self.stats["jobs"] += len(results)
+        for future, result, error in results:
+            if error is None:
+                future.set_result(result)
+            else:
+                self.stats["failed_jobs"] += 1
+                future.set_exception(error)
+
+
+writer = Writer()
+atexit.register(writer.close)
+
+
+def get_writer_stats() -> dict:
+    """Jobs and batches committed, and the average batch size."""
+    stats = dict(writer.stats)
+    stats["avg_batch"] = stats["jobs"] / stats["batches"] if stats["batches"] else 0.0
+    return stats
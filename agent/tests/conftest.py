@@ -0,0 +1,41 @@
+import os
+import shutil
+from pathlib import Path
+
+import pytest
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.graph import START, MessagesState, StateGraph
+from langgraph.prebuilt import ToolNode
+
+os.environ.setdefault("ANTHROPIC_API_KEY", "test")  # No model is called
+
+from src import db, recommender, writer
+from src.users import user_cache
+
+CHINOOK = Path(__file__).parent.parent / "chinook.db"
+
+
+@pytest.fixture
+def chinook(tmp_path, monkeypatch):
+    """A fresh copy of chinook.db that every connection in the test opens."""
+    path = tmp_path / "chinook.db"
+    shutil.copy(CHINOOK, path)
+    monkeypatch.setattr(db, "DATABASE_PATH", path)
+    monkeypatch.setattr(db, "_schema_ready", False)
+    monkeypatch.setattr(db, "pool", db.ConnectionPool())
+    monkeypatch.setattr(recommender, "SIMILARITY_PATH", tmp_path / "artist_similarity.json")
+    user_cache.clear()
+    yield path
+    writer.writer.close()  # The next write reopens it on the next test's copy
+    db.pool.close()
+
+
+@pytest.fixture
+def tool_graph():
+    """Build a checkpointed one-step graph that runs a tool call, so interrupt() and resume work."""
+    def build(tool):
+        builder = StateGraph(MessagesState)
+        builder.add_node("tools", ToolNode([tool]))
+        builder.add_edge(START, "tools")
+        return builder.compile(checkpointer=InMemorySaver())
+    return build
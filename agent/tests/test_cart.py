@@ -0,0 +1,72 @@
+import sqlite3
+
+from src import orders
+from src.tools.customer_tools import checkout
+
+from .test_purchases import _call, _resume
+
+CUSTOMER_ID = 5
+
+
+def _invoices(path) -> list[int]:
+    with sqlite3.connect(path) as conn:
+        return [r[0] for r in conn.execute(
+            "SELECT InvoiceId FROM invoices WHERE CustomerId = ? ORDER BY InvoiceId", (CUSTOMER_ID,)
+        )]
+
+
+def test_add_remove_and_view_cart(chinook):
+    assert orders.add_to_cart(CUSTOMER_ID, [1, 2, 999999]) == ([1, 2], [], [999999])
+    assert orders.add_to_cart(CUSTOMER_ID, [2, 3]) == ([3], [2], [])
+    assert orders.remove_from_cart(CUSTOMER_ID, [2]) == 1
+    assert [r["TrackId"] for r in orders.get_cart(CUSTOMER_ID)] == [1, 3]
+    assert orders.remove_from_cart(CUSTOMER_ID) == 2
+    assert orders.get_cart(CUSTOMER_ID) == []
+
+
+def test_checkout_bills_cart_as_one_invoice(chinook, tool_graph):
+    orders.add_to_cart(CUSTOMER_ID, [1, 2, 3])
+    before = _invoices(chinook)
+    graph = tool_graph(checkout)
+    config, prompt = _call(graph, checkout, {"customer_id": CUSTOMER_ID})
+    assert prompt["track_ids"] == [1, 2, 3]
+
+    reply = _resume(graph, config, {"confirmed": True, "price": prompt["price"], "track_ids": prompt["track_ids"]})
+    assert "Tracks: 3" in reply
+    assert len(_invoices(chinook)) == len(before) + 1
+    assert orders.get_cart(CUSTOMER_ID) == []
+
+
+def test_checkout_rejects_tracks_added_after_prompt(chinook, tool_graph):
+    orders.add_to_cart(CUSTOMER_ID, [1, 2])
+    before = _invoices(chinook)
+    graph = tool_graph(checkout)
+    config, prompt = _call(graph, checkout, {"customer_id": CUSTOMER_ID})
+    orders.add_to_cart(CUSTOMER_ID, [3])  # Another tab, between the prompt and the confirm
+
+    reply = _resume(graph, config, {"confirmed": True, "price": prompt["price"], "track_ids": prompt["track_ids"]})
+    assert "cart changed" in reply
+    assert _invoices(chinook) == before
+    assert [r["TrackId"] for r in orders.get_cart(CUSTOMER_ID)] == [1, 2, 3]
+
+
+def test_checkout_rejects_price_change_after_prompt(chinook, tool_graph):
+    orders.add_to_cart(CUSTOMER_ID, [1, 2])
+    before = _invoices(chinook)
+    graph = tool_graph(checkout)
+    config, prompt = _call(graph, checkout, {"customer_id": CUSTOMER_ID})
+    with sqlite3.connect(chinook) as conn:
+        conn.execute("UPDATE tracks SET UnitPrice = 1.99 WHERE TrackId = 2")
+
+    reply = _resume(graph, config, {"confirmed": True, "price": prompt["price"], "track_ids": prompt["track_ids"]})
+    assert "Prices changed" in reply
+    assert _invoices(chinook) == before
+
+
+def test_checkout_requires_confirmed_tracks(chinook, tool_graph):
+    orders.add_to_cart(CUSTOMER_ID, [1])
+    graph = tool_graph(checkout)
+    config, prompt = _call(graph, checkout, {"customer_id": CUSTOMER_ID})
+    reply = _resume(graph, config, {"confirmed": True, "price": prompt["price"]})
+    assert "No charge made" in reply
+    assert len(orders.get_cart(CUSTOMER_ID)) == 1
@@ -0,0 +1,92 @@
+import sqlite3
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.graph import START, MessagesState, StateGraph
+from langgraph.types import Command, interrupt
+
+from src.checkpointer import SqliteCheckpointSaver
+
+
+def _reply(state: MessagesState) -> dict:
+    return {"messages": [AIMessage(content=f"reply {len(state['messages'])}")]}
+
+
+def _confirm(state: MessagesState) -> dict:
+    answer = interrupt({"message": "Confirm?"})
+    return {"messages": [AIMessage(content=f"confirmed={answer['confirmed']}")]}
+
+
+def _graph(node, saver):
+    builder = StateGraph(MessagesState)
+    builder.add_node("node", node)
+    builder.add_edge(START, "node")
+    return builder.compile(checkpointer=saver)
+
+
+@pytest.fixture
+def path(tmp_path):
+    return tmp_path / "checkpoints.db"
+
+
+def test_thread_continues_after_reopen(path):
+    config = {"configurable": {"thread_id": "t1"}}
+    saver = SqliteCheckpointSaver(path)
+    _graph(_reply, saver).invoke({"messages": [HumanMessage(content="hi")]}, config)
+    saver.close()
+
+    saver = SqliteCheckpointSaver(path)
+    result = _graph(_reply, saver).invoke({"messages": [HumanMessage(content="again")]}, config)
+    assert [m.content for m in result["messages"]] == ["hi", "reply 1", "again", "reply 3"]
+    saver.close()
+
+
+def test_interrupt_resumes_from_new_saver(path):
+    config = {"configurable": {"thread_id": "t1"}}
+    saver = SqliteCheckpointSaver(path)
+    result = _graph(_confirm, saver).invoke({"messages": [HumanMessage(content="buy")]}, config)
+    assert result["__interrupt__"][0].value == {"message": "Confirm?"}
+    saver.close()
+
+    saver = SqliteCheckpointSaver(path)
+    result = _graph(_confirm, saver).invoke(Command(resume={"confirmed": True}), config)
+    assert result["messages"][-1].content == "confirmed=True"
+    saver.close()
+
+
+def test_prune_keeps_newest_checkpoints_and_their_blobs(path):
+    keep = 3
+    config = {"configurable": {"thread_id": "t1"}}
+    saver = SqliteCheckpointSaver(path, keep=keep)
+    graph = _graph(_reply, saver)
+    for i in range(20):
+        graph.invoke({"messages": [HumanMessage(content=f"turn {i}")]}, config)
+
+    checkpoints = list(saver.list(config))
+    assert keep <= len(checkpoints) < 2 * keep
+    assert len(graph.get_state(config).values["messages"]) == 40
+
+    # Every blob left is one a remaining checkpoint points at
+    referenced = {
+        (channel, str(version))
+        for c in checkpoints
+        for channel, version in c.checkpoint["channel_versions"].items()
+    }
+    with sqlite3.connect(path) as conn:
+        blobs = set(conn.execute("SELECT channel, version FROM checkpoint_blobs WHERE thread_id = 't1'"))
+    assert blobs <= referenced
+    saver.close()
+
+
+def test_prune_leaves_other_threads_alone(path):
+    saver = SqliteCheckpointSaver(path, keep=2)
+    graph = _graph(_reply, saver)
+    quiet = {"configurable": {"thread_id": "quiet"}}
+    busy = {"configurable": {"thread_id": "busy"}}
+    graph.invoke({"messages": [HumanMessage(content="hello")]}, quiet)
+    before = len(list(saver.list(quiet)))
+    for i in range(10):
+        graph.invoke({"messages": [HumanMessage(content=f"turn {i}")]}, busy)
+    assert len(list(saver.list(quiet))) == before
+    assert [m.content for m in graph.get_state(quiet).values["messages"]] == ["hello", "reply 1"]
+    saver.close()
@@ -0,0 +1,74 @@
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+
+from langgraph.types import Command
+
+from src import orders
+from src.tools.customer_tools import checkout, purchase_track
+
+from .test_purchases import _call
+
+CUSTOMER_ID = 5
+
+
+def _invoice_count(path) -> int:
+    with sqlite3.connect(path) as conn:
+        return conn.execute("SELECT COUNT(*) FROM invoices WHERE CustomerId = ?", (CUSTOMER_ID,)).fetchone()[0]
+
+
+def test_replayed_key_returns_the_same_invoice(chinook):
+    before = _invoice_count(chinook)
+    key = ("thread", "call_1", "purchase_track")
+    first = orders.create_invoice(CUSTOMER_ID, [1], 0.99, key=key)
+    again = orders.create_invoice(CUSTOMER_ID, [1], 0.99, key=key)
+    assert again == first
+    assert orders.find_invoice(key) == first
+    assert _invoice_count(chinook) == before + 1
+
+
+def test_concurrent_replays_write_one_invoice(chinook):
+    before = _invoice_count(chinook)
+    key = ("thread", "call_1", "purchase_album")
+    with ThreadPoolExecutor(8) as pool:
+        invoices = list(pool.map(lambda _: orders.create_invoice(CUSTOMER_ID, [1, 2], None, key=key), range(8)))
+    assert len({invoice.invoice_id for invoice in invoices}) == 1
+    assert _invoice_count(chinook) == before + 1
+
+
+def test_no_key_is_never_replayed(chinook):
+    before = _invoice_count(chinook)
+    orders.create_invoice(CUSTOMER_ID, [1], None)
+    orders.create_invoice(CUSTOMER_ID, [1], None)
+    assert orders.find_invoice(None) is None
+    assert _invoice_count(chinook) == before + 2
+
+
+def _resume_twice(graph, config, value) -> tuple[str, str]:
+    """Resume the same interrupted checkpoint twice, as a retried resume request does."""
+    interrupted = graph.get_state(config).config
+    first = graph.invoke(Command(resume=value), interrupted)["messages"][-1].content
+    second = graph.invoke(Command(resume=value), interrupted)["messages"][-1].content
+    return first, second
+
+
+def test_retried_purchase_resume_charges_once(chinook, tool_graph):
+    graph = tool_graph(purchase_track)
+    before = _invoice_count(chinook)
+    config, prompt = _call(graph, purchase_track, {"customer_id": CUSTOMER_ID, "track_id": 1})
+    first, second = _resume_twice(graph, config, {"confirmed": True, "price": prompt["price"]})
+    assert "Purchase complete!" in first
+    assert first == second
+    assert _invoice_count(chinook) == before + 1
+
+
+def test_retried_checkout_resume_charges_once(chinook, tool_graph):
+    orders.add_to_cart(CUSTOMER_ID, [1, 2])
+    graph = tool_graph(checkout)
+    before = _invoice_count(chinook)
+    config, prompt = _call(graph, checkout, {"customer_id": CUSTOMER_ID})
+    first, second = _resume_twice(
+        graph, config, {"confirmed": True, "price": prompt["price"], "track_ids": prompt["track_ids"]}
+    )
+    assert "Purchase complete!" in first
+    assert first == second  # The cart is empty by now, so this comes from the key
+    assert _invoice_count(chinook) == before + 1
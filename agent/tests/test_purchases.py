@@ -0,0 +1,108 @@
+import sqlite3
+
+import pytest
+from langchain_core.messages import AIMessage
+from langgraph.types import Command
+
+from src.tools.customer_tools import NO_CONFIRMED_PRICE, purchase_album, purchase_track
+
+CUSTOMER_ID = 5
+TRACK_ID = 1
+ALBUM_ID = 1
+
+
+def _call(graph, tool, args, thread_id="t1", call_id="call_1"):
+    """Start a tool call; returns the graph config and the interrupt payload it raised."""
+    config = {"configurable": {"thread_id": thread_id}}
+    message = AIMessage(content="", tool_calls=[{"name": tool.name, "args": args, "id": call_id}])
+    result = graph.invoke({"messages": [message]}, config)
+    return config, result["__interrupt__"][0].value
+
+
+def _resume(graph, config, value) -> str:
+    return graph.invoke(Command(resume=value), config)["messages"][-1].content
+
+
+def _invoice_count(path) -> int:
+    with sqlite3.connect(path) as conn:
+        return conn.execute("SELECT COUNT(*) FROM invoices WHERE CustomerId = ?", (CUSTOMER_ID,)).fetchone()[0]
+
+
+def _set_price(path, sql: str, params):
+    with sqlite3.connect(path) as conn:
+        conn.execute(sql, params)
+
+
+def test_purchase_track_charges_confirmed_price(chinook, tool_graph):
+    graph = tool_graph(purchase_track)
+    before = _invoice_count(chinook)
+    config, prompt = _call(graph, purchase_track, {"customer_id": CUSTOMER_ID, "track_id": TRACK_ID})
+    reply = _resume(graph, config, {"confirmed": True, "price": prompt["price"]})
+    assert "Purchase complete!" in reply
+    assert _invoice_count(chinook) == before + 1
+
+
+def test_purchase_track_rejects_price_change_after_prompt(chinook, tool_graph):
+    graph = tool_graph(purchase_track)
+    before = _invoice_count(chinook)
+    config, prompt = _call(graph, purchase_track, {"customer_id": CUSTOMER_ID, "track_id": TRACK_ID})
+    _set_price(chinook, "UPDATE tracks SET UnitPrice = 1.99 WHERE TrackId = ?", (TRACK_ID,))
+
+    reply = _resume(graph, config, {"confirmed": True, "price": prompt["price"]})
+    assert "Prices changed" in reply
+    assert _invoice_count(chinook) == before
+
+
+def test_purchase_track_requires_confirmed_price(chinook, tool_graph):
+    graph = tool_graph(purchase_track)
+    before = _invoice_count(chinook)
+    config, _ = _call(graph, purchase_track, {"customer_id": CUSTOMER_ID, "track_id": TRACK_ID})
+    reply = _resume(graph, config, {"confirmed": True})
+    assert "No charge made" in reply
+    assert _invoice_count(chinook) == before
+
+
+@pytest.mark.parametrize("price", ["free", "", [0.99], {"amount": 0.99}, "nan"])
+def test_purchase_track_rejects_malformed_price(chinook, tool_graph, price):
+    graph = tool_graph(purchase_track)
+    before = _invoice_count(chinook)
+    config, _ = _call(graph, purchase_track, {"customer_id": CUSTOMER_ID, "track_id": TRACK_ID})
+    reply = _resume(graph, config, {"confirmed": True, "price": price})
+    assert reply == NO_CONFIRMED_PRICE
+    assert _invoice_count(chinook) == before
+
+
+def test_purchase_track_cancelled(chinook, tool_graph):
+    graph = tool_graph(purchase_track)
+    before = _invoice_count(chinook)
+    config, prompt = _call(graph, purchase_track, {"customer_id": CUSTOMER_ID, "track_id": TRACK_ID})
+    reply = _resume(graph, config, {"confirmed": False, "price": prompt["price"]})
+    assert "cancelled" in reply
+    assert _invoice_count(chinook) == before
+
+
+def test_purchase_album_rejects_price_change_after_prompt(chinook, tool_graph):
+    graph = tool_graph(purchase_album)
+    before = _invoice_count(chinook)
+    config, prompt = _call(graph, purchase_album, {"customer_id": CUSTOMER_ID, "album_id": ALBUM_ID})
+    _set_price(chinook, "UPDATE tracks SET UnitPrice = UnitPrice + 1 WHERE AlbumId = ?", (ALBUM_ID,))
+
+    reply = _resume(graph, config, {"confirmed": True, "price": prompt["price"]})
+    assert "Prices changed" in reply
+    assert _invoice_count(chinook) == before
+
+
+def test_purchase_album_writes_one_invoice_with_every_track(chinook, tool_graph):
+    graph = tool_graph(purchase_album)
+    config, prompt = _call(graph, purchase_album, {"customer_id": CUSTOMER_ID, "album_id": ALBUM_ID})
+    reply = _resume(graph, config, {"confirmed": True, "price": prompt["price"]})
+    assert f"Tracks: {prompt['track_count']}" in reply
+
+    with sqlite3.connect(chinook) as conn:
+        invoice_id, total = conn.execute(
+            "SELECT InvoiceId, Total FROM invoices WHERE CustomerId = ? ORDER BY InvoiceId DESC LIMIT 1",
+            (CUSTOMER_ID,),
+        ).fetchone()
+        lines = conn.execute("SELECT COUNT(*) FROM invoice_items WHERE InvoiceId = ?", (invoice_id,)).fetchone()[0]
+    assert lines == prompt["track_count"]
+    assert total == round(prompt["price"], 2)
@@ -0,0 +1,67 @@
+import sqlite3
+import threading
+import time
+
+from src import recommender
+from src.db import get_db
+
+
+def _count_genre_loads(conn) -> list[str]:
+    loads = []
+    conn.set_trace_callback(lambda sql: loads.append(sql) if "FROM genres" in sql else None)
+    return loads
+
+
+def test_unknown_genre_does_not_reload_genres(chinook, monkeypatch):
+    monkeypatch.setattr(recommender, "_genres_version", None)
+    with get_db() as conn:
+        loads = _count_genre_loads(conn)
+        assert recommender.resolve_genre_ids(conn, "rock")
+        for _ in range(5):
+            assert recommender.resolve_genre_ids(conn, "not a genre") == []
+        conn.set_trace_callback(None)
+    assert len(loads) == 1
+
+
+def test_new_genre_is_resolved_after_catalog_change(chinook, monkeypatch):
+    monkeypatch.setattr(recommender, "_genres_version", None)
+    with get_db() as conn:
+        assert recommender.resolve_genre_ids(conn, "synthwave") == []
+    with sqlite3.connect(chinook) as conn:
+        genre_id = conn.execute("INSERT INTO genres (Name) VALUES ('Synthwave')").lastrowid
+    with get_db() as conn:
+        assert recommender.resolve_genre_ids(conn, "synthwave") == [genre_id]
+
+
+def test_stale_similarity_served_while_rebuilding(chinook, monkeypatch):
+    stale = recommender.ArtistSimilarity({1: [(2, 0.5)]}, high_water=1, built_at=0.0)
+    monkeypatch.setattr(recommender, "_similarity", stale)
+    monkeypatch.setattr(recommender, "_rebuild_thread", None)
+    release = threading.Event()
+    real_build = recommender.ArtistSimilarity.build.__func__
+
+    def slow_build(cls, conn):
+        release.wait(5)
+        return real_build(cls, conn)
+
+    monkeypatch.setattr(recommender.ArtistSimilarity, "build", classmethod(slow_build))
+    with get_db() as conn:
+        start = time.perf_counter()
+        assert recommender.get_artist_similarity(conn) is stale
+        assert recommender.get_artist_similarity(conn) is stale  # One rebuild, not two
+        assert time.perf_counter() - start < 1
+    rebuild = recommender._rebuild_thread
+    release.set()
+    rebuild.join(5)
+
+    rebuilt = recommender._similarity
+    assert rebuilt is not stale and rebuilt.high_water > 1
+    assert recommender.ArtistSimilarity.load().high_water == rebuilt.high_water
+
+
+def test_save_replaces_file_atomically(chinook, tmp_path):
+    path = tmp_path / "similarity.json"
+    path.write_text("old")
+    recommender.ArtistSimilarity({1: [(2, 0.5)]}, high_water=7, built_at=1.0).save(path)
+    assert recommender.ArtistSimilarity.load(path).neighbors == {1: [(2, 0.5)]}
+    assert [p.name for p in tmp_path.iterdir() if p.name.endswith(".tmp")] == []
@@ -0,0 +1,111 @@
+import asyncio
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+from src.nodes import supervisor
+from src.nodes.supervisor import compound_route, fast_route, supervisor_node
+
+CUSTOMER = ["customer_agent", "recommendation_agent", "FINISH"]
+EMPLOYEE = ["employee_agent", "recommendation_agent", "FINISH"]
+CONFIG = {"configurable": {"langgraph_auth_user": {
+    "identity": "jake", "role": "customer", "name": "Jake", "customer_id": 5, "user_id": 5,
+}}}
+
+
+@pytest.mark.parametrize("message, agents, expected", [
+    ("show my invoices", CUSTOMER, "customer_agent"),
+    ("what's in my cart?", CUSTOMER, "customer_agent"),
+    ("recommend some jazz", CUSTOMER, "recommendation_agent"),
+    ("delete invoice 12", EMPLOYEE, "employee_agent"),
+    ("hi there!", CUSTOMER, "FINISH"),
+    ("thanks so much", CUSTOMER, "FINISH"),
+    ("goodbye", EMPLOYEE, "FINISH"),
+])
+def test_fast_route_single_intent(message, agents, expected):
+    assert fast_route(message, agents) == expected
+
+
+@pytest.mark.parametrize("message", [
+    "find songs similar to Coldplay",  # A search word and a recommendation word
+    "what's new this week",  # No intent at all
+    "ok",
+    "okay",
+    "great",
+    "cool",
+])
+def test_fast_route_ambiguous(message):
+    assert fast_route(message, CUSTOMER) is None
+
+
+def test_fast_route_greeting_after_question_goes_to_llm():
+    assert fast_route("thanks", CUSTOMER, after_question=True) is None
+
+
+def test_compound_route_splits_clauses_in_order():
+    assert compound_route("show my invoices and recommend something new", CUSTOMER) == [
+        "customer_agent", "recommendation_agent",
+    ]
+    assert compound_route("suggest some rock, then show my purchases", CUSTOMER) == [
+        "recommendation_agent", "customer_agent",
+    ]
+
+
+@pytest.mark.parametrize("message", [
+    "find songs similar to Coldplay",  # One clause pointing at two agents
+    "show my invoices and my purchases",  # Several clauses, one agent
+    "recommend rock albums",
+])
+def test_compound_route_none(message):
+    assert compound_route(message, CUSTOMER) is None
+
+
+class FakeRouter:
+    def __init__(self, answer: str):
+        self.answer = answer
+        self.calls = 0
+
+    async def ainvoke(self, messages):
+        self.calls += 1
+        return AIMessage(content=self.answer)
+
+
+def _route(monkeypatch, messages, answer="customer_agent"):
+    router = FakeRouter(answer)
+    monkeypatch.setattr(supervisor, "model", router)
+    command = asyncio.run(supervisor_node({"messages": messages}, CONFIG))
+    return command, router
+
+
+def test_ok_after_question_is_not_finished(monkeypatch):
+    command, router = _route(monkeypatch, [
+        HumanMessage(content="recommend rock albums"),
+        AIMessage(content="Here are some picks. Want me to add the top 3 to your cart?"),
+        HumanMessage(content="ok"),
+    ])
+    assert router.calls == 1
+    assert command.goto == "customer_agent"
+
+
+def test_thanks_after_question_goes_to_llm(monkeypatch):
+    command, router = _route(monkeypatch, [
+        AIMessage(content="Want me to add the top 3 to your cart?"),
+        HumanMessage(content="thanks"),
+    ])
+    assert router.calls == 1
+    assert command.goto == "customer_agent"
+
+
+def test_thanks_after_answer_finishes_without_llm(monkeypatch):
+    command, router = _route(monkeypatch, [
+        AIMessage(content="Your cart has 3 tracks."),
+        HumanMessage(content="thanks"),
+    ])
+    assert router.calls == 0
+    assert command.goto == "__end__"
+
+
+def test_clear_request_skips_llm(monkeypatch):
+    command, router = _route(monkeypatch, [HumanMessage(content="show my invoices")])
+    assert router.calls == 0
+    assert command.goto == "customer_agent"
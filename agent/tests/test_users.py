@@ -0,0 +1,85 @@
+import asyncio
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src import db, users
+from src.users import lookup_user
+
+LOGINS = ["luís", "leonie", "françois", "bjørn", "františek", "helena", "astrid", "daan",
+          "kara", "eduardo", "alexandre", "roberto", "fernanda", "mark", "jennifer", "frank"]
+
+
+@pytest.fixture
+def small_pool(chinook, monkeypatch):
+    """Two pooled connections, two executor threads, and a short checkout timeout."""
+    monkeypatch.setattr(db, "pool", db.ConnectionPool(size=2, timeout=3))
+    executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="db")
+    monkeypatch.setattr(db, "executor", executor)
+    yield
+    executor.shutdown()
+
+
+def test_lookup_user_finds_customer(chinook):
+    user = asyncio.run(lookup_user("Leonie"))
+    assert user["role"] == "customer"
+    assert user["name"] == "Leonie Köhler"
+
+
+def test_more_concurrent_lookups_than_pool_slots(small_pool):
+    def tool_query(conn):
+        time.sleep(0.01)
+        return conn.execute("SELECT COUNT(*) FROM tracks").fetchone()[0]
+
+    async def main():
+        # Logins and tool-style queries all competing for two connections
+        return await asyncio.gather(
+            *(lookup_user(token) for token in LOGINS),
+            *(db.run_with_db(tool_query) for _ in LOGINS),
+        )
+
+    start = time.perf_counter()
+    results = asyncio.run(main())
+    assert time.perf_counter() - start < 2  # Well under the checkout timeout
+    assert [user["name"].split()[0].lower() for user in results[:len(LOGINS)]] == LOGINS
+    assert db.pool.stats()["timeouts"] == 0
+
+
+def test_lookup_started_before_invalidation_is_not_cached(chinook, monkeypatch):
+    monkeypatch.setattr(users, "VERSION_CHECK_INTERVAL", 0)
+    calls = []
+    real_lookup = users.lookup_user
+
+    async def main():
+        started, release = asyncio.Event(), asyncio.Event()
+
+        async def slow_lookup(token):
+            calls.append(token)
+            user = await real_lookup(token)
+            if len(calls) == 1:
+                started.set()
+                await release.wait()  # Finishes only after the version moves
+            return user
+
+        monkeypatch.setattr(users, "lookup_user", slow_lookup)
+        cache = users.UserCache()
+        first = asyncio.create_task(cache.get("leonie"))
+        await started.wait()
+
+        with sqlite3.connect(chinook) as conn:
+            conn.execute("UPDATE customers SET SupportRepId = 4 WHERE CustomerId = 2")
+        await cache.get("françois")  # Sees the new version and drops the cache
+        # Joins no stale lookup: starts its own
+        second = asyncio.create_task(cache.get("leonie"))
+        release.set()
+        await first
+        await second
+        await cache.get("leonie")
+        return cache
+
+    cache = asyncio.run(main())
+    assert calls == ["leonie", "françois", "leonie"]
+    assert cache.stats["stale_skipped"] == 1
+    assert cache.stats["hits"] == 1
@@ -0,0 +1,109 @@
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from src import db
+from src.writer import Writer, WriterStopped
+
+
+def _insert(customer_id: int):
+    def job(conn):
+        conn.execute("INSERT INTO carts (CustomerId, TrackId, AddedAt) VALUES (?, 1, 'test')", (customer_id,))
+        return customer_id
+    return job
+
+
+def _failing(conn):
+    conn.execute("INSERT INTO carts (CustomerId, TrackId, AddedAt) VALUES (2, 1, 'test')")
+    raise ValueError("boom")
+
+
+def _cart_customers(path) -> list[int]:
+    with sqlite3.connect(path) as conn:
+        return [r[0] for r in conn.execute("SELECT CustomerId FROM carts WHERE AddedAt = 'test' ORDER BY CustomerId")]
+
+
+@pytest.fixture
+def writer(chinook):
+    w = Writer()
+    yield w
+    w.close()
+
+
+def _hold(writer) -> threading.Event:
+    """Occupy the writer thread until the returned event is set, so later jobs queue up."""
+    release = threading.Event()
+    started = threading.Event()
+    writer.submit(lambda conn: started.set() or release.wait(5))
+    started.wait(5)
+    return release
+
+
+def test_failing_job_is_rolled_back_alone(chinook, writer):
+    release = _hold(writer)
+    futures = [writer.submit(_insert(1)), writer.submit(_failing), writer.submit(_insert(3))]
+    release.set()
+
+    assert futures[0].result(5) == 1
+    with pytest.raises(ValueError):
+        futures[1].result(5)
+    assert futures[2].result(5) == 3
+    assert _cart_customers(chinook) == [1, 3]
+    assert writer.stats["batches"] == 2  # The held job, then all three together
+    assert writer.stats["failed_jobs"] == 1
+
+
+def test_result_only_after_commit(chinook, writer):
+    assert writer.write(_insert(1)) == 1
+    # A separate connection sees the row as soon as write() returns
+    assert _cart_customers(chinook) == [1]
+
+
+class Abort(BaseException):
+    """Not an Exception, so the job's savepoint doesn't catch it and the batch fails."""
+
+
+def _abort(conn):
+    raise Abort()
+
+
+def test_failed_batch_fails_every_job(chinook, writer):
+    release = _hold(writer)
+    futures = [writer.submit(_insert(1)), writer.submit(_abort)]
+    release.set()
+    for future in futures:
+        with pytest.raises(Abort):
+            future.result(5)
+    assert writer.stats["failed_batches"] == 1
+    assert _cart_customers(chinook) == []
+    assert writer.write(_insert(4)) == 4  # The next batch commits normally
+
+
+def test_writer_restarts_after_connect_fails(chinook, writer, monkeypatch):
+    real_connect = db.connect
+
+    def broken():
+        raise sqlite3.OperationalError("unable to open database file")
+
+    monkeypatch.setattr(db, "connect", broken)
+    with pytest.raises(WriterStopped):
+        writer.write(_insert(1))
+
+    monkeypatch.setattr(db, "connect", real_connect)
+    assert writer.write(_insert(2)) == 2
+    assert writer.stats["restarts"] == 1
+    assert _cart_customers(chinook) == [2]
+
+
+def test_write_times_out_instead_of_hanging(chinook, writer):
+    writer.timeout = 0.2
+    release = _hold(writer)
+    start = time.perf_counter()
+    with pytest.raises(TimeoutError):
+        writer.write(_insert(1))
+    assert time.perf_counter() - start < 2
+    release.set()
+    writer.close()
+    assert _cart_customers(chinook) == []  # Cancelled before it ran
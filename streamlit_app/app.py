@@ -6,12 +6,17 @@ A simple chat interface for the LangGraph-powered music store assistant.
 
 import streamlit as st
 import streamlit.components.v1 as components
-from langgraph_sdk import get_sync_client
+
+from sdk_client import build_client
 
 # Configuration
 LANGGRAPH_URL = "http://localhost:8123"
 ASSISTANT_ID = "music_store"
 
+# Fields of a purchase confirmation echoed back on confirm: the tool charges
+# only if they still match, since it re-reads prices and the cart when it resumes
+CONFIRMED_FIELDS = ("price", "track_ids")
+
 # Available users for demo (all passwords are "demo123")
 DEMO_USERS = {
     "julia": {"name": "Julia Schottenstein", "role": "employee", "password": "demo123"},
@@ -379,6 +384,10 @@ if "pending_interrupt" not in st.session_state:
 if "pending_prompt" not in st.session_state:
     st.session_state.pending_prompt = None
 
+# SDK client, built on first use and kept for the whole login
+if "client" not in st.session_state:
+    st.session_state.client = None
+
 
 def authenticate(username: str, password: str) -> bool:
     """Validate username and password."""
@@ -390,6 +399,9 @@ def authenticate(username: str, password: str) -> bool:
 
 def logout():
     """Clear session and log out user."""
+    if st.session_state.client is not None:
+        st.session_state.client.close()
+        st.session_state.client = None
     st.session_state.authenticated = False
     st.session_state.current_user = None
     st.session_state.messages = []
@@ -435,15 +447,121 @@ def login_page():
 
 
 def get_client():
-    """Create a LangGraph client with auth headers."""
-    return get_sync_client(
-        url=LANGGRAPH_URL,
-        headers={"Authorization": f"Bearer {st.session_state.current_user}"},
-    )
+    """Get this session's LangGraph client, reusing its pooled connections across turns."""
+    if st.session_state.client is None:
+        st.session_state.client = build_client(LANGGRAPH_URL, st.session_state.current_user)
+    return st.session_state.client
+
+
+def _text_of(content) -> str:
+    """Text from a message or chunk content, which may be a string or content blocks."""
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "".join(
+            block.get("text", "") for block in content
+            if isinstance(block, dict) and block.get("type", "text") == "text"
+        )
+    return ""
+
+
+def _token_stream(stream, status_container, result: dict):
+    """Yield agent reply tokens as they arrive, for st.write_stream.
+
+    The run is followed through deltas only: token chunks and per-node updates
+    go into a message store keyed by message id, so the server never has to
+    send the full state. When the stream ends, result holds "response" (the
+    last AI message) and "interrupt" (a pending interrupt or None).
+    """
+    store: dict[str, dict] = {}
+    current_id = None
+
+    # Agents the supervisor runs in parallel stream at the same time. One is shown
+    # live; the others' tokens are held back until it finishes, so replies don't interleave.
+    live_branch = None
+    held: dict[str, list[tuple[str, str]]] = {}
+    finished: set[str] = set()
+
+    def show(message_id, text):
+        nonlocal current_id
+        # Separate consecutive AI messages (e.g. text before and after a tool call)
+        separator = "\n\n" if current_id is not None and message_id != current_id else ""
+        current_id = message_id
+        return separator + text
+
+    for chunk in stream:
+        # Token chunks from the agents' models; subgraph events are "messages|<node>:<task>|..."
+        event, _, namespace = chunk.event.partition("|")
+        if event == "messages":
+            message, _metadata = chunk.data
+            if message.get("type") not in ("AIMessageChunk", "ai"):
+                continue
+            text = _text_of(message.get("content"))
+            if not text:
+                continue
+            entry = store.setdefault(message.get("id"), {"type": "ai", "content": ""})
+            entry["content"] += text
+            branch = namespace.split(":")[0]
+            if live_branch is None:
+                live_branch = branch
+            if branch == live_branch:
+                yield show(message.get("id"), text)
+            else:
+                held.setdefault(branch, []).append((message.get("id"), text))
+
+        # Node updates: new messages for the store, node status, and interrupts
+        elif chunk.event == "updates":
+            if isinstance(chunk.data, dict):
+                # Check for interrupt in updates
+                if "__interrupt__" in chunk.data:
+                    interrupt_info = chunk.data["__interrupt__"]
+                    if interrupt_info and len(interrupt_info) > 0:
+                        # Extract the interrupt value
+                        interrupt_obj = interrupt_info[0]
+                        if hasattr(interrupt_obj, "value"):
+                            result["interrupt"] = interrupt_obj.value
+                        elif isinstance(interrupt_obj, dict):
+                            result["interrupt"] = interrupt_obj.get("value", interrupt_obj)
+                        else:
+                            result["interrupt"] = interrupt_obj
+                else:
+                    for node_name, update in chunk.data.items():
+                        if node_name == "__metadata__":
+                            continue
+                        status_container.update(label=f"Running: {node_name}...", state="running")
+                        # The live agent finished: catch up on the next one and show it live
+                        finished.add(node_name)
+                        while live_branch in finished:
+                            live_branch = next(iter(held), None)
+                            for message_id, text in held.pop(live_branch, []):
+                                yield show(message_id, text)
+                        # Final messages replace any streamed partial with the same id
+                        messages = update.get("messages", []) if isinstance(update, dict) else []
+                        for message in messages:
+                            if isinstance(message, dict):
+                                store[message.get("id") or f"_{len(store)}"] = message
+
+    # Anything still held back (a branch interrupted or cut short)
+    for pieces in held.values():
+        for message_id, text in pieces:
+            yield show(message_id, text)
+
+    # The answer is the last message of the turn, if it is an AI reply
+    if store:
+        last_msg = list(store.values())[-1]
+        if last_msg.get("type") in ("ai", "AIMessageChunk") and not last_msg.get("tool_calls"):
+            result["response"] = _text_of(last_msg.get("content"))
+
+    # Nothing was streamed (e.g. a non-streaming model) - show the final answer whole
+    if current_id is None and result["response"] and not result["interrupt"]:
+        yield result["response"]
 
 
 def stream_response_with_status(user_message: str, status_container, is_resume: bool = False, resume_value: dict = None):
-    """Stream response from LangGraph backend with live status updates.
+    """Stream response from LangGraph backend, rendering tokens as they arrive.
+
+    Reply tokens are written at the current position with st.write_stream, so
+    call this outside the status container; node status updates go to it.
 
     Args:
         user_message: The user's message (ignored if is_resume=True)
@@ -461,8 +579,10 @@ def stream_response_with_status(user_message: str, status_container, is_resume:
         thread = client.threads.create()
         st.session_state.thread_id = thread["thread_id"]
 
-    final_response = ""
-    interrupt_data = None
+    # Deltas only: "messages-tuple" carries LLM tokens and "updates" each node's
+    # new messages. The agents run as subgraphs of their nodes, so subgraph
+    # streaming is needed for their tokens to come through.
+    stream_mode = ["messages-tuple", "updates"]
 
     # Either resume or start new run
     if is_resume and resume_value is not None:
@@ -471,64 +591,21 @@ def stream_response_with_status(user_message: str, status_container, is_resume:
             assistant_id=ASSISTANT_ID,
             input=None,
             command={"resume": resume_value},
-            stream_mode=["values", "updates"],
+            stream_mode=stream_mode,
+            stream_subgraphs=True,
         )
     else:
         stream = client.runs.stream(
             thread_id=st.session_state.thread_id,
             assistant_id=ASSISTANT_ID,
             input={"messages": [{"role": "user", "content": user_message}]},
-            stream_mode=["values", "updates"],
+            stream_mode=stream_mode,
+            stream_subgraphs=True,
         )
 
-    for chunk in stream:
-        # Show which node is running
-        if chunk.event == "updates":
-            if isinstance(chunk.data, dict):
-                # Check for interrupt in updates
-                if "__interrupt__" in chunk.data:
-                    interrupt_info = chunk.data["__interrupt__"]
-                    if interrupt_info and len(interrupt_info) > 0:
-                        # Extract the interrupt value
-                        interrupt_obj = interrupt_info[0]
-                        if hasattr(interrupt_obj, "value"):
-                            interrupt_data = interrupt_obj.value
-                        elif isinstance(interrupt_obj, dict):
-                            interrupt_data = interrupt_obj.get("value", interrupt_obj)
-                        else:
-                            interrupt_data = interrupt_obj
-                else:
-                    for node_name in chunk.data.keys():
-                        if node_name != "__metadata__":
-                            status_container.update(label=f"Running: {node_name}...", state="running")
-
-        # Extract response from values
-        if chunk.event == "values":
-            data = chunk.data
-            if isinstance(data, dict):
-                messages = data.get("messages", [])
-            else:
-                messages = getattr(data, "messages", [])
-
-            if messages:
-                last_msg = messages[-1]
-
-                # Handle both dict and object forms
-                if isinstance(last_msg, dict):
-                    content = last_msg.get("content", "")
-                    msg_type = last_msg.get("type", "")
-                elif hasattr(last_msg, "content"):
-                    content = last_msg.content
-                    msg_type = getattr(last_msg, "type", "")
-                else:
-                    content = str(last_msg)
-                    msg_type = "unknown"
-
-                # Accept AI messages
-                if msg_type == "ai" and content:
-                    final_response = content
-
-    return final_response, interrupt_data
+    result = {"response": "", "interrupt": None}
+    st.write_stream(_token_stream(stream, status_container, result))
+    return result["response"], result["interrupt"]
 
 
 def chat_page():
@@ -635,11 +712,12 @@ def chat_page():
                 btn_label = "✓ Approve" if is_manager_approval else "✓ Confirm"
                 if st.button(btn_label, use_container_width=True, type="primary"):
                     st.session_state.pending_interrupt = None
-                    with st.status("Processing...", expanded=True) as status:
-                        response, new_interrupt = stream_response_with_status(
-                            "", status, is_resume=True, resume_value={confirm_key: True}
-                        )
-                        status.update(label="Complete!", state="complete", expanded=False)
+                    status = st.status("Processing...", expanded=False)
+                    confirmed = {k: interrupt[k] for k in CONFIRMED_FIELDS if k in interrupt}
+                    response, new_interrupt = stream_response_with_status(
+                        "", status, is_resume=True, resume_value={confirm_key: True, **confirmed}
+                    )
+                    status.update(label="Complete!", state="complete", expanded=False)
 
                     if new_interrupt:
                         st.session_state.pending_interrupt = new_interrupt
@@ -653,11 +731,11 @@ def chat_page():
                     # Store interrupt info for denial message before clearing
                     denied_action = interrupt.get("action", "action")
                     st.session_state.pending_interrupt = None
-                    with st.status("Cancelling...", expanded=True) as status:
-                        response, new_interrupt = stream_response_with_status(
-                            "", status, is_resume=True, resume_value={confirm_key: False}
-                        )
-                        status.update(label="Cancelled", state="complete", expanded=False)
+                    status = st.status("Cancelling...", expanded=False)
+                    response, new_interrupt = stream_response_with_status(
+                        "", status, is_resume=True, resume_value={confirm_key: False}
+                    )
+                    status.update(label="Cancelled", state="complete", expanded=False)
 
                     # Use backend response if available, otherwise show denial acknowledgement
                     if response:
@@ -678,9 +756,10 @@ def chat_page():
         # Get assistant response
         with st.chat_message("assistant"):
             try:
-                with st.status("Processing...", expanded=True) as status:
-                    response, interrupt_data = stream_response_with_status(prompt, status)
-                    status.update(label="Complete!", state="complete", expanded=False)
+                # Status sits above the reply, which streams in below it token by token
+                status = st.status("Processing...", expanded=False)
+                response, interrupt_data = stream_response_with_status(prompt, status)
+                status.update(label="Complete!", state="complete", expanded=False)
 
                 if interrupt_data:
                     # Store interrupt and show confirmation UI
@@ -0,0 +1,93 @@
+"""Per-turn client overhead: a new app client (sdk_client.build_client) every turn vs. one per session.
+
+Run from the streamlit_app directory:
+
+    python -m benchmarks.client_reuse
+
+A local stub server stands in for the LangGraph backend and answers
+instantly, so the numbers are pure client cost: building the httpx client
+and connection pool, and opening a TCP connection (plus a TLS handshake
+against a real https deployment, which this doesn't include).
+"""
+
+import json
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from sdk_client import build_client
+
+TURNS = 300
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Answers every request like POST /threads, over keep-alive HTTP/1.1."""
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True  # Headers and body go out as separate writes
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        body = json.dumps({"thread_id": "stub"}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _client(url: str):
+    # The client the app builds for a signed-in user
+    return build_client(url, "jake")
+
+
+def per_turn_client(url: str) -> list[float]:
+    """The old path: get_client() built a new client on every turn."""
+    timings = []
+    for _ in range(TURNS):
+        start = time.perf_counter()
+        client = _client(url)
+        client.threads.create()
+        timings.append(time.perf_counter() - start)
+        client.close()
+    return timings
+
+
+def session_client(url: str) -> list[float]:
+    """The new path: one client per session, its connection kept alive."""
+    client = _client(url)
+    timings = []
+    for _ in range(TURNS):
+        start = time.perf_counter()
+        client.threads.create()
+        timings.append(time.perf_counter() - start)
+    client.close()
+    return timings
+
+
+def _report(label: str, timings: list[float]):
+    timings = sorted(timings)
+    print(
+        f"{label:<20} mean={statistics.mean(timings) * 1000:.2f}ms "
+        f"p50={statistics.median(timings) * 1000:.2f}ms "
+        f"p99={timings[int(len(timings) * 0.99)] * 1000:.2f}ms"
+    )
+
+
+def main():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}"
+
+    print(f"{TURNS} requests each against a stub server\n")
+    _report("client per turn", per_turn_client(url))
+    _report("client per session", session_client(url))
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
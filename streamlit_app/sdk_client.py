@@ -0,0 +1,47 @@
+"""LangGraph SDK client for a signed-in user, shared by the app and its benchmarks."""
+
+import os
+
+import httpx
+import langgraph_sdk
+from langgraph_sdk.client import SyncLangGraphClient
+
+try:
+    import h2  # noqa: F401  # Enables HTTP/2 in httpx
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+def client_headers(token: str) -> dict[str, str]:
+    """The headers get_sync_client() sends, plus the user's bearer token.
+
+    That is the SDK User-Agent and, for authenticated deployments, an x-api-key
+    from LANGGRAPH_API_KEY, LANGSMITH_API_KEY or LANGCHAIN_API_KEY, first set wins.
+    """
+    headers = {
+        "User-Agent": f"langgraph-sdk-py/{langgraph_sdk.__version__}",
+        "Authorization": f"Bearer {token}",
+    }
+    for prefix in ("LANGGRAPH", "LANGSMITH", "LANGCHAIN"):
+        if api_key := os.environ.get(f"{prefix}_API_KEY"):
+            headers["x-api-key"] = api_key.strip().strip('"').strip("'")
+            break
+    return headers
+
+
+def build_client(url: str, token: str) -> SyncLangGraphClient:
+    """Create a LangGraph client for one user, on HTTP/2 when h2 is installed.
+
+    SyncLangGraphClient wraps the httpx.Client it is given, so the transport is
+    configured here rather than swapped in after get_sync_client() builds its
+    own. httpx negotiates HTTP/2 over TLS only, so a plain http:// backend
+    keeps using HTTP/1.1 keep-alive.
+    """
+    http = httpx.Client(
+        base_url=url,
+        headers=client_headers(token),
+        timeout=httpx.Timeout(connect=5, read=300, write=300, pool=5),  # get_sync_client's defaults
+        transport=httpx.HTTPTransport(retries=5, http2=HTTP2_AVAILABLE),
+    )
+    return SyncLangGraphClient(http)